@@ -0,0 +1,244 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.Charset;
+import java.util.ArrayList;
+import java.util.IdentityHashMap;
+import java.util.List;
+import java.util.Map;
+
+/**
+ * Runs the main method of a student program over and over inside a single JVM, so that the JVM only has to start
+ * up once per student instead of once per test case.
+ *
+ * Requests are read from stdin, and everything the program prints is sent back over stdout as frames of the form
+ * (byte type, int length, byte[length] data). Each test gets a fresh class loader so static state never carries
+ * over between test cases. If the program calls System.exit, the JVM really does exit with that code after an
+ * EXITING frame is sent, and the Python side starts a new harness for the next test case.
+ */
+public class WSUAutograderHarness {
+    private static final int STDOUT = 1;
+    private static final int STDERR = 2;
+    private static final int DONE = 3;
+    private static final int EXITING = 4;
+
+    private static DataOutputStream channel;
+    private static volatile boolean testRunning = false;
+
+    /**
+     * An output stream that forwards everything written to it over the channel as frames of a single type
+     */
+    private static class FrameOutputStream extends OutputStream {
+        private final int type;
+
+        FrameOutputStream(int type) {
+            this.type = type;
+        }
+
+        @Override
+        public void write(int b) {
+            sendFrame(type, new byte[] {(byte) b}, 0, 1);
+        }
+
+        @Override
+        public void write(byte[] data, int offset, int length) {
+            sendFrame(type, data, offset, length);
+        }
+    }
+
+    private static synchronized void sendFrame(int type, byte[] data, int offset, int length) {
+        try {
+            channel.writeByte(type);
+            channel.writeInt(length);
+            channel.write(data, offset, length);
+            channel.flush();
+        } catch (IOException e) {
+            // The autograder stopped listening, so there is nobody left to report to
+        }
+    }
+
+    private static void sendExitCode(int exitCode) {
+        byte[] data = {(byte) (exitCode >>> 24), (byte) (exitCode >>> 16), (byte) (exitCode >>> 8), (byte) exitCode};
+        sendFrame(DONE, data, 0, data.length);
+    }
+
+    private static byte[] readBytes(DataInputStream input) throws IOException {
+        byte[] data = new byte[input.readInt()];
+        input.readFully(data);
+        return data;
+    }
+
+    private static String readString(DataInputStream input) throws IOException {
+        return new String(readBytes(input), "UTF-8");
+    }
+
+    private static String getEncoding(String property) {
+        String encoding = System.getProperty(property);
+        if (encoding == null) {
+            encoding = System.getProperty("sun." + property);
+        }
+        return encoding != null ? encoding : Charset.defaultCharset().name();
+    }
+
+    private static boolean isHarnessFrame(StackTraceElement frame) {
+        String className = frame.getClassName();
+        return className.startsWith(WSUAutograderHarness.class.getName())
+                || className.startsWith("java.lang.reflect.")
+                || className.startsWith("java.lang.invoke.")
+                || className.startsWith("jdk.internal.reflect.")
+                || className.startsWith("sun.reflect.")
+                || className.startsWith("java.lang.Thread");
+    }
+
+    /**
+     * Removes the harness and reflection frames from the bottom of every stack trace in an exception chain, so the
+     * printed trace matches what the program would have printed when run on its own
+     */
+    private static void trimStackTraces(Throwable throwable, Map<Throwable, Boolean> seen) {
+        if (throwable == null || seen.containsKey(throwable)) {
+            return;
+        }
+        seen.put(throwable, true);
+
+        StackTraceElement[] frames = throwable.getStackTrace();
+        int end = frames.length;
+        while (end > 0 && isHarnessFrame(frames[end - 1])) {
+            end--;
+        }
+
+        StackTraceElement[] trimmed = new StackTraceElement[end];
+        System.arraycopy(frames, 0, trimmed, 0, end);
+        throwable.setStackTrace(trimmed);
+
+        trimStackTraces(throwable.getCause(), seen);
+        for (Throwable suppressed : throwable.getSuppressed()) {
+            trimStackTraces(suppressed, seen);
+        }
+    }
+
+    private static void reportUncaught(Throwable throwable) {
+        trimStackTraces(throwable, new IdentityHashMap<Throwable, Boolean>());
+        System.err.print("Exception in thread \"main\" ");
+        throwable.printStackTrace(System.err);
+    }
+
+    /**
+     * Waits for every non-daemon thread the program started, since the JVM would not exit until they finished
+     */
+    private static void joinNonDaemonThreads(ThreadGroup group) throws InterruptedException {
+        boolean joined = true;
+
+        while (joined) {
+            joined = false;
+            Thread[] threads = new Thread[group.activeCount() + 1];
+            int count = group.enumerate(threads, true);
+
+            for (int i = 0; i < count; i++) {
+                if (!threads[i].isDaemon() && threads[i] != Thread.currentThread()) {
+                    threads[i].join();
+                    joined = true;
+                }
+            }
+        }
+    }
+
+    private static int runMain(URL[] classPath, final String mainClass, final String[] args) throws Exception {
+        final URLClassLoader loader = new URLClassLoader(classPath, ClassLoader.getSystemClassLoader());
+        final int[] exitCode = {0};
+
+        ThreadGroup group = new ThreadGroup("main");
+        Thread mainThread = new Thread(group, new Runnable() {
+            @Override
+            public void run() {
+                try {
+                    Class<?> programClass = Class.forName(mainClass, true, loader);
+                    Method main = programClass.getMethod("main", String[].class);
+                    main.invoke(null, (Object) args);
+                } catch (InvocationTargetException e) {
+                    reportUncaught(e.getCause());
+                    exitCode[0] = 1;
+                } catch (Throwable e) {
+                    reportUncaught(e);
+                    exitCode[0] = 1;
+                }
+            }
+        }, "main");
+
+        mainThread.setContextClassLoader(loader);
+        mainThread.start();
+        mainThread.join();
+        joinNonDaemonThreads(group);
+
+        loader.close();
+        return exitCode[0];
+    }
+
+    public static void main(String[] args) throws Exception {
+        channel = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(FileDescriptor.out)));
+        DataInputStream requests = new DataInputStream(new BufferedInputStream(new FileInputStream(FileDescriptor.in)));
+
+        List<URL> classPath = new ArrayList<URL>();
+        for (String entry : args[0].split(File.pathSeparator)) {
+            classPath.add(new File(entry).toURI().toURL());
+        }
+
+        final PrintStream out = new PrintStream(new BufferedOutputStream(new FrameOutputStream(STDOUT), 8192), true, getEncoding("stdout.encoding"));
+        final PrintStream err = new PrintStream(new BufferedOutputStream(new FrameOutputStream(STDERR), 8192), true, getEncoding("stderr.encoding"));
+        System.setOut(out);
+        System.setErr(err);
+
+        // System.exit can't be intercepted on current JVMs, so the JVM is allowed to exit with the program's
+        //   exit code after it has been told the test is over
+        Runtime.getRuntime().addShutdownHook(new Thread(new Runnable() {
+            @Override
+            public void run() {
+                if (testRunning) {
+                    out.flush();
+                    err.flush();
+                    sendFrame(EXITING, new byte[0], 0, 0);
+                }
+            }
+        }));
+
+        while (true) {
+            String mainClass;
+
+            try {
+                mainClass = readString(requests);
+            } catch (EOFException e) {
+                break;
+            }
+
+            String[] programArgs = new String[requests.readInt()];
+            for (int i = 0; i < programArgs.length; i++) {
+                programArgs[i] = readString(requests);
+            }
+
+            System.setIn(new ByteArrayInputStream(readBytes(requests)));
+
+            testRunning = true;
+            int exitCode = runMain(classPath.toArray(new URL[0]), mainClass, programArgs);
+            out.flush();
+            err.flush();
+            testRunning = false;
+
+            sendExitCode(exitCode);
+        }
+
+        System.exit(0);
+    }
+}
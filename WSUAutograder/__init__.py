@@ -1,2 +1,8 @@
+from .gradeCache import GradeCache
+from .profiler import Profiler
 from .program import Program, TestCase, TestResult
-from .smartGrader import SmartGrader, Token, TokenType
\ No newline at end of file
+from .resultCache import ResultCache
+from .resultWriter import ResultWriter
+from .smartGrader import GraderProfile, SmartGrader, TestGrade, Token, TokenType
+from .submissionArchive import SubmissionArchive
+from .gradingServer import GradingServer
\ No newline at end of file
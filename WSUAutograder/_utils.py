@@ -1,7 +1,10 @@
+import hashlib
 import os
 
 import re as re
+from collections import OrderedDict
 
+from binaryornot.check import is_binary
 from pygments import highlight
 from pygments.lexers import get_lexer_by_name
 from pygments.formatters import TerminalTrueColorFormatter
@@ -11,23 +14,81 @@ import argparse
 import json
 import os
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from os.path import join
 
-from WSUAutograder import Program, TestCase, SmartGrader
+from tqdm import tqdm
+
+from WSUAutograder import GradeCache, GraderProfile, Program, ResultCache, ResultWriter, TestCase, SmartGrader
+from WSUAutograder import profiler
+from WSUAutograder.profiler import span
+from WSUAutograder.similarity import SimilarityIndex, fingerprint_sources, write_similarity_report
 
 
 FORCE_WINDOWS_RENDERING = False
 
 CHECKMARK, XMARK = ('✔', '✘') if os.name != 'nt' and not FORCE_WINDOWS_RENDERING else ('A', 'X')
 
+# Files bigger than this aren't syntax highlighted or printed, since they're almost never something a student wrote by hand
+MAX_RENDER_BYTES = 256 * 1024
+
+# The most similar pairs of students printed once grading finishes. The rest are only written to the report file
+MAX_PRINTED_PAIRS = 20
+
+# Highlighted files, keyed by the hash of their contents, so that starter code shared by every student and files that are
+#   viewed more than once are only highlighted a single time
+_highlight_cache = OrderedDict()
+_highlight_cache_size = 256
+
+# Analyses of the student outputs graded in this process, so students with identical outputs are only analyzed once
+_grade_cache = GradeCache()
+
+
+def highlight_source(data, language='java'):
+    """Syntax highlights source code for the terminal, reusing the result if the same code has been highlighted before
+
+    Args:
+        data (bytes): The contents of the source file
+        language (str, optional): The name of the pygments lexer to use. Defaults to 'java'.
+
+    Returns:
+        str: The highlighted source code
+    """
+    key = (hashlib.sha1(data).hexdigest(), language)
+
+    if key in _highlight_cache:
+        _highlight_cache.move_to_end(key)
+        return _highlight_cache[key]
+
+    text = data.decode('utf-8', errors='replace').replace('\t', '    ')
+    lexer = get_lexer_by_name(language, stripall=True)
+    formatter = TerminalTrueColorFormatter(style='fruity')
+
+    with span('render', language=language):
+        highlighted = highlight(text, lexer, formatter)
+
+    _highlight_cache[key] = highlighted
+
+    if len(_highlight_cache) > _highlight_cache_size:
+        _highlight_cache.popitem(last=False)
+
+    return highlighted
+
 
 def print_file(file_path, language='java'):
-    with open(file_path) as f:
-        text = f.read()
-        text = text.replace('\t', '    ')
-        lexer = get_lexer_by_name(language, stripall=True)
-        formatter = TerminalTrueColorFormatter(style='fruity')
-        print_formatted_text(highlight(text, lexer, formatter))
+    size = os.path.getsize(file_path)
+
+    if size > MAX_RENDER_BYTES:
+        print_formatted_text(f'\033[2;3m({size // 1024} KiB, too large to display)\033[0m')
+        return
+
+    if is_binary(file_path):
+        print_formatted_text('\033[2;3m(Binary file, not displayed)\033[0m')
+        return
+
+    with open(file_path, 'rb') as f:
+        print_formatted_text(highlight_source(f.read(), language))
 
 
 # TODO Have this take a dictionary or similar with formatting information
@@ -45,6 +106,18 @@ def print_source_files(files):
         print_file(i, language=os.path.splitext(i)[1][1:])
 
 
+def print_submission(program):
+    """Prints every source file in a program, followed by a listing of its directory
+
+    Args:
+        program (Program): The program to print
+    """
+    print_source_files(program.get_source_files())
+
+    print_formatted_text('\033[1;4mProject Directory Listing\033[0m')
+    print_directory_listing(program.get_directory_listing())
+
+
 def print_directory_listing(dir_dict, recursion_level=0, indent='│   ', dir_branch='├───┐', file_branch='├── '):
     file_indent = f'{recursion_level * indent}{file_branch}'
     dir_indent = f'{(recursion_level - 1) * indent}{dir_branch}'
@@ -164,15 +237,9 @@ def print_table(student_grades, test_cases):
             print_formatted_text("    \033[2;3mSkipped\033[0m")
 
         else:
-            total_grade = 0
-            total_weight = 0
-
             for i, test_case in enumerate(test_cases):
                 grade = sg.get_test_grade(i)
 
-                total_grade += grade * test_case.weight
-                total_weight += test_case.weight
-
                 if grade < sg.pass_threshold:
                     grade = min(grade, 99)
                     pass_fail = f'\033[31;1m{XMARK}\033[0m'
@@ -182,10 +249,7 @@ def print_table(student_grades, test_cases):
 
                 print_formatted_text(f' {f"{grade:-3.0f}% {pass_fail}":{col_width}}', end=' ')
 
-            if total_weight != 0:
-                total_grade /= total_weight
-            else:
-                total_grade = 100
+            total_grade = sg.get_overall_grade()
 
             if total_grade < sg.pass_threshold:
                 total_grade = min(total_grade, 99)
@@ -199,20 +263,244 @@ def print_table(student_grades, test_cases):
             print_formatted_text(f' \033[1m{final_feedback}\033[0m')
 
 
+def run_program(program, test_cases, cache=None, description='Running Test Cases', max_parallel_tests=1, interactive=True):
+    """Compiles a program and runs it on a set of test cases. If a result cache is given, any test cases with cached results
+        aren't run again, and the program is only compiled if at least one test case needs to be run
+
+    Args:
+        program (Program): The program to run
+        test_cases (list(TestCase)): The test cases to run the program on
+        cache (ResultCache, optional): The cache to load results from and store new results in. Defaults to None.
+        description (str, optional): The description displayed on the progress bar. Defaults to 'Running Test Cases'.
+        max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+        interactive (bool, optional): Whether the user can be prompted while running the program, and whether a progress bar
+            is displayed. Defaults to True.
+
+    Returns:
+        list(TestResult): The results of the test cases, or None if the program failed to compile or has no executable
+    """
+    with span('cache_lookup'):
+        results = cache.load_results(program, test_cases) if cache is not None else [None] * len(test_cases)
+    missing_tests = [test for test, result in zip(test_cases, results) if result is None]
+
+    if len(missing_tests) == 0:
+        return results
+
+    if not program.compile():
+        return None
+
+    if not program.find_main_executable(interactive=interactive):
+        print('No executable was found')
+        return None
+
+    new_results = program.run_tests(missing_tests, description=description, max_parallel_tests=max_parallel_tests, show_progress=interactive)
+
+    if cache is not None:
+        cache.store_results(program, new_results)
+
+    new_results = iter(new_results)
+
+    return [result if result is not None else next(new_results) for result in results]
+
+
+def get_student_name(student):
+    """Gets the name of a student from the name of their submission's directory
+
+    Args:
+        student (Program): The student program
+
+    Returns:
+        str: The student's name
+    """
+    return student.directory.split(os.sep)[-1]
+
+
+# Settings that decide where programs are found and how they're built and run, or how the class is graded as a whole,
+#   rather than how each student's outputs are graded. language is used for both, so it's left to the SmartGrader too
+_run_settings = frozenset(['grader_directory', 'student_directory', 'max_parallel_tests', 'max_parallel_students', 'runner', 'cache_directory', 'max_cache_mb',
+                           'resource_limits', 'main_executable', 'main_class', 'compile_timeout', 'max_parallel_compiles', 'compiler_flags',
+                           'object_cache_directory', 'deduplicate_outputs', 'detect_similarity', 'similarity_threshold'])
+
+
+def get_grading_settings(settings):
+    """Picks out the settings a SmartGrader or GraderProfile is made with, leaving out the ones for building and running programs.
+        Anything that isn't a known setting is kept, so the SmartGrader can report it as unrecognized
+
+    Args:
+        settings (dict): The settings section of the config
+
+    Returns:
+        dict: The settings for grading the outputs
+    """
+    return {name: value for name, value in settings.items() if name not in _run_settings}
+
+
+def create_program(directory, settings):
+    """Creates a program using the language, runner, and executable from the settings section of the config
+
+    Args:
+        directory (str): The program's base directory
+        settings (dict): The settings section of the config
+
+    Returns:
+        Program: The program
+    """
+    return Program(directory, settings.get('language', 'java'), runner=settings.get('runner', 'subprocess'), resource_limits=settings.get('resource_limits', {}),
+                   main_executable=settings.get('main_executable'), main_class=settings.get('main_class'), compile_timeout=settings.get('compile_timeout', 60),
+                   max_parallel_compiles=settings.get('max_parallel_compiles'), compiler_flags=settings.get('compiler_flags', []),
+                   object_cache_directory=settings.get('object_cache_directory'))
+
+
+def grade_student(student, test_cases, settings, grader_profile, cache=None, max_parallel_tests=1, interactive=True):
+    """Compiles, runs, and analyzes a single student submission
+
+    Args:
+        student (Program): The student program to grade
+        test_cases (list(TestCase)): The test cases to run the student program on
+        settings (dict): The settings section of the config
+        grader_profile (GraderProfile): The results and token vectors of running the grader program on the test cases
+        cache (ResultCache, optional): The cache to reuse test results from. Defaults to None.
+        max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+        interactive (bool, optional): Whether the user can be prompted while grading, and whether progress bars
+            are displayed. Defaults to True.
+
+    Returns:
+        tuple: The student's name and their analyzed SmartGrader, with None in place of the SmartGrader if grading was skipped.
+            None is returned instead of a tuple if the submission failed to compile.
+    """
+    student_name = get_student_name(student)
+
+    if student.skip_grading:
+        return student_name, None
+
+    with span('grade_student', student=student_name):
+        # The sources are read once, before compiling, for both the result cache and the fingerprints
+        if settings.get('detect_similarity', False):
+            with span('fingerprint', student=student_name):
+                source_fingerprints = fingerprint_sources(student.get_source_contents())
+
+        student_outputs = run_program(student, test_cases, cache, f'Testing Student {student_name} Submission', max_parallel_tests, interactive)
+
+        if student_outputs is None:
+            print('Compilation failed')
+            return None
+
+        with span('analyze', student=student_name):
+            sg = SmartGrader(get_grading_settings(settings), student_results=student_outputs, grader_profile=grader_profile)
+
+            if settings.get('deduplicate_outputs', True):
+                _grade_cache.analyze(sg)
+            else:
+                sg.analyze()
+
+        if settings.get('detect_similarity', False):
+            sg.source_fingerprints = source_fingerprints
+
+    return student_name, sg
+
+
+def _grade_student_worker(job):
+    # ProcessPoolExecutor.map only passes a single argument, so the grade_student arguments are bundled together
+    profile, *job = job
+    return profiler.call_profiled(profile, grade_student, *job, interactive=False)
+
+
+def grade_students(student_programs, test_cases, settings, grader_profile, cache=None, max_parallel_tests=1, max_parallel_students=1, interactive=True):
+    """Grades a list of student submissions, handing back each student's results as soon as they're available
+
+    Args:
+        student_programs (list(Program)): The student programs to grade
+        test_cases (list(TestCase)): The test cases to run the student programs on
+        settings (dict): The settings section of the config
+        grader_profile (GraderProfile): The results and token vectors of running the grader program on the test cases
+        cache (ResultCache, optional): The cache to reuse test results from. Defaults to None.
+        max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+        max_parallel_students (int, optional): The maximum number of students to grade at the same time, each in its own process. Defaults to 1.
+        interactive (bool, optional): Whether the user can be prompted while grading, and whether progress bars are displayed.
+            Students graded in parallel are never prompted. Defaults to True.
+
+    Yields:
+        tuple: Each student program along with the value grade_student returned for it, in the same order as the student programs
+    """
+    if max_parallel_students <= 1:
+        for student in student_programs:
+            yield student, grade_student(student, test_cases, settings, grader_profile, cache, max_parallel_tests, interactive)
+
+    else:
+        # Every student is compiled, run, and analyzed in a worker process so that the different stages of grading
+        #   overlap between students. map hands the results back in submission order, so the table stays sorted
+        jobs = [(profiler.is_enabled(), student, test_cases, settings, grader_profile, cache, max_parallel_tests) for student in student_programs]
+
+        with ProcessPoolExecutor(max_workers=max_parallel_students) as executor:
+            results = map(profiler.merge_profiled, executor.map(_grade_student_worker, jobs))
+            yield from zip(student_programs, tqdm(results, total=len(jobs), desc='Grading Student Submissions', disable=not interactive))
+
+
 def autograder():
     parser = argparse.ArgumentParser()
 
     # Take a path to the configuration file
     parser.add_argument('-c', '--config', type=str, default=None, help='The relative filepath to the config.json you would like to use')
 
+    # Review each student's code before grading it
+    parser.add_argument('--review', action='store_true', help='Show each student\'s code and ask whether to grade it before grading starts, instead of only showing it on request afterwards')
+
     # Take a path to the student's source directory
     parser.add_argument('-s', '--student-directory', type=str, default=None, help='Selects a specific student directory for grading. Overrides the value set in config')
 
     # Flag to disable printing student directory stuff
     parser.add_argument('-n', '--no-cat', action='store_true', help='Disable catting student files')
 
+    # Number of test cases to run at the same time
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='The maximum number of test cases to run in parallel. Overrides the value set in config')
+
+    # Number of students to grade at the same time
+    parser.add_argument('-p', '--parallel-students', type=int, default=None, help='The maximum number of students to grade in parallel. Overrides the value set in config')
+
+    # Flag to ignore previously cached results
+    parser.add_argument('--no-cache', action='store_true', help='Compile and run every program again instead of reusing cached results')
+
+    # Flag to analyze every student even if another student's outputs were identical
+    parser.add_argument('--no-dedup', action='store_true', help='Analyze every student\'s outputs, instead of reusing the grades of an earlier student whose outputs were identical')
+
+    # Flag to grade without ever waiting on the user
+    parser.add_argument('--batch', action='store_true', help='Grade every student without prompting or showing progress bars, then exit. Implies --no-cat')
+
+    # Address to hand out students to workers from
+    parser.add_argument('--coordinator', type=str, default=None, help='Grade students on workers started with autograder-worker, listening for them on [host:]port. Only listens on localhost unless a host is given')
+
+    # Workers to start on this machine
+    parser.add_argument('--local-workers', type=int, default=0, help='The number of workers to start on this machine. Implies --coordinator if it isn\'t given')
+
+    # The shared secret workers use to connect
+    parser.add_argument('--authkey', type=str, default=os.environ.get('AUTOGRADER_AUTHKEY', ''), help='The key workers need to connect to the coordinator. Defaults to $AUTOGRADER_AUTHKEY, or a random key that is printed')
+
+    # How long a worker gets to grade a single student
+    parser.add_argument('--job-timeout', type=float, default=600, help='Seconds a worker has to grade a student before it is handed to another worker')
+
+    # A bulk download to grade instead of the student directory
+    parser.add_argument('-a', '--archive', type=str, default=None, help='A zip file of student submissions, such as a Pilot bulk download, to grade instead of the student directory. Implies --no-cat')
+
+    # Time each phase of grading
+    parser.add_argument('--profile', type=str, nargs='?', default=None, const='', metavar='TRACE_FILE',
+                        help='Print how long each phase of grading took once every student is graded. If a file is given, a Chrome trace of the run is also written to it')
+
+    # Look for students with similar code
+    parser.add_argument('--similarity-report', type=str, nargs='?', default=None, const='', metavar='REPORT_FILE',
+                        help='Print the pairs of students whose code is suspiciously similar once every student is graded. If a file is given, every pair is also written to it as a CSV')
+
+    # Files to write the grades to
+    parser.add_argument('-o', '--output', action='append', default=[], help='A .jsonl or .csv file to write every student\'s grades to as they are graded. Can be given more than once')
+
     args = parser.parse_args()
 
+    if args.archive is not None and (args.coordinator is not None or args.local_workers > 0):
+        print('--archive can\'t be used with --coordinator or --local-workers')
+        return
+
+    if args.profile is not None:
+        profiler.start()
+
     # Load in the configuration file
     configs = {}
     with open(join(args.config), 'r') as testCasesFile:
@@ -221,16 +509,58 @@ def autograder():
     
     test_cases = TestCase.load_from_array(configs['tests'])
     language = configs['settings']['language'] if 'language' in configs['settings'] else 'java'
+    max_parallel_tests = args.jobs if args.jobs is not None else configs['settings'].get('max_parallel_tests', 1)
+    runner = configs['settings'].get('runner', 'subprocess')
+    resource_limits = configs['settings'].get('resource_limits', {})
+    max_parallel_students = args.parallel_students if args.parallel_students is not None else configs['settings'].get('max_parallel_students', 1)
+    interactive = not args.batch
+
+    try:
+        Program.check_performance_limits(test_cases, runner)
+    except ValueError as e:
+        print(e)
+        return
+
+    config_dir = os.path.dirname(args.config)
+
+    cache = None
+    if not args.no_cache:
+        cache_directory = join(config_dir, configs['settings'].get('cache_directory', '.autograder_cache'))
+        run_settings = {'language': language, 'runner': runner, 'resource_limits': resource_limits,
+                        'main_executable': configs['settings'].get('main_executable'), 'main_class': configs['settings'].get('main_class'),
+                        'compiler_flags': configs['settings'].get('compiler_flags', [])}
+        cache = ResultCache(cache_directory, configs['settings'].get('max_cache_mb', 512), run_settings)
+
+        # Compiled C/C++ object files are kept alongside the results so the cache's eviction covers them too
+        configs['settings']['object_cache_directory'] = os.path.abspath(join(config_dir, configs['settings'].get('object_cache_directory', join(cache_directory, 'objects'))))
+
+    else:
+        configs['settings']['object_cache_directory'] = None
+
+    if args.no_dedup:
+        configs['settings']['deduplicate_outputs'] = False
+
+    if args.similarity_report is not None:
+        configs['settings']['detect_similarity'] = True
 
     # Generate the grader outputs
     print("Generating grader outputs...")
-    config_dir = os.path.dirname(args.config)
     grader_directory = join(config_dir, configs["settings"]["grader_directory"])
     print(grader_directory)
-    grader_program = Program(grader_directory, language)
-    print(grader_program.compile())
-    print(grader_program.find_main_executable())
-    grader_outputs = grader_program.run_tests(test_cases)
+    grader_program = create_program(grader_directory, configs['settings'])
+    grader_outputs = run_program(grader_program, test_cases, cache, max_parallel_tests=max_parallel_tests, interactive=interactive)
+
+    if grader_outputs is None:
+        print('Grader compilation failed')
+        return
+
+    with span('grader_profile'):
+        grader_profile = GraderProfile(get_grading_settings(configs['settings']), grader_outputs)
+
+    # The grader's code is usually handed out as starter code, so matching it doesn't make students similar
+    similarity_index = None
+    if configs['settings'].get('detect_similarity', False):
+        similarity_index = SimilarityIndex(fingerprint_sources(grader_program.get_source_contents()))
 
     print("Done")   
 
@@ -239,47 +569,113 @@ def autograder():
     student_projects_directory = join(config_dir, configs["settings"]["student_directory"])
 
 
-    if args.student_directory is None:
+    # Submissions in an archive are only extracted while they're being graded, so they aren't listed here
+    if args.archive is None and args.student_directory is None:
         for sub_directory in sorted(os.listdir(student_projects_directory)):
             student_directory = os.path.join(student_projects_directory, sub_directory)
             if os.path.isdir(student_directory) and student_directory != grader_directory:
-                student_programs.append(Program(student_directory, language))
+                student_programs.append(create_program(student_directory, configs['settings']))
 
-    else: 
-        student_programs.append(Program(args.student_directory, language))
+    elif args.archive is None:
+        student_programs.append(create_program(args.student_directory, configs['settings']))
         
 
-    if not args.no_cat:
+    # Students are graded first and their code is only shown when asked for, unless it should be reviewed before it's run
+    if args.review and not args.no_cat and interactive:
         for i in student_programs:
-
-            print_source_files(i.get_source_files())
-
-            print_formatted_text('\033[1;4mProject Directory Listing\033[0m')
-            print_directory_listing(i.get_directory_listing())
+            print_submission(i)
 
             continue_grading = input('\nGrade Student Submission? [Y/n] ')
 
             i.skip_grading = 'n' in continue_grading.lower()
 
+    # Archived submissions are deleted as soon as they're graded, so their code can't be shown afterwards
+    viewable_programs = {get_student_name(i): i for i in student_programs} if not args.no_cat else {}
+
+
+    graded_count = 0
+    reused_count = 0
+
+    with ExitStack() as stack:
+        result_writers = [stack.enter_context(ResultWriter(i)) for i in args.output]
 
-    for student in student_programs:
-        if not student.skip_grading:
-            compilation_successful = student.compile()
+        if args.archive is not None:
+            # Imported here since grading archives builds on the functions in this module
+            from .submissionArchive import SubmissionArchive, grade_archive
 
-            if not compilation_successful:
-                print('Compilation failed')
-                continue
+            archive = SubmissionArchive(args.archive)
+            graded_students = grade_archive(archive, test_cases, configs['settings'], grader_profile, cache, max_parallel_tests, max_parallel_students, interactive)
 
+        elif args.coordinator is not None or args.local_workers > 0:
+            # Imported here since the distributed grader itself builds on the functions in this module
+            from .distributedGrader import Coordinator, parse_address
 
-            student.find_main_executable()
-            student_outputs = student.run_tests(test_cases, description=f'Testing Student {student.directory.split(os.sep)[-1]} Submission')
+            # Only workers on this machine can connect unless a host is given
+            address = parse_address(args.coordinator) if args.coordinator is not None else ('127.0.0.1', 0)
+            coordinator = Coordinator(configs, grader_outputs, address, args.authkey.encode('utf-8'), args.job_timeout, args.local_workers, max_parallel_tests)
+            stack.callback(coordinator.close)
 
-            sg = SmartGrader(configs['settings'], grader_outputs, student_outputs)
-            sg.analyze()
-            student_grades.append((student.directory.split(os.sep)[-1], sg))
+            if not args.authkey and args.coordinator is not None:
+                print(f'No --authkey given, workers can connect with --authkey {coordinator.authkey.decode("utf-8")}')
+            graded_students = ((get_student_name(student), student_grade) for student, student_grade in coordinator.grade(student_programs, test_cases, grader_profile, cache))
 
         else:
-            student_grades.append((student.directory.split(os.sep)[-1], None))
+            graded_students = ((get_student_name(student), student_grade) for student, student_grade in
+                               grade_students(student_programs, test_cases, configs['settings'], grader_profile, cache, max_parallel_tests, max_parallel_students, interactive))
+
+        for student_name, student_grade in graded_students:
+            sg = student_grade[1] if student_grade is not None else None
+            status = 'failed' if student_grade is None else 'skipped' if sg is None else 'graded'
+
+            for result_writer in result_writers:
+                result_writer.write(student_name, sg, status)
+
+            if not interactive:
+                print(f'{student_name}: {f"{sg.get_overall_grade():.2f}%" if sg is not None else status}')
+
+            if student_grade is not None:
+                student_grades.append(student_grade)
+
+            # Counted here rather than in the grade cache, since students graded in other processes were deduplicated there
+            if sg is not None:
+                graded_count += 1
+                reused_count += sg.analysis_reused
+
+            if sg is not None and similarity_index is not None:
+                similarity_index.add(student_name, sg.source_fingerprints)
+
+    if cache is not None:
+        cache.evict()
+
+    if configs['settings'].get('deduplicate_outputs', True) and graded_count > 0:
+        print(f'Reused the grades of a student with identical outputs for {reused_count} of {graded_count} students ({100 * reused_count / graded_count:.1f}%)')
+
+    if similarity_index is not None:
+        with span('similarity'):
+            similar_pairs = similarity_index.find_similar_pairs(configs['settings'].get('similarity_threshold', 0.5))
+
+        print(f'Found {len(similar_pairs)} pairs of students with similar code out of {len(similarity_index)} students')
+
+        for first, second, similarity, shared in similar_pairs[:MAX_PRINTED_PAIRS]:
+            print(f'  {100 * similarity:5.1f}%  {first}  {second}  ({shared} shared fingerprints)')
+
+        if len(similar_pairs) > MAX_PRINTED_PAIRS:
+            print(f'  ... and {len(similar_pairs) - MAX_PRINTED_PAIRS} more')
+
+        if args.similarity_report:
+            write_similarity_report(similar_pairs, args.similarity_report)
+            print(f'Wrote similarity report to {args.similarity_report}')
+
+    if args.profile is not None:
+        run_profile = profiler.stop()
+        print(run_profile.format_summary())
+
+        if args.profile != '':
+            run_profile.write_trace(args.profile)
+            print(f'Wrote trace to {args.profile}')
+
+    if not interactive:
+        return
 
     if len(student_grades) > 1:
         while True:
@@ -322,6 +718,9 @@ def autograder():
                 if 'n' not in giveFullOutput.lower():
                     print_test_case_results(sg, configs["tests"])
 
+            if studentName in viewable_programs and 'y' in input("Would you like to view the student's code? [y/N] ").lower():
+                print_submission(viewable_programs[studentName])
+
             input("Press enter to continue...")
     else:
         studentName, sg = student_grades[0]
@@ -330,4 +729,7 @@ def autograder():
         # Check to see if you want to continue grading
         giveFullOutput = input('Would you like to view the student output for the failed test cases? [Y/n] ')
         if 'n' not in giveFullOutput.lower():
-            print_test_case_results(sg, configs["tests"])
\ No newline at end of file
+            print_test_case_results(sg, configs["tests"])
+
+        if studentName in viewable_programs and 'y' in input("Would you like to view the student's code? [y/N] ").lower():
+            print_submission(viewable_programs[studentName])
\ No newline at end of file
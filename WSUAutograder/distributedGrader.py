@@ -0,0 +1,370 @@
+import argparse
+import io
+import multiprocessing
+import os
+import queue
+import secrets
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing.managers import BaseManager
+from os import path
+
+from . import profiler
+from .program import TestCase
+from .smartGrader import GraderProfile
+from ._utils import create_program, get_grading_settings, get_student_name, grade_student
+
+
+class _Context:
+    """Holds the config and grader outputs on the coordinator so that workers can fetch a copy of them, along with
+        whether workers should send back profiling spans
+    """
+
+    def __init__(self, configs, grader_outputs, profile=False):
+        self._configs = configs
+        self._grader_outputs = grader_outputs
+        self._profile = profile
+
+
+    def get(self):
+        return self._configs, self._grader_outputs, self._profile
+
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+for _typeid in ('get_jobs', 'get_results', 'get_context', 'get_done'):
+    _WorkerManager.register(_typeid)
+
+
+def parse_address(address, default_host='127.0.0.1'):
+    """Parses an address of the form host:port, or just port
+
+    Args:
+        address (str): The address to parse
+        default_host (str, optional): The host used when only a port is given. Defaults to '127.0.0.1'.
+
+    Returns:
+        tuple: The host and the port as an int
+    """
+    host, _, port = address.rpartition(':')
+    return host if host else default_host, int(port)
+
+
+def pack_directory(directory):
+    """Packs a directory into an in memory gzipped tarball, which keeps file permissions such as the executable bit
+
+    Args:
+        directory (str): The directory to pack
+
+    Returns:
+        bytes: The tarball
+    """
+    data = io.BytesIO()
+
+    with tarfile.open(fileobj=data, mode='w:gz') as archive:
+        archive.add(directory, arcname='.')
+
+    return data.getvalue()
+
+
+def unpack_directory(data, directory):
+    """Unpacks a tarball made by pack_directory
+
+    Args:
+        data (bytes): The tarball
+        directory (str): The directory to unpack it into, which is created if it doesn't exist
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+        # Newer versions of python can refuse anything that would be written outside of the directory
+        if hasattr(tarfile, 'data_filter'):
+            archive.extractall(directory, filter='data')
+        else:
+            archive.extractall(directory)
+
+
+class Coordinator:
+    """Hands out student submissions to workers, which may be on other machines, and collects their results. The
+        coordinator only runs the grader, and workers do all of the compiling, running, and analyzing of students
+    """
+
+    # How many jobs are kept waiting in the queue at once, so that every submission isn't packed into memory up front
+    _prefetch = 64
+
+    # How many times a job is handed out before the student is marked as failed
+    _max_attempts = 3
+
+    # How long in seconds local workers get to exit once grading is done before they're terminated
+    _close_timeout = 10
+
+
+    def __init__(self, configs, grader_outputs, address=('127.0.0.1', 0), authkey=None, job_timeout=600, local_workers=0, max_parallel_tests=1):
+        """Creates a new coordinator and starts listening for workers
+
+        Args:
+            configs (dict): The full config, which is sent to the workers
+            grader_outputs (list(TestResult)): The results of running the grader on every test case, which are sent to the workers
+            address (tuple, optional): The host and port to listen on. A port of 0 picks any free port. Defaults to ('127.0.0.1', 0).
+            authkey (bytes, optional): The key workers need in order to connect. Workers are sent pickles, so a key is
+                always needed, and a random one is generated if none is given. Defaults to None.
+            job_timeout (float, optional): How long in seconds a worker has to grade a student before the student is handed to
+                another worker. Defaults to 600.
+            local_workers (int, optional): The number of worker processes to start on this machine. Defaults to 0.
+            max_parallel_tests (int, optional): The maximum number of test cases each local worker runs at the same time. Defaults to 1.
+        """
+        self.configs = configs
+        self.grader_outputs = grader_outputs
+        self.job_timeout = job_timeout
+        self.authkey = authkey if authkey else secrets.token_urlsafe(16).encode('utf-8')
+
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._done = threading.Event()
+
+        # The object cache is a path on this machine, so workers elsewhere are sent a config without it
+        worker_configs = {**configs, 'settings': {**configs['settings'], 'object_cache_directory': None}}
+        self._context = _Context(worker_configs, grader_outputs, profiler.is_enabled())
+
+        # Each coordinator gets its own manager class, so the callables registered on it can refer to this coordinator
+        manager_class = type('_CoordinatorManager', (BaseManager,), {})
+        manager_class.register('get_jobs', callable=lambda: self._jobs)
+        manager_class.register('get_results', callable=lambda: self._results)
+        manager_class.register('get_context', callable=lambda: self._context)
+        manager_class.register('get_done', callable=lambda: self._done)
+
+        self._server = manager_class(address=address, authkey=self.authkey).get_server()
+        self.address = self._server.address
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        self._local_workers = []
+        for _ in range(local_workers):
+            worker = multiprocessing.Process(target=run_worker, args=(self.address, self.authkey, max_parallel_tests, configs['settings'].get('object_cache_directory')),
+                                             daemon=True)
+            worker.start()
+            self._local_workers.append(worker)
+
+
+    def grade(self, student_programs, test_cases, grader_profile, cache=None):
+        """Grades a list of student submissions on the workers
+
+        Args:
+            student_programs (list(Program)): The student programs to grade
+            test_cases (list(TestCase)): The test cases the grader was run on
+            grader_profile (GraderProfile): The profile of the grader outputs, which is attached to every SmartGrader sent back
+            cache (ResultCache, optional): If given, students whose results are all cached are analyzed here instead of being sent
+                to a worker, and the results workers send back are stored in it. Defaults to None.
+
+        Yields:
+            tuple: Each student program along with the value grade_student returned for it, in the same order as the student programs
+        """
+        settings = self.configs['settings']
+        finished = {}
+        completed = set()
+        pending = deque()
+        leases = {}
+        attempts = [0] * len(student_programs)
+        next_index = 0
+
+        for i, student in enumerate(student_programs):
+            if student.skip_grading:
+                finished[i] = (get_student_name(student), None)
+                completed.add(i)
+            elif cache is not None and None not in cache.load_results(student, test_cases):
+                finished[i] = grade_student(student, test_cases, settings, grader_profile, cache, interactive=False)
+                completed.add(i)
+            else:
+                pending.append(i)
+
+        print(f'Waiting for workers on {self.address[0]}:{self.address[1]}')
+
+        while next_index < len(student_programs):
+            while len(pending) > 0 and self._jobs.qsize() < Coordinator._prefetch:
+                i = pending.popleft()
+                student = student_programs[i]
+                self._jobs.put((i, get_student_name(student), pack_directory(student.directory)))
+
+                # The lease starts as soon as the job is handed out, so a worker that dies before it says it started
+                #   doesn't lose the job
+                leases[i] = time.monotonic()
+
+            try:
+                status, i, student_grade = profiler.merge_profiled(self._results.get(timeout=1))
+
+                # A job that timed out could still be started or finished by a worker after being handed out again, so
+                #   anything sent about a job that's already completed is ignored
+                if i in completed:
+                    pass
+
+                elif status == 'started':
+                    leases[i] = time.monotonic()
+
+                else:
+                    leases.pop(i, None)
+                    completed.add(i)
+                    finished[i] = student_grade
+
+                    if student_grade is not None and student_grade[1] is not None:
+                        student_grade[1].attach_grader_profile(grader_profile)
+
+                        if cache is not None:
+                            cache.store_results(student_programs[i], student_grade[1].student_results)
+
+            except queue.Empty:
+                pass
+
+            # Hand out jobs again if the worker grading them has gone quiet for too long. Jobs still waiting in the queue
+            #   haven't been picked up by anyone yet, so their leases start over instead
+            for i, started in list(leases.items()):
+                if time.monotonic() - started <= self.job_timeout:
+                    continue
+
+                if self._is_queued(i):
+                    leases[i] = time.monotonic()
+                    continue
+
+                del leases[i]
+                attempts[i] += 1
+
+                if attempts[i] < Coordinator._max_attempts:
+                    pending.appendleft(i)
+                else:
+                    print(f'Grading {get_student_name(student_programs[i])} timed out {attempts[i]} times, giving up')
+                    completed.add(i)
+                    finished[i] = None
+
+            while next_index in finished:
+                yield student_programs[next_index], finished.pop(next_index)
+                next_index += 1
+
+
+    def _is_queued(self, i):
+        with self._jobs.mutex:
+            return any(job[0] == i for job in self._jobs.queue)
+
+
+    def close(self):
+        """Tells the workers there's nothing left to grade and waits for the local workers to exit. Local workers that
+            are still grading, such as when grading was interrupted, are terminated
+        """
+        self._done.set()
+
+        deadline = time.monotonic() + Coordinator._close_timeout
+
+        for worker in self._local_workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+
+
+def _grade_packed_student(data, student_directory, test_cases, settings, grader_profile, max_parallel_tests):
+    with profiler.span('unpack'):
+        unpack_directory(data, student_directory)
+
+    return grade_student(create_program(student_directory, settings), test_cases, settings, grader_profile, max_parallel_tests=max_parallel_tests,
+                         interactive=False)
+
+
+def run_worker(address, authkey=b'', max_parallel_tests=1, object_cache_directory=None):
+    """Connects to a coordinator and grades the student submissions it hands out until there are none left
+
+    Args:
+        address (tuple): The host and port of the coordinator
+        authkey (bytes, optional): The key needed to connect to the coordinator. Defaults to b''.
+        max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+        object_cache_directory (str, optional): The directory compiled C/C++ object files are cached in. Defaults to None, which
+            caches them in the worker's scratch directory for as long as the worker runs.
+    """
+    manager = _WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+
+    jobs = manager.get_jobs()
+    results = manager.get_results()
+    done = manager.get_done()
+    configs, grader_outputs, profile = manager.get_context().get()
+
+    scratch_directory = tempfile.mkdtemp(prefix='wsu-autograder-worker-')
+
+    if object_cache_directory is None:
+        object_cache_directory = path.join(scratch_directory, 'objects')
+
+    settings = {**configs['settings'], 'object_cache_directory': object_cache_directory}
+    test_cases = TestCase.load_from_array(configs['tests'])
+    grader_profile = GraderProfile(get_grading_settings(settings), grader_outputs)
+
+    try:
+        while True:
+            try:
+                i, student_name, data = jobs.get(timeout=1)
+            except queue.Empty:
+                if done.is_set():
+                    break
+                continue
+
+            # Every message is sent the same way as a call_profiled result, so that spans can come back with the grades
+            results.put((('started', i, None), None))
+
+            student_directory = path.join(scratch_directory, student_name)
+
+            try:
+                student_grade, worker_profile = profiler.call_profiled(profile, _grade_packed_student, data, student_directory, test_cases, settings,
+                                                                       grader_profile, max_parallel_tests)
+            except Exception as e:
+                print(f'Grading {student_name} failed: {e}')
+                student_grade, worker_profile = None, None
+            finally:
+                shutil.rmtree(student_directory, ignore_errors=True)
+
+            # The coordinator already has the grader profile, so there's no need to send it back with every student
+            if student_grade is not None and student_grade[1] is not None:
+                student_grade[1].detach_grader_profile()
+
+            results.put((('finished', i, student_grade), worker_profile))
+
+    except (EOFError, ConnectionError):
+        # The coordinator has shut down
+        pass
+
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+
+def autograder_worker():
+    parser = argparse.ArgumentParser(description='Grades student submissions handed out by an autograder started with --coordinator')
+
+    # Where the coordinator is listening
+    parser.add_argument('address', type=str, help='The host:port of the coordinator')
+
+    # The shared secret used to connect to the coordinator
+    parser.add_argument('--authkey', type=str, default=os.environ.get('AUTOGRADER_AUTHKEY', ''), help='The key used to connect to the coordinator. Defaults to $AUTOGRADER_AUTHKEY')
+
+    # Number of students to grade at the same time
+    parser.add_argument('-p', '--parallel-students', type=int, default=1, help='The number of students to grade in parallel, each in its own process')
+
+    # Number of test cases to run at the same time
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='The maximum number of test cases to run in parallel for each student')
+
+    args = parser.parse_args()
+
+    address = parse_address(args.address)
+    worker_args = (address, args.authkey.encode('utf-8'), args.jobs)
+
+    workers = [multiprocessing.Process(target=run_worker, args=worker_args) for _ in range(max(args.parallel_students, 1) - 1)]
+
+    for worker in workers:
+        worker.start()
+
+    run_worker(*worker_args)
+
+    for worker in workers:
+        worker.join()
@@ -0,0 +1,758 @@
+import sys
+
+# The modules the interpreter loads before running any script. The python command never looks for these again, so a
+#   program's own module with the same name can't replace them
+_STARTUP_MODULES = frozenset(sys.modules)
+
+import array
+import ast
+import atexit
+import builtins
+import gc
+import importlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import random
+import selectors
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+import types
+from os import path
+
+try:
+    import resource
+except ImportError:
+    # Resource limits are only available on POSIX systems, which are the only ones the server runs on anyway
+    resource = None
+
+# This file is also run on its own as the fork server, so it can only import from the standard library
+_FORK_SERVER_SOURCE = path.abspath(__file__)
+
+# The pid of a forked test, then its exit code, user and system CPU time, and peak memory once it exits
+_PID_FORMAT = '>i'
+_EXIT_FORMAT = '>iddq'
+
+# A signal to send to a running test, and whether to send it to the test's whole process group
+_SIGNAL_FORMAT = '>ii'
+
+# How often the peak memory of a running command is sampled, in seconds
+_MEMORY_POLL_INTERVAL = 0.01
+
+# How much a command started by the spawn server can grow between fork and exec while still running as the server, in KiB
+_EXEC_MEMORY_SLACK_KB = 1024
+
+# Directories that are never searched for imports to load up front
+_IGNORED_DIRECTORIES = ['.git', '.svn', '.hg', '__pycache__', 'node_modules', '.idea', '.vscode', '__MACOSX']
+
+
+class ForkServerRunner:
+    """Keeps a python interpreter running for a program with every library the program imports already loaded, and forks
+        it once for every test case instead of starting a new interpreter. Each forked test gets its own stdin, stdout,
+        stderr, arguments, and exit code, the same as a test run in a subprocess
+    """
+
+    def __init__(self, directory, script_path, python_command='python'):
+        """Creates a new fork server runner. The server itself isn't started until the first test case is run
+
+        Args:
+            directory (str): The working directory of the program
+            script_path (str): The path of the program's main script, relative to the directory
+            python_command (str, optional): The python interpreter to run the server with. Defaults to 'python'.
+        """
+        self.directory = directory
+        self.script_path = script_path
+        self.python_command = python_command
+
+        self._process = None
+        self._socket_directory = None
+        self._lock = threading.Lock()
+
+
+    def start(self, args=()):
+        """Forks a new process from the server to run the program's main script
+
+        Args:
+            args (tuple, optional): The command line arguments to pass to the script. Defaults to ().
+
+        Returns:
+            ForkedProcess: The running script
+        """
+        return self._send_request([str(i) for i in args])
+
+
+    def close(self):
+        """Shuts down the server if it is running. Tests that are still running aren't stopped
+        """
+        with self._lock:
+            if self._process is not None:
+                self._process.stdin.close()
+                self._process.wait()
+                self._process = None
+
+            if self._socket_directory is not None:
+                shutil.rmtree(self._socket_directory, ignore_errors=True)
+                self._socket_directory = None
+
+
+    def _send_request(self, request):
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+
+            socket_path = path.join(self._socket_directory, 'server.sock')
+
+        return ForkedProcess(socket_path, request)
+
+
+    def _start(self):
+        if self._socket_directory is None:
+            self._socket_directory = tempfile.mkdtemp(prefix='wsu-autograder-fork-server-')
+
+        socket_path = path.join(self._socket_directory, 'server.sock')
+
+        if path.exists(socket_path):
+            os.remove(socket_path)
+
+        # The socket is listening before the server starts, so tests can connect while it's still loading libraries
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            listener.bind(socket_path)
+            listener.listen(64)
+
+            script_args = () if self.script_path is None else (self.script_path,)
+
+            # The server exits when its stdin is closed, so it never outlives the autograder
+            self._process = subprocess.Popen((self.python_command, _FORK_SERVER_SOURCE, str(listener.fileno()), *script_args),
+                                             stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=self.directory,
+                                             pass_fds=(listener.fileno(),))
+        finally:
+            listener.close()
+
+
+
+class SpawnServerRunner(ForkServerRunner):
+    """Starts commands from a small server of its own instead of from the autograder. A process forked from the autograder
+        starts out with the autograder's memory, which the kernel counts toward the process's peak memory even after it runs
+        another program, so the memory a test case used could only be measured as at least as much as the autograder's. The
+        server is single threaded too, so resource limits can be set between fork and exec without a wrapper
+    """
+
+    def __init__(self, directory):
+        """Creates a new spawn server runner. The server itself isn't started until the first command is run
+
+        Args:
+            directory (str): The working directory commands are run in
+        """
+        super().__init__(directory, None, sys.executable)
+
+
+    def start(self, command, process_group=False, resource_limits=()):
+        """Starts a command from the server
+
+        Args:
+            command (tuple(str)): The command to run and its arguments
+            process_group (bool, optional): Whether the command gets its own session, and so its own process group, that's killed
+                along with it. Defaults to False.
+            resource_limits (list(tuple), optional): The name, soft limit, and hard limit of each resource limit to set for the
+                command. Defaults to ().
+
+        Returns:
+            ForkedProcess: The running command
+        """
+        return self._send_request({'command': [str(i) for i in command], 'process_group': process_group,
+                                   'resource_limits': [list(i) for i in resource_limits]})
+
+
+
+class ForkedProcess:
+    """A test case forked from a fork server or a spawn server. Looks enough like a subprocess.Popen that it can be run
+        the same way a test case in a subprocess is, and measures its CPU time and memory usage. The server is the one
+        that reaps the test, so the test can only be signaled through the server, which never signals a test it has
+        already reaped
+    """
+
+    def __init__(self, socket_path, request):
+        """Asks a server to run a test in a new process
+
+        Args:
+            socket_path (str): The path of the server's socket
+            request (list(str) or dict): The command line arguments to pass to a fork server's script, or the command
+                a spawn server should run
+        """
+        self.returncode = None
+        self.user_time = None
+        self.system_time = None
+        self.peak_rss_kb = None
+
+        stdin_read, stdin_write = os.pipe()
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+
+        self._connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            self._connection.connect(socket_path)
+
+            # The test's end of each pipe is sent along with its arguments, so its output never passes through the server
+            request = json.dumps(request).encode('utf-8')
+            self._connection.sendmsg([struct.pack('>i', len(request)) + request],
+                                     [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', (stdin_read, stdout_write, stderr_write)))])
+
+            self.pid = struct.unpack(_PID_FORMAT, _receive_exactly(self._connection, struct.calcsize(_PID_FORMAT)))[0]
+
+        except OSError:
+            self._connection.close()
+
+            for i in (stdin_write, stdout_read, stderr_read):
+                os.close(i)
+
+            raise
+
+        finally:
+            for i in (stdin_read, stdout_write, stderr_write):
+                os.close(i)
+
+        self.stdin = os.fdopen(stdin_write, 'wb')
+        self.stdout = os.fdopen(stdout_read, 'rb')
+        self.stderr = os.fdopen(stderr_read, 'rb')
+
+        self._connection_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._wait, daemon=True)
+        self._thread.start()
+
+
+    def _wait(self):
+        try:
+            exit_code, user_time, system_time, peak_rss_kb = struct.unpack(_EXIT_FORMAT, _receive_exactly(self._connection, struct.calcsize(_EXIT_FORMAT)))
+        except OSError:
+            # The server went away before the test finished, so there's no exit code to report
+            return
+        finally:
+            with self._connection_lock:
+                self._connection.close()
+
+        self.user_time = user_time
+        self.system_time = system_time
+        self.peak_rss_kb = peak_rss_kb
+        self.returncode = exit_code
+
+
+    def wait(self, timeout=None):
+        """Waits for the process to exit
+
+        Args:
+            timeout (float, optional): The longest time to wait in seconds. Defaults to None, which waits forever.
+
+        Returns:
+            bool: Whether or not the process has exited
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+    def send_signal(self, signal_number, process_group=False):
+        """Asks the server to send a signal to the process. Nothing is sent once the process has exited
+
+        Args:
+            signal_number (int): The signal to send
+            process_group (bool, optional): Whether to signal every process in the process group the process leads. Defaults to False.
+        """
+        with self._connection_lock:
+            if self._connection.fileno() == -1:
+                return
+
+            try:
+                self._connection.sendall(struct.pack(_SIGNAL_FORMAT, signal_number, process_group))
+            except OSError:
+                # The server is already reporting that the process exited
+                pass
+
+
+
+def _receive_exactly(connection, size):
+    data = bytearray()
+
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+
+        if len(chunk) == 0:
+            raise ConnectionError('The connection closed early')
+
+        data.extend(chunk)
+
+    return bytes(data)
+
+
+def _preload_imports(directory):
+    # Every library the program imports is loaded into the server, so forked tests don't pay for importing them. Modules
+    #   that are part of the program itself are left alone, since importing them runs the student's code
+    names = set()
+
+    for dir_name, dir_list, file_list in os.walk(directory):
+        dir_list[:] = [i for i in dir_list if i not in _IGNORED_DIRECTORIES]
+
+        for file_name in file_list:
+            if not file_name.endswith('.py'):
+                continue
+
+            try:
+                with open(path.join(dir_name, file_name), 'rb') as f:
+                    tree = ast.parse(f.read())
+            except (OSError, SyntaxError, ValueError):
+                continue
+
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(i.name for i in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+                    names.add(node.module)
+
+    for name in sorted(names):
+        top_level = name.split('.')[0]
+
+        if name in sys.modules:
+            continue
+
+        try:
+            spec = importlib.util.find_spec(top_level)
+
+            if spec is None or not spec.has_location or path.abspath(spec.origin).startswith(directory + os.sep):
+                continue
+
+            importlib.import_module(name)
+
+        except BaseException:
+            # Anything that fails to import will fail the same way in the test, where the student can see it
+            pass
+
+
+def _forget_shadowed_modules(directory):
+    # The server has already loaded modules like random and json, which the python command wouldn't have loaded yet.
+    #   Imports would find the server's copies instead of the program's own modules with the same names, so those are
+    #   dropped and the program's modules get imported in their place
+    shadowed = {}
+
+    for name in list(sys.modules):
+        top_level = name.partition('.')[0]
+
+        if top_level in _STARTUP_MODULES:
+            continue
+
+        if top_level not in shadowed:
+            spec = None
+
+            # Built in and frozen modules are found before anything on the path, so they can't be replaced either
+            if importlib.machinery.BuiltinImporter.find_spec(top_level) is None and importlib.machinery.FrozenImporter.find_spec(top_level) is None:
+                spec = importlib.machinery.PathFinder.find_spec(top_level, [directory])
+
+            shadowed[top_level] = spec is not None and spec.has_location
+
+        if shadowed[top_level]:
+            del sys.modules[name]
+
+
+def _run_script(script_path, args):
+    # Runs the script the same way the python command would, including how it reports uncaught exceptions and exit codes
+    sys.argv = [script_path, *args]
+
+    # The python command gives the script's __file__ and traceback entries an absolute path, but leaves sys.argv alone
+    script_path = path.abspath(script_path)
+
+    main_module = types.ModuleType('__main__')
+    main_module.__file__ = script_path
+    main_module.__loader__ = importlib.machinery.SourceFileLoader('__main__', script_path)
+    main_module.__builtins__ = builtins
+    sys.modules['__main__'] = main_module
+
+    # Forked tests would otherwise all get the same random numbers
+    random.seed()
+
+    _forget_shadowed_modules(sys.path[0])
+
+    try:
+        with open(script_path, 'rb') as f:
+            code = compile(f.read(), script_path, 'exec')
+
+        exec(code, main_module.__dict__)
+
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+
+        if isinstance(e.code, int):
+            return e.code
+
+        print(e.code, file=sys.stderr)
+        return 1
+
+    except BaseException as e:
+        # Leave the server out of the traceback, so it looks the same as a traceback from the python command
+        tb = e.__traceback__
+
+        while tb is not None and tb.tb_frame.f_code.co_filename != script_path:
+            tb = tb.tb_next
+
+        e = e.with_traceback(tb)
+
+        try:
+            sys.excepthook(type(e), e, tb)
+        except BaseException:
+            traceback.print_exception(type(e), e, tb)
+
+        return 1
+
+    return 0
+
+
+def _exit(exit_code):
+    # Tearing down a whole interpreter takes much longer than the script usually does, so the test only does the parts of
+    #   shutting down that the script can notice before exiting
+    while True:
+        threads = [i for i in threading.enumerate() if i is not threading.current_thread() and not i.daemon and i.is_alive()]
+
+        if len(threads) == 0:
+            break
+
+        for thread in threads:
+            thread.join()
+
+    atexit._run_exitfuncs()
+
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (OSError, ValueError):
+            # The python command exits with 120 when it can't flush its output
+            exit_code = 120 if exit_code == 0 else exit_code
+
+    os._exit(exit_code & 0xff)
+
+
+def _serve(listener_fd, script_path=None):
+    # A fork server runs its script in every test it forks, and a spawn server runs whichever command each request names
+    spawning = script_path is None
+
+    if not spawning:
+        # Imports are resolved the same way as running the script directly, where the script's directory comes first
+        directory = path.abspath(os.getcwd())
+        sys.path[0] = path.dirname(path.abspath(script_path))
+
+        _preload_imports(directory)
+
+        # Anything printed while loading libraries is flushed now, so it doesn't end up in the first test's output
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    # Everything loaded so far is left out of garbage collection, so forked tests don't copy the server's memory by touching it
+    gc.freeze()
+
+    listener = socket.socket(fileno=listener_fd)
+
+    # Finished tests are noticed through SIGCHLD, which wakes the selector up through a pipe
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, 'accept')
+    selector.register(wakeup_read, selectors.EVENT_READ, 'reap')
+    selector.register(sys.stdin, selectors.EVENT_READ, 'exit')
+
+    children = {}
+
+    while True:
+        # The selector wakes up regularly while commands are running, so their memory can be sampled
+        sampling = any(i.executed_at is not None for i in children.values())
+
+        for key, _ in selector.select(_MEMORY_POLL_INTERVAL if sampling else None):
+            if key.data == 'exit':
+                return 0
+
+            if key.data == 'reap':
+                try:
+                    while os.read(wakeup_read, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+
+                _reap_children(children, selector)
+                continue
+
+            if key.data != 'accept':
+                event, child = key.data
+
+                # The test may have been reaped earlier in the same batch of events
+                if children.get(child.pid) is not child:
+                    continue
+
+                if event == 'executed':
+                    # The command's end of the pipe was closed on exec, so the memory it uses from now on is its own
+                    selector.unregister(child.exec_fd)
+                    os.close(child.exec_fd)
+                    child.exec_fd = None
+                    child.executed_at = time.monotonic()
+
+                elif event == 'signal':
+                    try:
+                        signal_number, process_group = struct.unpack(_SIGNAL_FORMAT, _receive_exactly(child.connection, struct.calcsize(_SIGNAL_FORMAT)))
+                    except OSError:
+                        # The runner stopped listening, but the test is still reaped once it exits
+                        selector.unregister(child.connection)
+                        continue
+
+                    # Children are only in children until they're reaped, so the pid still belongs to the test
+                    child.send_signal(signal_number, process_group)
+
+                continue
+
+            connection, _ = listener.accept()
+
+            try:
+                header, fds = _receive_request(connection)
+                length = struct.unpack('>i', header[:4])[0]
+                request = json.loads((header[4:] + _receive_exactly(connection, length + 4 - len(header))).decode('utf-8'))
+            except (OSError, ValueError):
+                connection.close()
+                continue
+
+            exec_read, exec_write = os.pipe() if spawning else (None, None)
+            # The command starts out with a copy of the server, and the kernel keeps counting the server's memory toward
+            #   the command's peak after it runs
+            rss_floor_kb = _read_peak_rss_kb('self') if spawning else None
+
+            pid = os.fork()
+
+            if pid == 0:
+                # The child stops being a server and becomes the test
+                signal.set_wakeup_fd(-1)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                selector.close()
+                listener.close()
+                connection.close()
+                os.close(wakeup_read)
+                os.close(wakeup_write)
+
+                for i in children.values():
+                    i.close()
+
+                if spawning:
+                    os.close(exec_read)
+                else:
+                    # The test gets its own process group, so anything it starts is stopped along with it
+                    os.setpgid(0, 0)
+
+                for target, fd in enumerate(fds):
+                    os.dup2(fd, target)
+                    os.close(fd)
+
+                if spawning:
+                    _exec_command(request)
+
+                _exit(_run_script(script_path, request))
+
+            if spawning:
+                os.close(exec_write)
+            else:
+                # Set the process group from both sides, so it's set before the runner can try to stop it
+                try:
+                    os.setpgid(pid, pid)
+                except OSError:
+                    pass
+
+            for fd in fds:
+                os.close(fd)
+
+            child = _Child(pid, connection, request['process_group'] if spawning else True, rss_floor_kb, exec_read)
+            children[pid] = child
+
+            selector.register(connection, selectors.EVENT_READ, ('signal', child))
+
+            if exec_read is not None:
+                selector.register(exec_read, selectors.EVENT_READ, ('executed', child))
+
+            try:
+                connection.sendall(struct.pack(_PID_FORMAT, pid))
+            except OSError:
+                pass
+
+            # The child may have exited before it was added to children
+            _reap_children(children, selector)
+
+        for child in children.values():
+            child.sample_memory()
+
+
+
+class _Child:
+    # A test the server started and hasn't reaped yet
+
+    def __init__(self, pid, connection, process_group, rss_floor_kb=None, exec_fd=None):
+        self.pid = pid
+        self.connection = connection
+        self.process_group = process_group
+        self.rss_floor_kb = rss_floor_kb
+        self.exec_fd = exec_fd
+
+        # A forked test runs the server's own code, so only a spawned command's memory is worth sampling, once it's been exec'd
+        self.executed_at = None
+        self.sampled_rss_kb = None
+
+
+    def send_signal(self, signal_number, process_group):
+        try:
+            if process_group and self.process_group:
+                try:
+                    os.killpg(self.pid, signal_number)
+                    return
+                except ProcessLookupError:
+                    # A spawned command starts its own session after it's forked, so its process group might not exist yet
+                    pass
+
+            os.kill(self.pid, signal_number)
+
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+    def sample_memory(self):
+        # Right after exec the command hasn't even loaded yet, so a command that exits before it's been sampled once is
+        #   reported with the peak from wait4 instead
+        if self.executed_at is None or time.monotonic() - self.executed_at < _MEMORY_POLL_INTERVAL:
+            return
+
+        peak_rss_kb = _read_peak_rss_kb(self.pid)
+
+        if peak_rss_kb is not None:
+            self.sampled_rss_kb = max(peak_rss_kb, self.sampled_rss_kb or 0)
+
+
+    def get_peak_rss_kb(self, usage):
+        # Linux reports the peak resident set size in KiB, but macOS reports it in bytes
+        peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+
+        # A spawned command's peak includes the server's memory from before exec, so unless the command grew past that,
+        #   its own peak is only known from sampling it while it ran
+        if self.rss_floor_kb is not None and self.sampled_rss_kb is not None and peak_rss_kb <= self.rss_floor_kb + _EXEC_MEMORY_SLACK_KB:
+            return self.sampled_rss_kb
+
+        return peak_rss_kb
+
+
+    def close(self):
+        self.connection.close()
+
+        if self.exec_fd is not None:
+            os.close(self.exec_fd)
+            self.exec_fd = None
+
+
+
+def _receive_request(connection):
+    fds = array.array('i')
+    data, ancillary, _, _ = connection.recvmsg(65536, socket.CMSG_SPACE(3 * fds.itemsize))
+
+    for level, message_type, message_data in ancillary:
+        if level == socket.SOL_SOCKET and message_type == socket.SCM_RIGHTS:
+            fds.frombytes(message_data[:len(message_data) - len(message_data) % fds.itemsize])
+
+    if len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError('Expected stdin, stdout, and stderr')
+
+    return data, list(fds)
+
+
+def _exec_command(request):
+    # Runs in the child the spawn server forked, which only has the one thread, so it's safe to set up the command here
+    command = request['command']
+
+    try:
+        if request['process_group']:
+            os.setsid()
+
+        for name, soft_limit, hard_limit in request['resource_limits']:
+            resource.setrlimit(getattr(resource, name), (soft_limit, hard_limit))
+
+        # Python ignores these signals, which the command would otherwise inherit
+        for name in ('SIGPIPE', 'SIGXFSZ'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+        os.execvp(command[0], command)
+
+    except (OSError, ValueError) as e:
+        os.write(2, f'{command[0]}: {e.strerror if isinstance(e, OSError) else e}\n'.encode('utf-8', errors='replace'))
+
+    finally:
+        # The child must never make it back into the server's loop
+        os._exit(127)
+
+
+def _read_peak_rss_kb(pid):
+    # Linux reports a running process's peak resident set size in KiB on the VmHWM line of its status
+    try:
+        with open(f'/proc/{pid}/status', 'rb') as f:
+            for line in f:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+def _reap_children(children, selector):
+    # waitid with WNOHANG finds every test that has finished without waiting on the ones that are still running. A test is
+    #   only reaped once the rest of its process group is killed, since its pid and process group can be reused after that
+    while True:
+        try:
+            info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        except ChildProcessError:
+            return
+
+        if info is None or info.si_pid == 0:
+            return
+
+        child = children.pop(info.si_pid, None)
+
+        # Anything the test left running in the background could hold its output open forever
+        if child is not None and child.process_group:
+            child.send_signal(signal.SIGKILL, True)
+
+        _, status, usage = os.wait4(info.si_pid, 0)
+
+        if child is None:
+            continue
+
+        exit_code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+        for fd in (child.connection, child.exec_fd):
+            try:
+                if fd is not None:
+                    selector.unregister(fd)
+            except KeyError:
+                pass
+
+        try:
+            child.connection.sendall(struct.pack(_EXIT_FORMAT, exit_code, usage.ru_utime, usage.ru_stime, child.get_peak_rss_kb(usage)))
+        except OSError:
+            pass
+
+        child.close()
+
+
+if __name__ == '__main__':
+    sys.exit(_serve(int(sys.argv[1]), *sys.argv[2:]))
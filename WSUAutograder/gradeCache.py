@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+
+class GradeCache:
+    """Remembers the analysis of every distinct set of student outputs graded so far. In intro courses many students
+        print exactly the same thing on every test case, whether it's the right answer or the same common mistake, and
+        analyzing their outputs once is enough to grade all of them
+    """
+
+    def __init__(self, max_entries=4096):
+        """Creates a new, empty grade cache
+
+        Args:
+            max_entries (int, optional): The most analyses to remember. The least recently used analysis is forgotten
+                once there are more than this. Defaults to 4096.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # Only the analysis is kept, not the SmartGrader, since its student results can be much larger
+        self._analyses = OrderedDict()
+
+        # Jobs on the grading server share the cache between threads
+        self._lock = threading.Lock()
+
+
+    def analyze(self, grader):
+        """Analyzes a student's results, reusing the analysis of an earlier student with identical results if there was one
+
+        Args:
+            grader (SmartGrader): The SmartGrader to analyze. Its grader_profile must be set, since it identifies the
+                grader outputs and settings the analysis is only valid for
+
+        Returns:
+            bool: True if an earlier analysis was reused
+        """
+        if grader.grader_profile is None:
+            grader.analyze()
+            return False
+
+        key = (grader.grader_profile.fingerprint, grader.get_output_key())
+
+        with self._lock:
+            earlier_analysis = self._analyses.get(key)
+
+            if earlier_analysis is not None:
+                self._analyses.move_to_end(key)
+                self.hits += 1
+
+        if earlier_analysis is not None:
+            grader.reuse_analysis(earlier_analysis)
+            return True
+
+        # The analysis is done outside of the lock, so one slow student doesn't hold up every other thread
+        grader.analyze()
+
+        with self._lock:
+            self._analyses[key] = grader.get_analysis()
+            self.misses += 1
+
+            if len(self._analyses) > self.max_entries:
+                self._analyses.popitem(last=False)
+
+        return False
+
+
+    def clear(self):
+        """Forgets every analysis and resets the hit and miss counts
+        """
+        with self._lock:
+            self._analyses.clear()
+            self.hits = 0
+            self.misses = 0
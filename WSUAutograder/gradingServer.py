@@ -0,0 +1,719 @@
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import re
+import secrets
+import shutil
+import signal
+import tempfile
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from os import path
+from urllib.parse import parse_qs, urlsplit
+
+from .program import Program, TestCase
+from .resultCache import ResultCache
+from .resultWriter import ResultWriter
+from .similarity import SimilarityIndex, fingerprint_sources, write_similarity_report
+from .smartGrader import GraderProfile
+from ._utils import create_program, get_grading_settings, run_program
+from .submissionArchive import SubmissionArchive, extract_zip, grade_archive
+
+# The files each finished job can be downloaded as
+RESULT_FILES = ('grades.jsonl', 'grades.csv', 'similarity.csv')
+
+_job_path_pattern = re.compile(r'^/jobs/(?P<id>[0-9a-f]+)(?:/(?P<file>events|[\w.]+))?$')
+
+_status_reasons = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+                   411: 'Length Required', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+# The header scripts send the server's token in. Browsers can't add headers to page loads, links, or an EventSource,
+#   so the token can also be given as a token query parameter
+TOKEN_HEADER = 'x-autograder-token'
+
+# How often an idle progress stream is sent a comment, so closed browser tabs are noticed
+_keepalive_seconds = 15
+
+INDEX_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Autograder</title>
+<style>
+body { font-family: sans-serif; max-width: 60em; margin: 2em auto; }
+label { display: block; margin: 0.5em 0; }
+table { border-collapse: collapse; margin-top: 1em; }
+td, th { border: 1px solid #ccc; padding: 0.2em 0.6em; text-align: left; }
+</style>
+</head>
+<body>
+<h1>Autograder</h1>
+<form id="upload">
+<label>Config json <input type="file" name="config" accept=".json" required></label>
+<label>Grader zip <input type="file" name="grader" accept=".zip" required></label>
+<label>Student zip <input type="file" name="students" accept=".zip" required></label>
+<button type="submit">Grade</button>
+</form>
+<p id="status"></p>
+<p id="downloads"></p>
+<table><thead><tr><th>Student</th><th>Status</th><th>Grade</th></tr></thead><tbody id="students"></tbody></table>
+<script>
+const token = new URLSearchParams(location.search).get('token') || '';
+const query = `?token=${encodeURIComponent(token)}`;
+const status = document.getElementById('status');
+const downloads = document.getElementById('downloads');
+const students = document.getElementById('students');
+
+document.getElementById('upload').addEventListener('submit', async (event) => {
+    event.preventDefault();
+    students.innerHTML = '';
+    downloads.innerHTML = '';
+    status.textContent = 'Uploading...';
+
+    const response = await fetch('/jobs', {method: 'POST', headers: {'X-Autograder-Token': token}, body: new FormData(event.target)});
+    const job = await response.json();
+
+    if (!response.ok) {
+        status.textContent = job.error;
+        return;
+    }
+
+    const events = new EventSource(`/jobs/${job.id}/events${query}`);
+
+    events.addEventListener('queued', (e) => {
+        status.textContent = `Waiting for ${JSON.parse(e.data).position} job(s) ahead of this one`;
+    });
+    events.addEventListener('started', (e) => {
+        status.textContent = 'Running the grader...';
+    });
+    events.addEventListener('grading', (e) => {
+        status.textContent = `Graded 0 of ${JSON.parse(e.data).total} students`;
+    });
+    events.addEventListener('student', (e) => {
+        const data = JSON.parse(e.data);
+        const row = students.insertRow();
+        row.insertCell().textContent = data.student;
+        row.insertCell().textContent = data.status;
+        row.insertCell().textContent = data.overall_grade === null ? '' : `${data.overall_grade.toFixed(2)}%`;
+        status.textContent = `Graded ${data.done} of ${data.total} students`;
+    });
+    events.addEventListener('finished', (e) => {
+        events.close();
+        status.textContent += '. Done';
+        for (const file of JSON.parse(e.data).files) {
+            const link = document.createElement('a');
+            link.href = `/jobs/${job.id}/${file}${query}`;
+            link.textContent = file;
+            downloads.append(link, ' ');
+        }
+    });
+    events.addEventListener('failed', (e) => {
+        events.close();
+        status.textContent = `Grading failed: ${JSON.parse(e.data).error}`;
+    });
+});
+</script>
+</body>
+</html>
+'''
+
+
+def parse_multipart(body, content_type):
+    """Splits a multipart/form-data request body into its fields
+
+    Args:
+        body (bytes): The request body
+        content_type (str): The request's Content-Type header, which holds the boundary between fields
+
+    Raises:
+        ValueError: Raised if the body isn't multipart/form-data
+
+    Returns:
+        dict: The contents of each field as bytes, keyed by the field's name
+    """
+    header = Message()
+    header['content-type'] = content_type
+    boundary = header.get_param('boundary')
+
+    if header.get_content_type() != 'multipart/form-data' or not boundary:
+        raise ValueError('Expected a multipart/form-data upload')
+
+    fields = {}
+
+    # Everything before the first boundary and after the closing one is ignored
+    for part in body.split(b'--' + boundary.encode('latin-1'))[1:-1]:
+        part_headers, separator, contents = part.partition(b'\r\n\r\n')
+
+        if not separator:
+            raise ValueError('Malformed multipart/form-data upload')
+
+        disposition = Message()
+        for line in part_headers.decode('latin-1').split('\r\n'):
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-disposition':
+                disposition['content-disposition'] = value.strip()
+
+        field_name = disposition.get_param('name', header='content-disposition')
+
+        if field_name is not None:
+            # Every part ends with the line break in front of the next boundary
+            fields[field_name] = contents[:-2] if contents.endswith(b'\r\n') else contents
+
+    return fields
+
+
+
+class GradingJob:
+    """A single upload to the grading server, along with every progress event it has published so far. Each job
+        is graded in a worker thread, and its events are handed back to the event loop to be streamed to browsers
+    """
+
+    def __init__(self, job_id, directory, configs):
+        """Creates a new job waiting in the queue
+
+        Args:
+            job_id (str): The job's ID, used in its URLs
+            directory (str): The directory the job's uploads were saved in and its results are written to
+            configs (dict): The uploaded config
+        """
+        self.job_id = job_id
+        self.directory = directory
+        self.configs = configs
+        self.state = 'queued'
+        self.created = time.time()
+        self.total = None
+        self.done = 0
+        self.error = None
+
+        self._events = []
+        self._subscribers = set()
+
+
+    def get_status(self):
+        """Summarizes the job's progress
+
+        Returns:
+            dict: The job's ID, state, progress, and the files that can be downloaded
+        """
+        return {'id': self.job_id, 'state': self.state, 'created': self.created, 'total': self.total, 'done': self.done,
+                'error': self.error, 'files': self.get_result_files()}
+
+
+    def get_result_files(self):
+        """Lists the result files that can be downloaded
+
+        Returns:
+            list(str): The names of the result files, which are only available once the job has finished
+        """
+        if self.state != 'finished':
+            return []
+
+        return [i for i in RESULT_FILES if path.isfile(path.join(self.directory, i))]
+
+
+    def publish(self, event, data):
+        """Records a progress event and sends it to every browser following the job. Must be called from the event loop
+
+        Args:
+            event (str): The name of the event
+            data (dict): The event's data, which is sent as JSON
+        """
+        self._events.append((event, data))
+
+        for subscriber in self._subscribers:
+            subscriber.put_nowait((event, data))
+
+
+    def subscribe(self):
+        """Follows the job's progress. Must be called from the event loop
+
+        Returns:
+            asyncio.Queue: A queue that every event the job has already published is put in, followed by each new event
+        """
+        subscriber = asyncio.Queue()
+
+        for i in self._events:
+            subscriber.put_nowait(i)
+
+        self._subscribers.add(subscriber)
+
+        return subscriber
+
+
+    def unsubscribe(self, subscriber):
+        """Stops following the job's progress
+
+        Args:
+            subscriber (asyncio.Queue): The queue subscribe returned
+        """
+        self._subscribers.discard(subscriber)
+
+
+    def run(self, publish, cache=None, max_parallel_students=None, max_parallel_tests=None):
+        """Grades every student in the upload. This blocks until grading is done, so it's run in a worker thread
+
+        Args:
+            publish (callable): Called with the name and data of each progress event, from the worker thread
+            cache (ResultCache, optional): The cache to reuse test results from. Defaults to None.
+            max_parallel_students (int, optional): The most students to grade at the same time, no matter what the config
+                asks for. Defaults to None, which uses the config's value.
+            max_parallel_tests (int, optional): The most test cases to run at the same time, no matter what the config asks for.
+                Defaults to None, which uses the config's value.
+        """
+        settings = self.configs['settings']
+        test_cases = TestCase.load_from_array(self.configs['tests'])
+
+        max_parallel_students = _cap(settings.get('max_parallel_students', 1), max_parallel_students)
+        max_parallel_tests = _cap(settings.get('max_parallel_tests', 1), max_parallel_tests)
+
+        grader_directory = path.join(self.directory, 'Grader')
+        extract_zip(path.join(self.directory, 'grader.zip'), grader_directory)
+
+        grader_program = create_program(grader_directory, settings)
+        grader_outputs = run_program(grader_program, test_cases, cache, max_parallel_tests=max_parallel_tests, interactive=False)
+
+        if grader_outputs is None:
+            raise ValueError('Grader compilation failed')
+
+        grader_profile = GraderProfile(get_grading_settings(settings), grader_outputs)
+
+        similarity_index = None
+        if settings.get('detect_similarity', False):
+            similarity_index = SimilarityIndex(fingerprint_sources(grader_program.get_source_contents()))
+
+        archive = SubmissionArchive(path.join(self.directory, 'students.zip'))
+        publish('grading', {'total': len(archive.get_student_names())})
+
+        with ResultWriter(path.join(self.directory, 'grades.jsonl')) as jsonl_writer, ResultWriter(path.join(self.directory, 'grades.csv')) as csv_writer:
+            # Jobs run on threads next to the event loop, and forking a process with threads running can deadlock the child
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            graded_students = grade_archive(archive, test_cases, settings, grader_profile, cache, max_parallel_tests, max_parallel_students, interactive=False,
+                                            mp_context=multiprocessing.get_context(start_method))
+
+            for student_name, student_grade in graded_students:
+                sg = student_grade[1] if student_grade is not None else None
+                status = 'failed' if student_grade is None else 'skipped' if sg is None else 'graded'
+
+                jsonl_writer.write(student_name, sg, status)
+                csv_writer.write(student_name, sg, status)
+
+                if sg is not None and similarity_index is not None:
+                    similarity_index.add(student_name, sg.source_fingerprints)
+
+                publish('student', {'student': student_name, 'status': status, 'overall_grade': sg.get_overall_grade() if sg is not None else None})
+
+        if similarity_index is not None:
+            similar_pairs = similarity_index.find_similar_pairs(settings.get('similarity_threshold', 0.5))
+            write_similarity_report(similar_pairs, path.join(self.directory, 'similarity.csv'))
+
+        # The uploads aren't needed anymore, only the results
+        for i in ('grader.zip', 'students.zip'):
+            os.remove(path.join(self.directory, i))
+
+        shutil.rmtree(grader_directory, ignore_errors=True)
+
+
+
+def _cap(value, limit):
+    # The server's limits win over whatever an uploaded config asks for
+    return max(min(value, limit) if limit is not None else value, 1)
+
+
+
+class GradingServer:
+    """A web interface for grading. A config, a zip of the grader program, and a zip of student submissions are
+        uploaded, and the grades are streamed back as each student is graded. Uploads wait in a bounded queue, and only
+        a few are graded at once, so many uploads at the same time don't overload the machine. The server only listens
+        on localhost and doesn't need anything besides the autograder itself. Uploads are run as code, so every request
+        needs the server's token, and requests from other web pages the instructor has open are turned away
+    """
+
+    def __init__(self, max_running_jobs=1, max_queued_jobs=16, max_parallel_students=None, max_parallel_tests=None, cache_directory=None,
+                 max_cache_mb=512, max_upload_mb=256, max_concurrent_uploads=2, max_finished_jobs=32, token=None):
+        """Creates a new grading server. Nothing is started until serve is called
+
+        Args:
+            max_running_jobs (int, optional): The most uploads to grade at the same time. Defaults to 1.
+            max_queued_jobs (int, optional): The most uploads that can wait to be graded. Any more are turned away until
+                there's room. Defaults to 16.
+            max_parallel_students (int, optional): The most students a single upload grades at the same time, no matter what its
+                config asks for. Defaults to None, which is the number of CPUs.
+            max_parallel_tests (int, optional): The most test cases a single student runs at the same time, no matter what the
+                config asks for. Defaults to None, which is the number of CPUs.
+            cache_directory (str, optional): The directory used to cache test results between uploads, so uploading the same
+                submissions again with different penalties doesn't rerun them. Defaults to None, which disables the cache.
+            max_cache_mb (int, optional): The most space the result cache can use. Defaults to 512.
+            max_upload_mb (int, optional): The largest upload accepted. Uploads are kept in memory until they're saved,
+                so this also limits how much memory each upload can use. Defaults to 256.
+            max_concurrent_uploads (int, optional): The most uploads read into memory at the same time. Any others wait
+                until one of them has been saved. Defaults to 2.
+            max_finished_jobs (int, optional): The most finished jobs to keep the results of. Once there are more, the oldest
+                job's results are deleted. Defaults to 32.
+            token (str, optional): The token every request has to give. Defaults to None, which generates a random one.
+        """
+        self.max_running_jobs = max_running_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.max_parallel_students = max_parallel_students if max_parallel_students is not None else os.cpu_count() or 1
+        self.max_parallel_tests = max_parallel_tests if max_parallel_tests is not None else os.cpu_count() or 1
+        self.cache_directory = cache_directory
+        self.max_cache_mb = max_cache_mb
+        self.max_upload_mb = max_upload_mb
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.max_finished_jobs = max_finished_jobs
+        self.token = token if token is not None else secrets.token_urlsafe(24)
+
+        self._jobs = OrderedDict()
+        self._queue = None
+        self._executor = None
+        self._jobs_directory = None
+        self._upload_slots = None
+        self._allowed_hosts = ()
+
+
+    async def serve(self, port=8000, ready=None):
+        """Listens for uploads on localhost until cancelled
+
+        Args:
+            port (int, optional): The port to listen on. Defaults to 8000, and 0 picks any free port.
+            ready (callable, optional): Called with the port the server is listening on once it's ready. Defaults to None.
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_queued_jobs)
+        self._upload_slots = asyncio.Semaphore(self.max_concurrent_uploads)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_running_jobs)
+        self._jobs_directory = tempfile.mkdtemp(prefix='wsu-autograder-server-')
+
+        runners = [asyncio.ensure_future(self._run_jobs()) for _ in range(self.max_running_jobs)]
+
+        try:
+            server = await asyncio.start_server(self._handle_connection, '127.0.0.1', port)
+
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+
+                # Only requests addressed to this server by name are answered, so a DNS rebinding attack can't reach it
+                self._allowed_hosts = (f'127.0.0.1:{port}', f'localhost:{port}')
+
+                if ready is not None:
+                    ready(port)
+
+                await server.serve_forever()
+
+        finally:
+            for runner in runners:
+                runner.cancel()
+
+            self._executor.shutdown(wait=True)
+            shutil.rmtree(self._jobs_directory, ignore_errors=True)
+
+
+    async def _run_jobs(self):
+        # Each runner grades one job at a time, so there are never more than max_running_jobs being graded
+        loop = asyncio.get_running_loop()
+
+        while True:
+            job = await self._queue.get()
+
+            # Everyone still waiting moves up a spot
+            for position, queued_job in enumerate(i for i in self._jobs.values() if i.state == 'queued' and i is not job):
+                queued_job.publish('queued', {'position': position + 1})
+
+            job.state = 'running'
+            job.publish('started', {})
+
+            def publish(event, data):
+                loop.call_soon_threadsafe(self._publish_progress, job, event, data)
+
+            try:
+                await loop.run_in_executor(self._executor, self._run_job, job, publish)
+                job.state = 'finished'
+                job.publish('finished', job.get_status())
+
+            except Exception as e:
+                job.state = 'failed'
+                job.error = str(e) or type(e).__name__
+                job.publish('failed', {'error': job.error})
+
+            self._remove_finished_jobs()
+
+
+    def _run_job(self, job, publish):
+        # Runs in a worker thread. The cache is opened per job, since it's cheap and isn't shared between threads
+        cache = None
+        settings = job.configs['settings']
+
+        if self.cache_directory is not None:
+            run_settings = {'language': settings.get('language', 'java'), 'runner': settings.get('runner', 'subprocess'),
+                            'resource_limits': settings.get('resource_limits', {}), 'main_executable': settings.get('main_executable'),
+                            'main_class': settings.get('main_class'), 'compiler_flags': settings.get('compiler_flags', [])}
+            cache = ResultCache(self.cache_directory, self.max_cache_mb, run_settings)
+            settings['object_cache_directory'] = path.abspath(path.join(self.cache_directory, 'objects'))
+
+        else:
+            settings['object_cache_directory'] = None
+
+        job.run(publish, cache, self.max_parallel_students, self.max_parallel_tests)
+
+        if cache is not None:
+            cache.evict()
+
+
+    def _publish_progress(self, job, event, data):
+        if event == 'grading':
+            job.total = data['total']
+
+        elif event == 'student':
+            job.done += 1
+            data = {**data, 'done': job.done, 'total': job.total}
+
+        job.publish(event, data)
+
+
+    def _remove_finished_jobs(self):
+        finished_jobs = [i for i in self._jobs.values() if i.state in ('finished', 'failed')]
+
+        for job in finished_jobs[:max(len(finished_jobs) - self.max_finished_jobs, 0)]:
+            del self._jobs[job.job_id]
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+
+                if line in (b'\r\n', b'\n', b''):
+                    break
+
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            await self._handle_request(method, urlsplit(target), headers, reader, writer)
+
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            # Malformed requests and browsers that went away are dropped
+            pass
+
+        finally:
+            writer.close()
+
+
+    def _check_request(self, headers, query):
+        # Any web page can make the browser send a form to localhost, so the Host, Origin, and token are all checked
+        #   before anything else
+        if headers.get('host', '').lower() not in self._allowed_hosts:
+            return 'Requests must be addressed to 127.0.0.1 or localhost'
+
+        if 'origin' in headers and headers['origin'].lower() not in (f'http://{i}' for i in self._allowed_hosts):
+            return 'Requests from other sites aren\'t allowed'
+
+        token = headers.get(TOKEN_HEADER, query.get('token', [''])[0])
+
+        if not secrets.compare_digest(token.encode('utf-8'), self.token.encode('utf-8')):
+            return 'A valid token is needed. Open the URL the server printed when it started'
+
+        return None
+
+
+    async def _handle_request(self, method, url, headers, reader, writer):
+        error = self._check_request(headers, parse_qs(url.query))
+
+        if error is not None:
+            return await self._respond(writer, 403, {'error': error})
+
+        request_path = url.path
+
+        if request_path == '/':
+            if method != 'GET':
+                return await self._respond(writer, 405, {'error': 'Only GET is supported'})
+            return await self._respond(writer, 200, INDEX_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+
+        if request_path == '/jobs':
+            if method == 'GET':
+                return await self._respond(writer, 200, [i.get_status() for i in self._jobs.values()])
+            if method == 'POST':
+                return await self._create_job(headers, reader, writer)
+            return await self._respond(writer, 405, {'error': 'Only GET and POST are supported'})
+
+        match = _job_path_pattern.match(request_path)
+        job = self._jobs.get(match.group('id')) if match is not None else None
+
+        if job is None:
+            return await self._respond(writer, 404, {'error': 'Not found'})
+
+        if method != 'GET':
+            return await self._respond(writer, 405, {'error': 'Only GET is supported'})
+
+        file_name = match.group('file')
+
+        if file_name is None:
+            return await self._respond(writer, 200, job.get_status())
+
+        if file_name == 'events':
+            return await self._stream_events(job, writer)
+
+        if file_name not in RESULT_FILES:
+            return await self._respond(writer, 404, {'error': 'Not found'})
+
+        if file_name not in job.get_result_files():
+            return await self._respond(writer, 409, {'error': f'{file_name} isn\'t available for a job that is {job.state}'})
+
+        with open(path.join(job.directory, file_name), 'rb') as f:
+            contents = f.read()
+
+        content_type = 'text/csv; charset=utf-8' if file_name.endswith('.csv') else 'application/x-ndjson; charset=utf-8'
+        await self._respond(writer, 200, contents, content_type, {'Content-Disposition': f'attachment; filename="{file_name}"'})
+
+
+    async def _create_job(self, headers, reader, writer):
+        if 'content-length' not in headers:
+            return await self._respond(writer, 411, {'error': 'Uploads need a Content-Length'})
+
+        content_length = int(headers['content-length'])
+
+        if content_length > self.max_upload_mb * 1024 * 1024:
+            return await self._respond(writer, 413, {'error': f'Uploads can be at most {self.max_upload_mb} MB'})
+
+        # Checked before reading the upload, so a full queue doesn't cost anything
+        if self._queue.full():
+            return await self._respond(writer, 503, {'error': 'Too many uploads are waiting to be graded, try again later'})
+
+        # Only a few uploads are held in memory at once, no matter how many are sent at the same time
+        async with self._upload_slots:
+            body = await reader.readexactly(content_length)
+
+            try:
+                fields = parse_multipart(body, headers.get('content-type', ''))
+            except ValueError as e:
+                return await self._respond(writer, 400, {'error': str(e)})
+
+            del body
+
+        missing_fields = [i for i in ('config', 'grader', 'students') if i not in fields]
+
+        if len(missing_fields) > 0:
+            return await self._respond(writer, 400, {'error': f'The upload is missing {", ".join(missing_fields)}'})
+
+        for field_name in ('grader', 'students'):
+            if not zipfile.is_zipfile(io.BytesIO(fields[field_name])):
+                return await self._respond(writer, 400, {'error': f'The {field_name} upload isn\'t a zip file'})
+
+        try:
+            configs = json.loads(fields['config'])
+
+            if 'settings' not in configs or 'tests' not in configs:
+                raise ValueError('it needs both settings and tests')
+
+            Program.check_performance_limits(TestCase.load_from_array(configs['tests']), configs['settings'].get('runner', 'subprocess'))
+
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            return await self._respond(writer, 400, {'error': f'The config is invalid, {e}'})
+
+        # Another upload may have filled the queue while this one was being read
+        if self._queue.full():
+            return await self._respond(writer, 503, {'error': 'Too many uploads are waiting to be graded, try again later'})
+
+        job_id = secrets.token_hex(8)
+        directory = path.join(self._jobs_directory, job_id)
+        os.makedirs(directory)
+
+        for field_name, file_name in (('grader', 'grader.zip'), ('students', 'students.zip')):
+            with open(path.join(directory, file_name), 'wb') as f:
+                f.write(fields[field_name])
+
+        job = GradingJob(job_id, directory, configs)
+        self._jobs[job_id] = job
+        self._queue.put_nowait(job)
+
+        job.publish('queued', {'position': sum(i.state == 'queued' for i in self._jobs.values())})
+
+        await self._respond(writer, 202, {'id': job_id, 'events': f'/jobs/{job_id}/events'})
+
+
+    async def _stream_events(self, job, writer):
+        # Server-sent events, which browsers read with an EventSource
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n')
+        subscriber = job.subscribe()
+
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.get(), _keepalive_seconds)
+                except asyncio.TimeoutError:
+                    writer.write(b': keepalive\n\n')
+                    await writer.drain()
+                    continue
+
+                writer.write(f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode('utf-8'))
+                await writer.drain()
+
+                if event in ('finished', 'failed'):
+                    break
+
+        finally:
+            job.unsubscribe(subscriber)
+
+
+    @staticmethod
+    async def _respond(writer, status, body, content_type='application/json', headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+
+        response_headers = {'Content-Type': content_type, 'Content-Length': str(len(body)), 'Connection': 'close', **(headers or {})}
+        head = f'HTTP/1.1 {status} {_status_reasons[status]}\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in response_headers.items())
+
+        writer.write(head.encode('latin-1') + b'\r\n' + body)
+        await writer.drain()
+
+
+
+def autograder_server():
+    parser = argparse.ArgumentParser(description='Serves a web page on localhost for uploading a config, grader, and student submissions to grade')
+
+    # Where to listen
+    parser.add_argument('--port', type=int, default=8000, help='The port to listen on. Defaults to 8000')
+
+    # How many uploads to grade at once
+    parser.add_argument('--max-running-jobs', type=int, default=1, help='The most uploads to grade at the same time. Defaults to 1')
+
+    # How many uploads can wait
+    parser.add_argument('--max-queued-jobs', type=int, default=16, help='The most uploads that can wait to be graded before more are turned away. Defaults to 16')
+
+    # Number of students to grade at the same time
+    parser.add_argument('-p', '--parallel-students', type=int, default=None, help='The most students an upload grades in parallel, no matter what its config asks for. Defaults to the number of CPUs')
+
+    # Number of test cases to run at the same time
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='The most test cases a student runs in parallel, no matter what the config asks for. Defaults to the number of CPUs')
+
+    # Where to keep results between uploads
+    parser.add_argument('--cache-directory', type=str, default=None, help='A directory to cache test results in between uploads. By default results aren\'t cached')
+
+    # The largest upload
+    parser.add_argument('--max-upload-mb', type=int, default=256, help='The largest upload accepted, in megabytes. Defaults to 256')
+
+    args = parser.parse_args()
+
+    server = GradingServer(args.max_running_jobs, args.max_queued_jobs, args.parallel_students, args.jobs, args.cache_directory, max_upload_mb=args.max_upload_mb)
+
+    async def run_server():
+        # Stopping the server with SIGTERM cleans up the uploads the same way Ctrl+C does
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass
+
+        await server.serve(args.port, lambda port: print(f'Listening on http://127.0.0.1:{port}/?token={server.token}'))
+
+    try:
+        asyncio.run(run_server())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from os import path
+
+_HARNESS_CLASS = 'WSUAutograderHarness'
+_HARNESS_SOURCE = path.join(path.dirname(path.abspath(__file__)), f'{_HARNESS_CLASS}.java')
+
+_STDOUT, _STDERR, _DONE, _EXITING = 1, 2, 3, 4
+
+_harness_lock = threading.Lock()
+
+
+def _get_user_cache_directory():
+    # The harness is kept somewhere only the current user can write to, since every test case runs the classes in it
+    cache_home = os.environ.get('XDG_CACHE_HOME') or path.join(path.expanduser('~'), '.cache')
+    return path.join(cache_home, 'wsu-autograder')
+
+
+def get_harness_directory():
+    """Compiles the JVM test harness if it hasn't been compiled yet. The compiled harness is cached in the user's
+        cache directory under a hash of its source, so it's only ever compiled once per user
+
+    Raises:
+        RuntimeError: Raised if the harness could not be compiled
+
+    Returns:
+        str: The path to the directory containing the compiled harness
+    """
+    with open(_HARNESS_SOURCE, 'rb') as f:
+        source_hash = hashlib.sha1(f.read()).hexdigest()[:12]
+
+    cache_directory = _get_user_cache_directory()
+    harness_directory = path.join(cache_directory, f'harness-{source_hash}')
+
+    with _harness_lock:
+        if path.isfile(path.join(harness_directory, f'{_HARNESS_CLASS}.class')):
+            return harness_directory
+
+        # Compile into a scratch directory and move it into place, so other processes never see a half built harness
+        os.makedirs(cache_directory, exist_ok=True)
+        build_directory = tempfile.mkdtemp(prefix='harness-build-', dir=cache_directory)
+        result = subprocess.run(('javac', '-d', build_directory, _HARNESS_SOURCE), capture_output=True, text=True)
+
+        if result.returncode != 0:
+            shutil.rmtree(build_directory, ignore_errors=True)
+            raise RuntimeError(f'Could not compile the JVM test harness:\n{result.stderr}')
+
+        try:
+            os.rename(build_directory, harness_directory)
+        except OSError:
+            # Another process finished compiling the harness first
+            shutil.rmtree(build_directory, ignore_errors=True)
+
+    return harness_directory
+
+
+class JvmRunner:
+    """Keeps a single warm JVM running for a program and uses it to run the program's main class for
+        each test case, instead of starting a new JVM for every test
+    """
+
+    def __init__(self, directory, class_path):
+        """Creates a new JVM runner. The JVM itself isn't started until the first test case is run
+
+        Args:
+            directory (str): The working directory of the program
+            class_path (str): The class path containing the program's compiled classes, relative to the directory
+        """
+        self.directory = directory
+        self.class_path = class_path
+
+        self._process = None
+        self._frames = None
+
+
+    def run(self, test, main_class, args=()):
+        """Runs a single test case by calling the main method of a class in the warm JVM
+
+        Args:
+            test (TestCase): The test case to run
+            main_class (str): The fully qualified name of the class containing the main method
+            args (tuple, optional): Arguments passed to the program before the test case's own args. Defaults to ().
+
+        Returns:
+            tuple: The stdout, stderr, exit code, whether the test timed out, and whether the output was truncated
+        """
+        if self._process is None:
+            self._start()
+
+        request = self._encode(main_class.encode('utf-8'))
+        request += struct.pack('>i', len(args) + len(test.args))
+        request += b''.join(self._encode(str(i).encode('utf-8')) for i in (*args, *test.args))
+        request += self._encode(test.stdin.encode('utf-8'))
+
+        try:
+            self._process.stdin.write(request)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+
+        output = {_STDOUT: bytearray(), _STDERR: bytearray()}
+        output_truncated = False
+        timeout = False
+        exit_code = None
+        deadline = time.monotonic() + test.timeout
+
+        while exit_code is None:
+            try:
+                frame_type, data = self._frames.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self._process.terminate()
+                exit_code = self._stop()
+                timeout = True
+                break
+
+            if frame_type in output:
+                remaining = test.max_output_bytes - len(output[frame_type])
+                if len(data) > remaining:
+                    output_truncated = True
+                    data = data[:max(remaining, 0)]
+                output[frame_type].extend(data)
+
+            elif frame_type == _DONE:
+                exit_code = struct.unpack('>i', data)[0]
+
+            else:
+                # The program called System.exit or the JVM died, so the JVM's exit code is the program's exit code
+                exit_code = self._stop()
+
+        stdout = output[_STDOUT].decode('utf-8', errors='replace')
+        stderr = output[_STDERR].decode('utf-8', errors='replace')
+
+        return stdout, stderr, exit_code, timeout, output_truncated
+
+
+    def close(self):
+        """Shuts down the JVM if it is running
+        """
+        if self._process is not None:
+            self._process.stdin.close()
+            self._stop()
+
+
+    def _start(self):
+        command = ('java', '-cp', get_harness_directory(), _HARNESS_CLASS, self.class_path)
+
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=self.directory)
+        self._frames = queue.Queue()
+
+        threading.Thread(target=self._read_frames, args=(self._process.stdout, self._frames), daemon=True).start()
+
+
+    def _stop(self):
+        self._process.wait()
+        exit_code = self._process.returncode
+        self._process = None
+        return exit_code
+
+
+    @staticmethod
+    def _read_frames(stream, frames):
+        while True:
+            header = stream.read(5)
+            if len(header) < 5:
+                frames.put((None, b''))
+                return
+
+            frame_type, length = struct.unpack('>bi', header)
+            frames.put((frame_type, stream.read(length)))
+
+
+    @staticmethod
+    def _encode(data):
+        return struct.pack('>i', len(data)) + data
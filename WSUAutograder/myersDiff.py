@@ -0,0 +1,148 @@
+"""A linear space implementation of Myers' O(ND) difference algorithm that produces output in the same format
+    as difflib.ndiff, so it can be used as a drop in replacement wherever only the '  ', '- ', and '+ ' prefixes
+    of ndiff are used. Unlike ndiff it never tries to find "similar" lines, which makes its running time depend
+    only on the size of the inputs and the number of differences between them.
+"""
+
+
+def myers_diff(a, b, max_edits=None):
+    """Compares two sequences and generates the differences between them in ndiff format. Within every
+        changed region deletions and insertions are interleaved, so that the nth deleted item is
+        immediately followed by the nth inserted item
+
+    Args:
+        a (sequence): The sequence being changed from. Items are compared with ==
+        b (sequence): The sequence being changed to
+        max_edits (int, optional): The largest number of edits to search for within a single region. Any region that
+            needs more edits than this is reported as entirely deleted and replaced, which bounds the running time
+            on inputs that have almost nothing in common. Defaults to None, which never gives up.
+
+    Yields:
+        str: Each item of the two sequences prefixed with '  ' if it's in both, '- ' if it's only in a,
+            or '+ ' if it's only in b
+    """
+    operations = []
+    _diff(a, 0, len(a), b, 0, len(b), max_edits, operations)
+
+    deleted = []
+    inserted = []
+
+    for operation, item in operations:
+        if operation == '  ':
+            yield from _interleave(deleted, inserted)
+            deleted.clear()
+            inserted.clear()
+            yield f'  {item}'
+
+        elif operation == '- ':
+            deleted.append(item)
+
+        else:
+            inserted.append(item)
+
+    yield from _interleave(deleted, inserted)
+
+
+def _interleave(deleted, inserted):
+    for i in range(max(len(deleted), len(inserted))):
+        if i < len(deleted):
+            yield f'- {deleted[i]}'
+        if i < len(inserted):
+            yield f'+ {inserted[i]}'
+
+
+def _diff(a, a_low, a_high, b, b_low, b_high, max_edits, operations):
+    # Strip off the common prefix and suffix, which leaves a region that starts and ends with a difference
+    while a_low < a_high and b_low < b_high and a[a_low] == b[b_low]:
+        operations.append(('  ', a[a_low]))
+        a_low += 1
+        b_low += 1
+
+    suffix = []
+
+    while a_low < a_high and b_low < b_high and a[a_high - 1] == b[b_high - 1]:
+        a_high -= 1
+        b_high -= 1
+        suffix.append(('  ', a[a_high]))
+
+    if a_low == a_high or b_low == b_high:
+        operations.extend(('- ', a[i]) for i in range(a_low, a_high))
+        operations.extend(('+ ', b[i]) for i in range(b_low, b_high))
+
+    else:
+        snake = _middle_snake(a, a_low, a_high, b, b_low, b_high, max_edits)
+
+        if snake is None:
+            operations.extend(('- ', a[i]) for i in range(a_low, a_high))
+            operations.extend(('+ ', b[i]) for i in range(b_low, b_high))
+
+        else:
+            x_start, y_start, x_end, y_end = snake
+            _diff(a, a_low, x_start, b, b_low, y_start, max_edits, operations)
+            operations.extend(('  ', a[i]) for i in range(x_start, x_end))
+            _diff(a, x_end, a_high, b, y_end, b_high, max_edits, operations)
+
+    operations.extend(reversed(suffix))
+
+
+def _middle_snake(a, a_low, a_high, b, b_low, b_high, max_edits):
+    """Finds the middle snake of the shortest edit path between two regions by searching forwards from the
+        start and backwards from the end at the same time until the two searches overlap
+
+    Returns:
+        tuple: The start and end coordinates of the snake as (x_start, y_start, x_end, y_end), or None if
+            the regions need more than max_edits edits
+    """
+    n = a_high - a_low
+    m = b_high - b_low
+    delta = n - m
+    odd = delta % 2 != 0
+    max_d = (n + m + 1) // 2
+
+    if max_edits is not None:
+        max_d = min(max_d, (max_edits + 1) // 2)
+
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(max_d + 1):
+        # Extend the forward search by one edit along every diagonal it can reach
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+
+            y = x - k
+            x_start, y_start = x, y
+
+            while x < n and y < m and a[a_low + x] == b[b_low + y]:
+                x += 1
+                y += 1
+
+            forward[offset + k] = x
+
+            if odd and delta - (d - 1) <= k <= delta + (d - 1) and x + backward[offset + delta - k] >= n:
+                return a_low + x_start, b_low + y_start, a_low + x, b_low + y
+
+        # Extend the backward search, which works on the reversed regions
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+
+            y = x - k
+            x_start, y_start = x, y
+
+            while x < n and y < m and a[a_high - 1 - x] == b[b_high - 1 - y]:
+                x += 1
+                y += 1
+
+            backward[offset + k] = x
+
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return a_high - x, b_high - y, a_high - x_start, b_high - y_start
+
+    return None
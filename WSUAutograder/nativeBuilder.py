@@ -0,0 +1,234 @@
+import hashlib
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+from .profiler import span
+
+# Matches both quoted and angle bracket includes, since students often set up include directories and use angle brackets for their own headers
+INCLUDE_PATTERN = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*[<"]([^>"\r\n]+)[>"]', re.MULTILINE)
+
+
+def run_build_command(command, cwd, timeout=None):
+    """Runs a compiler or build tool, killing it along with anything it started if it takes too long
+
+    Args:
+        command (list(str)): The command to run
+        cwd (str): The directory to run the command in
+        timeout (float, optional): How many seconds the command has to finish. Defaults to None, which waits forever.
+
+    Returns:
+        subprocess.CompletedProcess: The finished command, or None if it timed out
+    """
+    # make and compiler drivers start their own children, so they're put in their own process group where that's possible
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors='replace',
+                               start_new_session=os.name == 'posix')
+
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if os.name == 'posix':
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        else:
+            process.kill()
+
+        process.communicate()
+        return None
+
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+
+class NativeBuilder:
+    """Compiles C and C++ programs that don't come with a makefile. Every translation unit is compiled on its own and in parallel,
+        and object files are cached by a hash of the translation unit and every header it includes, so that files many students
+        share, such as starter code, are only compiled once
+    """
+
+    _c_extensions = ['.c']
+    _cpp_extensions = ['.cpp', '.cc', '.cxx']
+
+
+    def __init__(self, cache_directory=None, compile_timeout=60, max_parallel_compiles=None, compiler_flags=[]):
+        """Creates a new builder
+
+        Args:
+            cache_directory (str, optional): The directory object files are cached in. Defaults to None, which disables the cache.
+            compile_timeout (float, optional): How many seconds compiling and linking a whole program can take. Defaults to 60.
+            max_parallel_compiles (int, optional): The maximum number of translation units to compile at the same time. Defaults to None,
+                which uses the number of CPUs.
+            compiler_flags (list(str), optional): Extra flags passed to the compiler for every translation unit. Defaults to [].
+        """
+        self.cache_directory = cache_directory
+        self.compile_timeout = compile_timeout
+        self.max_parallel_compiles = max_parallel_compiles or os.cpu_count() or 1
+        self.compiler_flags = list(compiler_flags)
+
+        self._compiler_versions = {}
+
+
+    def build(self, source_files, output_path):
+        """Compiles and links a program
+
+        Args:
+            source_files (list(str)): Every source and header file in the program
+            output_path (str): The path to write the executable to
+
+        Returns:
+            bool: True if the program was compiled and linked successfully
+        """
+        # Every compiler runs in the directory of the file it's working on, so all of the paths need to be absolute
+        source_files = [path.abspath(i) for i in source_files]
+        output_path = path.abspath(output_path)
+        units = [i for i in source_files if path.splitext(i)[-1].lower() in NativeBuilder._c_extensions + NativeBuilder._cpp_extensions]
+
+        if len(units) == 0:
+            print('No C or C++ source files were found')
+            return False
+
+        # Headers are searched for in every directory with source code in it, which covers both headers next to the
+        #   source files and separate include directories
+        include_directories = sorted({path.dirname(i) for i in source_files})
+        deadline = time.monotonic() + self.compile_timeout
+        scratch_directory = tempfile.mkdtemp(prefix='wsu-autograder-build-')
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel_compiles) as executor:
+                objects = list(executor.map(lambda x: self._compile_unit(x[1], include_directories, path.join(scratch_directory, f'{x[0]}.o'), deadline),
+                                            enumerate(units)))
+
+            if None in objects:
+                return False
+
+            is_cpp = any(self._is_cpp(i) for i in units)
+
+            os.makedirs(path.dirname(output_path), exist_ok=True)
+
+            with span('link'):
+                return self._run_compiler([self._get_compiler(is_cpp), *objects, '-o', output_path, '-lm'], path.dirname(output_path), deadline) is not None
+
+        finally:
+            shutil.rmtree(scratch_directory, ignore_errors=True)
+
+
+    def _compile_unit(self, unit, include_directories, scratch_path, deadline):
+        compiler = self._get_compiler(self._is_cpp(unit))
+
+        # The include directories differ between students, but only the contents of the headers affect the object file
+        key = self._get_unit_key(unit, include_directories, compiler)
+        object_path = path.join(self.cache_directory, key[:2], key[2:] + '.o') if self.cache_directory is not None else scratch_path
+
+        if self.cache_directory is not None and path.isfile(object_path):
+            # Touch the object file so the result cache's eviction removes the least recently used objects first
+            try:
+                os.utime(object_path)
+            except OSError:
+                pass
+
+            return object_path
+
+        output_path = scratch_path
+
+        if self.cache_directory is not None:
+            os.makedirs(path.dirname(object_path), exist_ok=True)
+            file_descriptor, output_path = tempfile.mkstemp(suffix='.o', dir=path.dirname(object_path))
+            os.close(file_descriptor)
+
+        # Compiling from the unit's own directory keeps __FILE__ the same for every student
+        command = [compiler, *self.compiler_flags, *(f'-I{i}' for i in include_directories), '-c', path.basename(unit), '-o', output_path]
+
+        with span('compile_unit', unit=path.basename(unit)):
+            result = self._run_compiler(command, path.dirname(unit), deadline)
+
+        if result is None:
+            if output_path != scratch_path and path.isfile(output_path):
+                os.remove(output_path)
+            return None
+
+        if output_path != scratch_path:
+            # Other processes may be compiling the same unit, so the finished object is moved into place all at once
+            os.replace(output_path, object_path)
+
+        return object_path
+
+
+    def _run_compiler(self, command, cwd, deadline):
+        remaining = deadline - time.monotonic()
+
+        result = run_build_command(command, cwd, remaining) if remaining > 0 else None
+
+        if result is None:
+            print(f'Compilation timed out after {self.compile_timeout} seconds')
+            return None
+
+        print(result.stdout, end='')
+        print(result.stderr, end='')
+
+        return result if result.returncode == 0 else None
+
+
+    def _get_unit_key(self, unit, include_directories, compiler):
+        key = hashlib.sha256()
+
+        for part in (self._get_compiler_version(compiler), '\0'.join(self.compiler_flags), path.basename(unit)):
+            key.update(part.encode('utf-8') + b'\0')
+
+        for name, file_path in [(path.basename(unit), unit), *self._get_dependencies(unit, include_directories)]:
+            with open(file_path, 'rb') as f:
+                key.update(name.encode('utf-8') + b'\0' + hashlib.sha256(f.read()).digest())
+
+        return key.hexdigest()
+
+
+    def _get_dependencies(self, file_path, include_directories, found=None):
+        # Finds every header in the program that a file includes, directly or through other headers, as pairs of the name
+        #   it was included by and its path. Headers outside the program, such as the standard library, are covered by the compiler version
+        if found is None:
+            found = {}
+
+        with open(file_path, 'rb') as f:
+            includes = INCLUDE_PATTERN.findall(f.read())
+
+        for name in includes:
+            name = name.decode('utf-8', errors='replace').strip()
+
+            for directory in (path.dirname(file_path), *include_directories):
+                header_path = path.normpath(path.join(directory, name))
+
+                if path.isfile(header_path):
+                    if header_path not in found:
+                        found[header_path] = name
+                        self._get_dependencies(header_path, include_directories, found)
+                    break
+
+        return [(name, header_path) for header_path, name in found.items()]
+
+
+    def _get_compiler_version(self, compiler):
+        if compiler not in self._compiler_versions:
+            try:
+                result = subprocess.run([compiler, '--version'], capture_output=True, text=True)
+                self._compiler_versions[compiler] = f'{shutil.which(compiler)}\0{result.stdout}'
+            except OSError:
+                self._compiler_versions[compiler] = compiler
+
+        return self._compiler_versions[compiler]
+
+
+    @staticmethod
+    def _get_compiler(is_cpp):
+        return os.environ.get('CXX', 'c++') if is_cpp else os.environ.get('CC', 'cc')
+
+
+    @staticmethod
+    def _is_cpp(file_path):
+        return path.splitext(file_path)[-1].lower() in NativeBuilder._cpp_extensions
@@ -0,0 +1,266 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+
+class Profiler:
+    """Records how long each phase of a grading run takes. Every span counts towards the summary of its phase, and
+        spans that aren't marked as detail are also kept as events for a Chrome trace
+    """
+
+    def __init__(self):
+        """Creates a new, empty profiler
+        """
+        self.durations = defaultdict(list)
+        self.events = []
+
+        # Spans are timed with perf_counter, but their start times are stored as wall clock times so that spans
+        #   recorded in other processes, or on other machines, line up in the trace
+        self._clock_offset = time.time() - time.perf_counter()
+
+
+    def record(self, name, start, duration, args=None, detail=False):
+        """Records a finished span
+
+        Args:
+            name (str): The phase the span belongs to
+            start (float): The perf_counter time the span started at
+            duration (float): How long the span took in seconds
+            args (dict, optional): Extra information about the span, such as the student being graded. Defaults to None.
+            detail (bool, optional): Whether the span is too frequent to include in the trace. Defaults to False.
+        """
+        self.durations[name].append(duration)
+
+        if not detail:
+            self.events.append((name, start + self._clock_offset, duration, os.getpid(), threading.get_native_id(), args))
+
+
+    def merge(self, profiler):
+        """Adds all of the spans recorded by another profiler, such as one from a worker process
+
+        Args:
+            profiler (Profiler): The profiler to merge in
+        """
+        for name, durations in profiler.durations.items():
+            self.durations[name].extend(durations)
+
+        self.events.extend(profiler.events)
+
+
+    def get_summary(self):
+        """Summarizes how long each phase took
+
+        Returns:
+            list(tuple): The name, count, total, p50, p95, and max time in seconds of every phase, sorted by the total time
+        """
+        summary = []
+
+        for name, durations in self.durations.items():
+            durations = sorted(durations)
+            summary.append((name, len(durations), sum(durations), _percentile(durations, 50), _percentile(durations, 95), durations[-1]))
+
+        return sorted(summary, key=lambda x: x[2], reverse=True)
+
+
+    def get_slowest_students(self, count=5):
+        """Finds the students that took the longest to grade
+
+        Args:
+            count (int, optional): The number of students to return. Defaults to 5.
+
+        Returns:
+            list(tuple): The name of each student and how long they took to grade in seconds, slowest first
+        """
+        students = [(args['student'], duration) for name, _, duration, _, _, args in self.events if name == 'grade_student' and args]
+        return sorted(students, key=lambda x: x[1], reverse=True)[:count]
+
+
+    def format_summary(self):
+        """Formats the phase summary and the slowest students as a table
+
+        Returns:
+            str: The formatted table
+        """
+        rows = [('PHASE', 'COUNT', 'TOTAL', 'P50', 'P95', 'MAX')]
+        rows += [(name, str(count), *(_format_seconds(i) for i in times)) for name, count, *times in self.get_summary()]
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = ['  '.join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))) for row in rows]
+
+        slowest_students = self.get_slowest_students()
+
+        if len(slowest_students) > 0:
+            lines.append('')
+            lines.append('Slowest students:')
+            lines += [f'  {name}: {_format_seconds(duration)}' for name, duration in slowest_students]
+
+        return '\n'.join(lines)
+
+
+    def write_trace(self, file_path):
+        """Writes every non-detail span to a file in the Chrome trace event format, which can be opened in
+            chrome://tracing or https://ui.perfetto.dev
+
+        Args:
+            file_path (str): The path of the file to write
+        """
+        trace_start = min((i[1] for i in self.events), default=0)
+
+        events = [{'name': name, 'cat': 'autograder', 'ph': 'X', 'ts': (start - trace_start) * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': tid,
+                   'args': args or {}} for name, start, duration, pid, tid, args in self.events]
+
+        with open(file_path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+
+class _Span:
+    """Times a block of code and records it on a profiler when the block exits
+    """
+
+    __slots__ = ('_profiler', '_name', '_args', '_detail', '_start')
+
+
+    def __init__(self, profiler, name, args, detail):
+        self._profiler = profiler
+        self._name = name
+        self._args = args
+        self._detail = detail
+        self._start = None
+
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *_):
+        self._profiler.record(self._name, self._start, time.perf_counter() - self._start, self._args, self._detail)
+
+
+
+class _NullSpan:
+    """Stands in for a span when profiling is off, so instrumented code costs next to nothing
+    """
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_):
+        pass
+
+
+
+_null_span = _NullSpan()
+
+# The profiler spans are recorded on in this process, or None if profiling is off
+_active = None
+
+
+def start():
+    """Turns on profiling in this process
+
+    Returns:
+        Profiler: The profiler spans will be recorded on
+    """
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def stop():
+    """Turns off profiling in this process
+
+    Returns:
+        Profiler: The profiler spans were recorded on, or None if profiling wasn't on
+    """
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def is_enabled():
+    """Checks if profiling is on in this process
+
+    Returns:
+        bool: True if spans are being recorded
+    """
+    return _active is not None
+
+
+def span(name, detail=False, **args):
+    """Times a block of code as part of a phase. Does nothing unless profiling is on
+
+    Args:
+        name (str): The phase the block belongs to
+        detail (bool, optional): Whether the block runs too often to include in the trace, in which case it only counts
+            towards the summary. Defaults to False.
+        **args: Extra information shown with the span in the trace
+
+    Returns:
+        A context manager that times the block
+    """
+    if _active is None:
+        return _null_span
+
+    return _Span(_active, name, args, detail)
+
+
+def call_profiled(enabled, function, *args, **kwargs):
+    """Calls a function in a worker process, recording its spans on a new profiler if profiling was on where the
+        work came from. Workers don't share the profiler of the process that started them, so their spans are sent
+        back alongside the result and added with merge_profiled
+
+    Args:
+        enabled (bool): Whether profiling is on in the process the work came from
+        function (callable): The function to call
+        *args: The arguments to call the function with
+        **kwargs: The keyword arguments to call the function with
+
+    Returns:
+        tuple: The result of the function and the profiler its spans were recorded on, or None if profiling is off
+    """
+    global _active
+
+    if not enabled:
+        return function(*args, **kwargs), None
+
+    previous, _active = _active, Profiler()
+
+    try:
+        return function(*args, **kwargs), _active
+    finally:
+        _active = previous
+
+
+def merge_profiled(profiled_result):
+    """Adds the spans returned by call_profiled to this process's profiler
+
+    Args:
+        profiled_result (tuple): The value returned by call_profiled
+
+    Returns:
+        The result of the function call_profiled called
+    """
+    result, profiler = profiled_result
+
+    if profiler is not None and _active is not None:
+        _active.merge(profiler)
+
+    return result
+
+
+def _percentile(sorted_values, percent):
+    # Nearest rank, so the value is always one that was actually measured
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+def _format_seconds(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f}s'
+
+    return f'{seconds * 1000:.2f}ms'
@@ -1,8 +1,15 @@
+import math
 import os
+import queue
 import re as re
+import signal
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from os import path
 from shutil import copyfile
+from statistics import median
 
 from binaryornot.check import is_binary
 from pygments import highlight
@@ -10,6 +17,18 @@ from pygments.formatters import TerminalTrueColorFormatter
 from pygments.lexers import get_lexer_by_name
 from tqdm import tqdm
 
+from .forkServer import ForkedProcess, ForkServerRunner, SpawnServerRunner
+from .jvmRunner import JvmRunner
+from .nativeBuilder import NativeBuilder, run_build_command
+from .profiler import span
+
+try:
+    import resource
+except ImportError:
+    # Resource limits are only available on POSIX systems
+    resource = None
+
+
 class TestCase:
     """Data class that stores all of the information needed to run a certain test case
     """
@@ -27,7 +46,7 @@ class TestCase:
         return [TestCase(**i) for i in array]
 
 
-    def __init__(self, stdin='', description='', timeout=5, weight=1, runner_args=[], args=[], command=None, required_strings=[], required_strings_stderr=[]):
+    def __init__(self, stdin='', description='', timeout=5, weight=1, runner_args=[], args=[], command=None, required_strings=[], required_strings_stderr=[], max_output_bytes=10485760, max_cpu_seconds=None, max_rss_mb=None, relative_to_grader=None, repeat=1):
         """Create a basic data class to store information about test cases
 
         Args:
@@ -37,6 +56,14 @@ class TestCase:
             args (list, optional): Any additional arguments to pass to the program for this test case. Defaults to []].
             command (list, optional): The command to be run to execute the test case. If None 
                 is specified, the default command will be used. Defaults to None.
+            max_output_bytes (int, optional): The maximum number of bytes of stdout and of stderr to keep. Any output
+                past this limit is discarded and the result is flagged as truncated. Defaults to 10485760 (10 MiB).
+            max_cpu_seconds (float, optional): The most CPU time the program can use before it's penalized. Defaults to None, meaning no limit.
+            max_rss_mb (float, optional): The most memory the program can have resident before it's penalized. Defaults to None, meaning no limit.
+            relative_to_grader (float, optional): The program is penalized if it uses more than this many times the CPU time
+                the grader used on the same test case. Defaults to None, meaning no limit.
+            repeat (int, optional): The number of times to run the test case. The CPU time and memory usage of the program
+                are the medians over all of the runs. Defaults to 1.
         """
         self.stdin = stdin
         self.description = description
@@ -47,6 +74,11 @@ class TestCase:
         self.command = command
         self.required_strings = required_strings
         self.required_strings_stderr = required_strings_stderr
+        self.max_output_bytes = max_output_bytes
+        self.max_cpu_seconds = max_cpu_seconds
+        self.max_rss_mb = max_rss_mb
+        self.relative_to_grader = relative_to_grader
+        self.repeat = repeat
 
 
 
@@ -54,7 +86,7 @@ class TestResult:
     """Data class that contains the results of a single test case
     """
 
-    def __init__(self, test_case, stdout, stderr, exit_code=0, timeout=False):
+    def __init__(self, test_case, stdout, stderr, exit_code=0, timeout=False, output_truncated=False, user_time=None, system_time=None, peak_rss_kb=None):
         """Creates a new set of test case Results
 
         Args:
@@ -63,20 +95,137 @@ class TestResult:
             stderr (str): A string containing the standard error of the program that ran this test case
             exit_code (int, optional): The exit code of the program when it ran the test cases. Defaults to 0.
             timeout (bool, optional): Whether or not the program timed out while trying to run the test case. Defaults to False.
+            output_truncated (bool, optional): Whether or not the stdout or stderr of the program went over the test case's
+                output limit and was cut short. Defaults to False.
+            user_time (float, optional): The CPU time in seconds the program spent in user mode. Defaults to None, meaning it wasn't measured.
+            system_time (float, optional): The CPU time in seconds the program spent in the kernel. Defaults to None.
+            peak_rss_kb (int, optional): The largest amount of memory in KiB the program had resident at once. Defaults to None.
         """
         self.test_case = test_case
         self.stdout = stdout
         self.stderr = stderr
         self.exit_code = exit_code
         self.timeout = timeout
+        self.output_truncated = output_truncated
+        self.user_time = user_time
+        self.system_time = system_time
+        self.peak_rss_kb = peak_rss_kb
+
+
+
+class _OutputCapture:
+    """Reads a subprocess's output stream on a background thread while the process is running, so that
+        a program printing more than the pipe buffer can hold never blocks waiting for it to be read
+    """
+
+    _chunk_size = 65536
+
+
+    def __init__(self, stream, max_bytes):
+        """Starts capturing an output stream
+
+        Args:
+            stream (file): The stream to read from until it is closed
+            max_bytes (int): The maximum number of bytes to keep. Anything past this is read and thrown away
+        """
+        self.truncated = False
+
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._data = bytearray()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+
+    def _read(self):
+        for chunk in iter(lambda: self._stream.read1(_OutputCapture._chunk_size), b''):
+            remaining = self._max_bytes - len(self._data)
+
+            if len(chunk) > remaining:
+                self.truncated = True
+                chunk = chunk[:max(remaining, 0)]
+
+            self._data.extend(chunk)
+
+        self._stream.close()
+
+
+    def get_text(self):
+        """Waits for the stream to be closed and returns everything that was captured
+
+        Returns:
+            str: The captured output, decoded as utf-8
+        """
+        self._thread.join()
+        return self._data.decode('utf-8', errors='replace')
+
+
+
+class _ProcessWaiter:
+    """Waits for a subprocess to exit on a background thread. Only used on systems without fork, where there's no spawn
+        server to start the process, so its CPU time and memory usage aren't measured
+    """
+
+    def __init__(self, process):
+        """Starts waiting for a process
+
+        Args:
+            process (subprocess.Popen): The process to wait for. Its returncode is set once it exits
+        """
+        self.user_time = None
+        self.system_time = None
+        self.peak_rss_kb = None
+
+        self._process = process
+        self._thread = threading.Thread(target=self._wait, daemon=True)
+        self._thread.start()
+
+
+    def _wait(self):
+        self._process.wait()
+
+
+    def wait(self, timeout=None):
+        """Waits for the process to exit
+
+        Args:
+            timeout (float, optional): The longest time to wait in seconds. Defaults to None, which waits forever.
+
+        Returns:
+            bool: Whether or not the process has exited
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
 
 
 
 class Program:
-    _language_extensions = ['.java', '.py', '.c', '.cpp', '.sh', '.bash', ]
+    _language_extensions = ['.java', '.py', '.c', '.cpp', '.cc', '.cxx', '.h', '.hpp', '.hh', '.sh', '.bash', ]
+
+    # Directories that are never part of what a student wrote, and can hold thousands of files
+    _ignored_directories = ['.git', '.svn', '.hg', '__pycache__', 'node_modules', '.idea', '.vscode', '__MACOSX']
+    _javac_argfile_threshold = 50
+
+    # Files that compiling creates, which javac and make write next to the sources when there's no bin directory. Native
+    #   executables often have no extension, so they're recognized by the magic number ELF, Mach-O, and PE files start with
+    _build_output_extensions = ['.class', '.o', '.obj', '.a', '.so', '.dylib', '.dll', '.exe', '.pyc']
+    _native_executable_magic = (b'\x7fELF', b'\xcf\xfa\xed\xfe', b'\xce\xfa\xed\xfe', b'MZ')
 
+    # How long a program gets to exit after being asked to before it's killed
+    _kill_grace_period = 1
 
-    def __init__(self, directory, language='java', args=[]):
+    # Maps each resource limit setting to the limit it sets and the number of units that are in one of its units.
+    #   RLIMIT_NPROC counts every process the user running the autograder owns, not just the ones the test case started
+    _resource_limits = {
+        'cpu_seconds': ('RLIMIT_CPU', 1),
+        'memory_mb': ('RLIMIT_AS', 1024 * 1024),
+        'max_processes': ('RLIMIT_NPROC', 1),
+        'file_size_mb': ('RLIMIT_FSIZE', 1024 * 1024),
+    }
+
+
+    def __init__(self, directory, language='java', args=[], runner='subprocess', resource_limits={}, main_executable=None, main_class=None,
+                 compile_timeout=60, max_parallel_compiles=None, compiler_flags=[], object_cache_directory=None):
         """Creates a new program objects that stores all of the necessary information to compile, run, and test that program
 
         Args:
@@ -84,10 +233,37 @@ class Program:
             language (str, optional): The language that the program is written in. Defaults to 'java'. 
                 Currently accepted values are 'java', 'cpp', 'c++', 'c', 'python', 'bash', and 'shell' 
             args (list, optional): The arguments to be passed to the program when it's being executed. Defaults to [].
+            runner (str, optional): How test cases are executed. 'subprocess' starts a new process for every test case, and 'jvm'
+                runs the main class of a java program in a single warm JVM for all of the test cases. 'sandbox' starts a new process
+                in its own process group with the resource limits applied to it. 'forkserver' keeps a python program's libraries loaded in a
+                single interpreter and forks it for every test case. Defaults to 'subprocess'.
+            resource_limits (dict, optional): The limits applied to each test case by the sandbox runner. Any of 'cpu_seconds', 'memory_mb',
+                'max_processes', and 'file_size_mb' can be given. CPU seconds are rounded up to a whole second, and max_processes counts
+                every process owned by the user, not only the test case's. Defaults to {}.
+            main_executable (str, optional): The path of the executable to run, relative to the program's base directory. If given,
+                it's used instead of searching the program for executables. Defaults to None.
+            main_class (str, optional): The fully qualified name of the java class to run, such as 'edu.wright.Main'. If given, the
+                class file is used instead of searching the program for executables. Defaults to None.
+            compile_timeout (float, optional): How many seconds compiling the program can take. Defaults to 60.
+            max_parallel_compiles (int, optional): The maximum number of jobs make or the C/C++ compiler runs at the same time. Defaults to None,
+                which uses the number of CPUs.
+            compiler_flags (list(str), optional): Extra flags passed to the C/C++ compiler. Defaults to [].
+            object_cache_directory (str, optional): The directory compiled C/C++ object files are cached in, which can be shared between
+                programs. Defaults to None, which disables the cache.
         """
         if not path.isdir(directory):
             raise ValueError(f'{directory} is not a directory')
 
+        for i in resource_limits:
+            if i not in Program._resource_limits:
+                raise ValueError(f'Unknown resource limit {i}, must be one of {", ".join(Program._resource_limits)}')
+
+        if runner == 'sandbox' and resource is None:
+            raise ValueError('The sandbox runner is only supported on POSIX systems')
+
+        if runner == 'forkserver' and not hasattr(os, 'fork'):
+            raise ValueError('The forkserver runner is only supported on POSIX systems')
+
         self.directory = directory
         self.language = language
 
@@ -97,8 +273,22 @@ class Program:
 
         self.skip_grading = False
 
+        self.runner = runner
+        self.resource_limits = resource_limits
+        self.main_executable = main_executable
+        self.main_class = main_class
+        self.compile_timeout = compile_timeout
+
+        self._native_builder = NativeBuilder(object_cache_directory, compile_timeout, max_parallel_compiles, compiler_flags)
+
         self._command = None
+        self._main_class = None
         self._args = args
+        self._jvm_runners = None
+        self._python_script = None
+        self._fork_server = None
+        self._spawn_server = None
+        self._source_contents = None
 
 
     def get_directory_listing(self, directory=None):
@@ -116,10 +306,11 @@ class Program:
             directory = self.directory
 
         # Iterate over every file and sub directory, adding each entry into the dictionary
-        for file in os.listdir(directory):
+        for file in sorted(os.listdir(directory)):
             new_path = os.path.join(directory, file)
             if os.path.isdir(new_path):
-                directory_dict[file] = self.get_directory_listing(new_path)
+                # Version control and editor directories are listed, but not walked
+                directory_dict[file] = self.get_directory_listing(new_path) if file not in Program._ignored_directories else {}
             else:
                 directory_dict[file] = None
                 
@@ -138,8 +329,10 @@ class Program:
 
         files = []
 
-        for dir_name, _, file_list in os.walk(self.directory):
-            for fname in file_list:
+        for dir_name, sub_directories, file_list in os.walk(self.directory):
+            sub_directories[:] = sorted(i for i in sub_directories if i not in Program._ignored_directories)
+
+            for fname in sorted(file_list):
                 file_extension = os.path.splitext(fname)[-1]
                 
                 # TODO Add makefiles in here probably
@@ -149,6 +342,58 @@ class Program:
         return files
 
 
+    def get_program_files(self):
+        """Finds every file that can change how the program builds or runs, which is every file in the project directory tree
+            besides the ignored directories and anything compiling creates, so the files are the same before and after compiling
+
+        Returns:
+            list: The paths of the files, in sorted order
+        """
+        files = []
+        bin_directory = path.join(self.directory, self.bin_dir)
+        native_output_path = self._get_native_output_path() if self.language in ['c', 'cpp', 'c++'] else None
+
+        for dir_name, sub_directories, file_list in os.walk(self.directory):
+            sub_directories[:] = sorted(i for i in sub_directories if i not in Program._ignored_directories)
+
+            # The bin directory only holds what compiling creates when the program has separate src and bin directories
+            if self.src_bin_present and dir_name == self.directory:
+                sub_directories.remove(self.bin_dir)
+
+            for fname in sorted(file_list):
+                file_path = path.join(dir_name, fname)
+
+                if file_path != native_output_path and not self._is_build_output(file_path):
+                    files.append(file_path)
+
+        return files
+
+
+    def get_source_contents(self):
+        """Reads all of the source files written for the program. The files are read the first time this is called and
+            the same contents are returned afterwards, so the result cache and the similarity report share a single scan
+            and files created while compiling don't change it
+
+        Returns:
+            dict: The contents of each source file as bytes, keyed by its path relative to the program directory, in sorted order
+        """
+        if self._source_contents is not None:
+            return self._source_contents
+
+        self._source_contents = {}
+        bin_directory = path.join(self.directory, self.bin_dir)
+
+        for file_path in sorted(self.get_source_files()):
+            # Scripts are copied into the bin directory when they're "compiled", so those copies are skipped
+            if self.src_bin_present and path.commonpath((bin_directory, file_path)) == bin_directory:
+                continue
+
+            with open(file_path, 'rb') as f:
+                self._source_contents[path.relpath(file_path, self.directory)] = f.read()
+
+        return self._source_contents
+
+
     def set_command(self, command):
         """Manually sets the command to be run while executing test cases
 
@@ -157,6 +402,7 @@ class Program:
         """
 
         self._command = command
+        self._main_class = None
 
 
     def set_main_executable(self, executable_path):
@@ -177,36 +423,53 @@ class Program:
             bool: True if the compilation was successful, false if an error was encountered.
         """
 
-        # Check to see if there's a makefile in the program root directory
-        if self._compile_make():
-            print('Compilation with makefile successful')
-            return True
-
-        elif self.src_bin_present and self._compile_make():
-            print('Compilation with makefile successful')
-            return True
+        with span('compile', directory=self.directory):
+            # Check to see if there's a makefile in the program root or source directory
+            if self._compile_make():
+                print('Compilation with makefile successful')
+                return True
 
-        print('Compilation with makefile failed, falling back to internal compilers')
+            print('Compilation with makefile failed, falling back to internal compilers')
 
-        if self.language == 'java':
-            return self._compile_java()
+            if self.language == 'java':
+                return self._compile_java()
 
-        elif self.language in ['c', 'cpp', 'c++']:
-            return self._compile_c()
+            elif self.language in ['c', 'cpp', 'c++']:
+                return self._compile_c()
 
-        else:
-            return self._compile_scripts()
+            else:
+                return self._compile_scripts()
 
 
-    def find_main_executable(self):
+    def find_main_executable(self, interactive=True):
         """Iterates over the project directory and finds any potential executable files.
             Once all possible executable files have been found, a list will be displayed to the,
             who will then select one
 
+        Args:
+            interactive (bool, optional): Whether the user can be prompted to pick between multiple executables.
+                If False, the first executable in sorted order is used. Defaults to True.
+
         Returns:
             bool: True if an executable was found
         """ 
 
+        # An executable named in the config is always used, so there's never a need to search or ask
+        if self.main_class is not None or self.main_executable is not None:
+            if self.main_class is not None:
+                executable_path = path.join(self.directory, self.bin_dir, *self.main_class.split('.')) + '.class'
+            else:
+                executable_path = path.join(self.directory, self.main_executable)
+
+            if not path.isfile(executable_path):
+                print(f'The configured executable {executable_path} does not exist')
+                return False
+
+            self._executable_path = executable_path
+            self.generate_command(executable_path)
+
+            return True
+
         potential_executables = []
 
         for dir_name, _, file_list in os.walk(path.join(self.directory, self.bin_dir)):
@@ -215,7 +478,11 @@ class Program:
                 if self._is_executable(file_path):
                     potential_executables.append(file_path)
 
-        if len(potential_executables) > 1:
+        if len(potential_executables) > 1 and not interactive:
+            self._executable_path = sorted(potential_executables)[0]
+            print(f'Multiple potential executable files were found, using {self._executable_path}')
+
+        elif len(potential_executables) > 1:
             print('Multiple potential executable files were found:')
             for i, executable_path in enumerate(potential_executables):
                 print(f'  ({i}): {executable_path}')
@@ -244,15 +511,20 @@ class Program:
         relative_path = path.relpath(executable_path, self.directory)
         class_path = path.relpath(executable_path, path.join(self.directory, self.bin_dir))
 
+        self._main_class = None
+        self._python_script = None
+
         if self.language == 'java':
             if executable_extension == '.jar':
                 self._command = ('java', '-jar', relative_path, *self._args)
 
             elif executable_extension == '.class':
                 self._command = ('java', '-cp', self.bin_dir, class_path[:-6], *self._args)
+                self._main_class = class_path[:-6].replace(os.sep, '.')
 
         elif self.language == 'python':
             self._command = ('python', relative_path, *self._args)
+            self._python_script = relative_path
 
         elif self.language in ['bash', 'shell']:
             self._command = ('bash', relative_path, *self._args)
@@ -261,49 +533,313 @@ class Program:
             self._command = (f'.{os.sep}{relative_path}', *self._args)
 
 
-    def run_tests(self, tests, description='Running Test Cases'):
+    @staticmethod
+    def check_performance_limits(tests, runner='subprocess'):
+        """Checks that a runner can measure the CPU time and memory usage of every test case that sets a limit on them. The jvm
+            runner runs test cases inside a JVM shared between them, and systems without fork have no spawn server to start
+            a process from, so neither can tell how much a single test case used
+
+        Args:
+            tests (list(TestCase)): The test cases to check
+            runner (str, optional): The runner the test cases will be run with. Defaults to 'subprocess'.
+
+        Raises:
+            ValueError: Raised if a test case sets a limit the runner can't measure
+        """
+        for test in tests:
+            limits = [i for i in ('max_cpu_seconds', 'max_rss_mb', 'relative_to_grader') if getattr(test, i) is not None]
+
+            if len(limits) == 0:
+                continue
+
+            if not hasattr(os, 'fork'):
+                raise ValueError(f'Test case "{test.description}" sets {", ".join(limits)}, but CPU time and memory usage can only be measured on POSIX systems')
+
+            # Test cases with their own command still get a process of their own under the jvm runner
+            if runner == 'jvm' and test.command is None and len(test.runner_args) == 0:
+                raise ValueError(f'Test case "{test.description}" sets {", ".join(limits)}, but the jvm runner can\'t measure CPU time or memory usage. '
+                                 f'Use the subprocess or sandbox runner instead')
+
+
+    def run_tests(self, tests, description='Running Test Cases', max_parallel_tests=1, show_progress=True):
         """Runs a series of test cases on the program by starting a subprocess and piping
             the specified strings into the standard input of that subprocess.
 
         Args:
             tests (list(TestCase)): A list of strings. Each string will be used as the standard input for a test case
+            description (str, optional): The description displayed on the progress bar. Defaults to 'Running Test Cases'.
+            max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+            show_progress (bool, optional): Whether or not to display a progress bar. Defaults to True.
+
+        Returns:
+            list(TestResult): The results of the test cases, in the same order as the test cases were given
         """
 
-        self._results = []
+        self._results = [None] * len(tests)
+        self._jvm_runners = queue.Queue()
 
-        for test in tqdm(tests, desc=description):
-            command = self._command if test.command is None else test.command
-            
-            program_pipe = subprocess.Popen((*test.runner_args, *command, *test.args), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=self.directory)
-            program_pipe.stdin.write(test.stdin.encode('utf-8'))
-            program_pipe.stdin.close()
+        if self.runner == 'forkserver' and self._python_script is not None:
+            self._fork_server = ForkServerRunner(self.directory, self._python_script)
 
-            timeout = False
+        # The server isn't started until a test needs a process of its own, so the jvm and fork server runners usually never start it
+        if hasattr(os, 'fork'):
+            self._spawn_server = SpawnServerRunner(self.directory)
 
-            try:
-                program_pipe.wait(test.timeout)
-            except subprocess.TimeoutExpired:
-                program_pipe.terminate()
-                timeout = True
+        with tqdm(total=len(tests), desc=description, disable=not show_progress) as progress_bar:
+            if max_parallel_tests <= 1:
+                for i, test in enumerate(tests):
+                    self._results[i] = self._run_test(test)
+                    progress_bar.update()
+
+            else:
+                # Each test case spends almost all of its time waiting on its own subprocess, so threads
+                #   are enough to keep several of them running at once
+                with ThreadPoolExecutor(max_workers=max_parallel_tests) as executor:
+                    futures = {executor.submit(self._run_test, test): i for i, test in enumerate(tests)}
+
+                    for future in as_completed(futures):
+                        self._results[futures[future]] = future.result()
+                        progress_bar.update()
 
-            test_output = program_pipe.stdout.read().decode('utf-8')
-            test_errors = program_pipe.stderr.read().decode('utf-8')
+        while not self._jvm_runners.empty():
+            self._jvm_runners.get().close()
 
-            exit_code = program_pipe.returncode
-            self._results.append(TestResult(test, test_output, test_errors, exit_code, timeout))
+        self._jvm_runners = None
+
+        for server in (self._fork_server, self._spawn_server):
+            if server is not None:
+                server.close()
+
+        self._fork_server = None
+        self._spawn_server = None
 
         return self._results
 
 
+    def _run_test(self, test):
+        """Runs a single test case as many times as it asks to be repeated. The output of the first run is used,
+            and the CPU time and memory usage are the medians over every run, which smooths out noise from
+            anything else running on the machine
+
+        Args:
+            test (TestCase): The test case to run
+
+        Returns:
+            TestResult: The results of the test case
+        """
+        results = [self._run_test_once(test) for _ in range(max(test.repeat, 1))]
+        result = results[0]
+
+        for name in ('user_time', 'system_time', 'peak_rss_kb'):
+            measurements = [getattr(i, name) for i in results if getattr(i, name) is not None]
+            setattr(result, name, median(measurements) if measurements else None)
+
+        return result
+
+
+    def _run_test_once(self, test):
+        """Runs a single test case using the program's runner
+
+        Args:
+            test (TestCase): The test case to run
+
+        Returns:
+            TestResult: The results of the test case
+        """
+
+        # The warm JVM and the fork server can only stand in for the plain java and python commands, so custom commands still get their own process
+        with span('run_test', directory=self.directory, test=test.description):
+            if self.runner == 'jvm' and self._main_class is not None and test.command is None and len(test.runner_args) == 0:
+                return self._run_test_jvm(test)
+
+            if self._fork_server is not None and test.command is None and len(test.runner_args) == 0:
+                return self._run_test_fork_server(test)
+
+            return self._run_test_subprocess(test)
+
+
+    def _run_test_jvm(self, test):
+        """Runs a single test case in one of the program's warm JVMs. A JVM can only run one test case at
+            a time, so a new one is started whenever all of the existing ones are busy
+
+        Args:
+            test (TestCase): The test case to run
+
+        Returns:
+            TestResult: The results of the test case
+        """
+
+        try:
+            jvm_runner = self._jvm_runners.get_nowait()
+        except queue.Empty:
+            jvm_runner = JvmRunner(self.directory, self.bin_dir if self.bin_dir else '.')
+
+        try:
+            return TestResult(test, *jvm_runner.run(test, self._main_class, self._args))
+        finally:
+            self._jvm_runners.put(jvm_runner)
+
+
+    def _run_test_fork_server(self, test):
+        """Runs a single test case in a process forked from the program's fork server, killing it and anything it started if
+            it exceeds the test's timeout
+
+        Args:
+            test (TestCase): The test case to run
+
+        Returns:
+            TestResult: The results of the test case
+        """
+
+        process = self._fork_server.start((*self._args, *test.args))
+
+        return self._finish_test(test, process, process, True)
+
+
+    def _run_test_subprocess(self, test):
+        """Runs a single test case in a new process, killing it if it exceeds the test's timeout. The process is started from
+            the spawn server where there is one, so that its memory usage is measured apart from the autograder's
+
+        Args:
+            test (TestCase): The test case to run
+
+        Returns:
+            TestResult: The results of the test case
+        """
+
+        command = (*test.runner_args, *(self._command if test.command is None else test.command), *test.args)
+        sandbox = self.runner == 'sandbox'
+
+        if self._spawn_server is None:
+            program_pipe = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=self.directory)
+            return self._finish_test(test, program_pipe, _ProcessWaiter(program_pipe), False)
+
+        # A sandboxed program gets its own session, and so its own process group, so that any processes it starts can be killed with it
+        process = self._spawn_server.start(command, sandbox, self._get_resource_limits() if sandbox else ())
+
+        return self._finish_test(test, process, process, sandbox)
+
+
+    def _finish_test(self, test, program_pipe, process_waiter, process_group):
+        """Feeds a running test case its input and collects its output, stopping it if it exceeds the test's timeout
+
+        Args:
+            test (TestCase): The test case being run
+            program_pipe (subprocess.Popen or ForkedProcess): The running program
+            process_waiter (_ProcessWaiter or ForkedProcess): Waits for the program to exit and measures its resource usage
+            process_group (bool): Whether the program leads its own process group, which is stopped along with it. The server that
+                started the program kills everything left in the group once the program exits
+
+        Returns:
+            TestResult: The results of the test case
+        """
+
+        # Output is drained while the program runs, and stdin is fed from its own thread since
+        #   the program may start writing before it has read all of its input
+        stdout_capture = _OutputCapture(program_pipe.stdout, test.max_output_bytes)
+        stderr_capture = _OutputCapture(program_pipe.stderr, test.max_output_bytes)
+        stdin_writer = threading.Thread(target=self._write_stdin, args=(program_pipe.stdin, test.stdin), daemon=True)
+        stdin_writer.start()
+
+        timeout = False
+
+        if not process_waiter.wait(test.timeout):
+            self._stop_process(program_pipe, False, process_group)
+
+            if not process_waiter.wait(Program._kill_grace_period):
+                self._stop_process(program_pipe, True, process_group)
+                process_waiter.wait()
+
+            timeout = True
+
+        test_output = stdout_capture.get_text()
+        test_errors = stderr_capture.get_text()
+        stdin_writer.join()
+
+        exit_code = program_pipe.returncode
+        output_truncated = stdout_capture.truncated or stderr_capture.truncated
+
+        return TestResult(test, test_output, test_errors, exit_code, timeout, output_truncated, process_waiter.user_time, process_waiter.system_time, process_waiter.peak_rss_kb)
+
+
+    def _get_resource_limits(self):
+        """Gets the resource limits the spawn server sets for a sandboxed program
+
+        Returns:
+            list(tuple): The name, soft limit, and hard limit of each of the program's resource limits
+        """
+        limits = []
+
+        for name, value in self.resource_limits.items():
+            limit_name, unit = Program._resource_limits[name]
+
+            # Limits are whole numbers, and rounding down would turn a limit like half a CPU second into zero
+            limit = max(math.ceil(value * unit), 1)
+
+            # Going over the soft CPU limit sends SIGXCPU, the hard limit one second later kills the program outright
+            hard_limit = limit + 1 if name == 'cpu_seconds' else limit
+            limits.append((limit_name, limit, hard_limit))
+
+        return limits
+
+
+    @staticmethod
+    def _stop_process(process, force=False, process_group=False):
+        """Asks a process, or every process in its process group, to stop
+
+        Args:
+            process (subprocess.Popen or ForkedProcess): The process to stop
+            force (bool, optional): Whether to kill the process instead of asking it to terminate. Defaults to False.
+            process_group (bool, optional): Whether to stop the whole process group the process leads. Defaults to False.
+        """
+
+        # The server that started the process is the one that reaps it, so it's the only one that knows the pid is still the process's
+        if isinstance(process, ForkedProcess):
+            process.send_signal(signal.SIGKILL if force else signal.SIGTERM, process_group)
+            return
+
+        try:
+            if force:
+                process.kill()
+            else:
+                process.terminate()
+        except (ProcessLookupError, PermissionError):
+            # The process already exited
+            pass
+
+
+    @staticmethod
+    def _write_stdin(stdin, text):
+        """Writes a test case's input to a program and closes its standard input
+
+        Args:
+            stdin (file): The standard input pipe of the program
+            text (str): The text to write
+        """
+        try:
+            stdin.write(text.encode('utf-8'))
+            stdin.close()
+        except (BrokenPipeError, OSError):
+            # The program exited or closed its input without reading everything, which isn't an error here
+            pass
+
+
     def _compile_c(self):
-        """Yeah no,
+        """Internal function to compile a C or C++ project without a makefile. Every source file is compiled into the bin directory,
+            or the configured main executable, as a single program
 
         Returns:
-            bool: false
+            bool: True if the program compiled and linked successfully, false otherwise
         """
 
-        # TODO Somehow add support for compiling c/c++ code automatically...
-        return False
+        print("Compiling C/C++ project...")
+
+        return self._native_builder.build(sorted(self.get_source_files()), self._get_native_output_path())
+
+
+    def _get_native_output_path(self):
+        # C and C++ programs without a makefile are linked into the configured main executable, or bin/main
+        return path.join(self.directory, self.main_executable if self.main_executable is not None else path.join(self.bin_dir, 'main'))
 
 
     def _compile_java(self):
@@ -320,13 +856,49 @@ class Program:
 
         javac = ('javac', '-cp', source_directory, '-d', target_directory)
 
-        # Compile all java files found
+        source_files = []
+
         for dir_name, _, file_list in os.walk(source_directory):
             for fname in file_list:
                 if path.splitext(fname)[-1].lower() == '.java':
-                    result = subprocess.run((*javac, path.join(dir_name, fname)))
-                    if result.returncode != 0:
-                        return False
+                    source_files.append(path.join(dir_name, fname))
+
+        if len(source_files) == 0:
+            return True
+
+        # Compile all java files found with a single javac, so the JVM only has to start up once. Long lists
+        #   of files are passed through an argument file to stay under the command line length limit
+        if len(source_files) > Program._javac_argfile_threshold:
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as argfile:
+                argfile.write('\n'.join('"' + i.replace('\\', '\\\\') + '"' for i in source_files))
+
+            try:
+                with span('javac'):
+                    result = run_build_command((*javac, f'@{argfile.name}'), self.directory, self.compile_timeout)
+            finally:
+                os.remove(argfile.name)
+
+        else:
+            with span('javac'):
+                result = run_build_command((*javac, *source_files), self.directory, self.compile_timeout)
+
+        if result is None:
+            print(f'Compilation timed out after {self.compile_timeout} seconds')
+            return False
+
+        print(result.stdout, end='')
+        print(result.stderr, end='')
+
+        if result.returncode != 0:
+            # javac reports every error as "path:line: error: message", so the errors can be tallied by file
+            error_counts = {}
+            for match in re.finditer(r'^(.+\.java):\d+: error:', result.stderr + result.stdout, re.MULTILINE):
+                error_counts[match.group(1)] = error_counts.get(match.group(1), 0) + 1
+
+            for file_name, count in error_counts.items():
+                print(f'{count} compilation error{"s" if count != 1 else ""} in {file_name}')
+
+            return False
 
         return True
 
@@ -339,15 +911,19 @@ class Program:
         """
 
         source_directory = path.join(self.directory, self.src_dir)
+        make = ('make', f'-j{self._native_builder.max_parallel_compiles}')
 
-        if 'makefile' in (i.lower() for i in os.listdir(self.directory)):
-            result = subprocess.run('make', capture_output=True, cwd=self.directory)
-            if result.returncode == 0:
-                return True
+        # Without a src directory the source directory is the base directory with a trailing separator, so make is only run there once
+        for directory in dict.fromkeys(path.normpath(i) for i in (self.directory, source_directory)):
+            if 'makefile' not in (i.lower() for i in os.listdir(directory)):
+                continue
 
-        if source_directory != self.directory and 'makefile' in (i.lower() for i in os.listdir(source_directory)):
-            result = subprocess.run('make', capture_output=True, cwd=source_directory)
-            if result.returncode == 0:
+            with span('make'):
+                result = run_build_command(make, directory, self.compile_timeout)
+
+            if result is None:
+                print(f'make timed out after {self.compile_timeout} seconds')
+            elif result.returncode == 0:
                 return True
 
         return False
@@ -377,6 +953,26 @@ class Program:
         return True
 
 
+    def _is_build_output(self, file_path):
+        """Checks if a file is something compiling creates, such as a class file, an object file, or a native executable
+
+        Args:
+            file_path (str): The path of the file to check
+
+        Returns:
+            bool: True if the file was most likely created by compiling
+        """
+
+        if path.splitext(file_path)[-1].lower() in Program._build_output_extensions:
+            return True
+
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read(4).startswith(Program._native_executable_magic)
+        except OSError:
+            return False
+
+
     def _is_executable(self, file_name):
         """Checks if a file is executable or can be executed by the interpreter for the program's selected language
 
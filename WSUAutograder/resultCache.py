@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from os import path
+
+
+class ResultCache:
+    """An on-disk cache of test results. Results are keyed by a hash of the program's files and the
+        test case that produced them, so a program only has to be compiled and run again when its files
+        or the test case actually changes
+    """
+
+    # Bump this whenever the fields stored on TestResult change, so results pickled by older versions are ignored
+    _format_version = 3
+
+    # The test case fields that change what running a program does or how much of its output is kept. The rest only change
+    #   how the results are graded
+    _execution_fields = ('stdin', 'args', 'runner_args', 'command', 'timeout', 'max_output_bytes')
+
+    _chunk_size = 65536
+
+
+    def __init__(self, directory, max_size_mb=512, run_settings={}):
+        """Creates a new result cache, creating the cache directory if it doesn't exist
+
+        Args:
+            directory (str): The directory the cached results are stored in
+            max_size_mb (float, optional): The size the cache is trimmed down to when evict is called. Defaults to 512.
+            run_settings (dict, optional): Any settings that affect the results of running a program, such as the language
+                or runner. Results are only reused when these are the same. Defaults to {}.
+        """
+        self.directory = directory
+        self.max_size_mb = max_size_mb
+
+        self._program_hashes = {}
+
+        self._settings_hash = hashlib.sha256(json.dumps([ResultCache._format_version, run_settings], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        os.makedirs(directory, exist_ok=True)
+
+
+    def get_program_hash(self, program):
+        """Hashes all of the files of a program, along with their paths relative to the program directory. Data files and
+            makefiles can change the results as much as the sources, so everything but what compiling creates is hashed,
+            which keeps the hash the same before and after the program is compiled. The hash is computed the first time
+            it's requested for a program and reused afterwards
+
+        Args:
+            program (Program): The program to hash
+
+        Returns:
+            str: The hex digest of the program's files
+        """
+        if program.directory in self._program_hashes:
+            return self._program_hashes[program.directory]
+
+        program_hash = hashlib.sha256(self._settings_hash.encode('utf-8'))
+
+        for file_path in program.get_program_files():
+            file_hash = hashlib.sha256()
+
+            # Files are hashed a chunk at a time, since data files can be much larger than sources
+            try:
+                with open(file_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(ResultCache._chunk_size), b''):
+                        file_hash.update(chunk)
+            except OSError:
+                # Broken links and unreadable files are still part of the key, just without their contents
+                pass
+
+            program_hash.update(path.relpath(file_path, program.directory).encode('utf-8') + b'\0')
+            program_hash.update(file_hash.digest())
+
+        self._program_hashes[program.directory] = program_hash.hexdigest()
+
+        return self._program_hashes[program.directory]
+
+
+    def get_test_key(self, program_hash, test):
+        """Gets the cache key for the results of running a test case on a program
+
+        Args:
+            program_hash (str): The hash of the program's files, from get_program_hash
+            test (TestCase): The test case
+
+        Returns:
+            str: The cache key
+        """
+        test_json = json.dumps({i: getattr(test, i) for i in ResultCache._execution_fields}, sort_keys=True, default=str)
+        return hashlib.sha256(f'{program_hash}\0{test_json}'.encode('utf-8')).hexdigest()
+
+
+    def load(self, key, test):
+        """Loads a cached test result
+
+        Args:
+            key (str): The cache key of the result
+            test (TestCase): The test case the result is for
+
+        Returns:
+            TestResult: The cached result, or None if it isn't in the cache
+        """
+        result_path = self._get_path(key)
+
+        try:
+            with open(result_path, 'rb') as f:
+                result = pickle.load(f)
+
+            # Touch the file so eviction removes the least recently used results first
+            os.utime(result_path)
+
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+        result.test_case = test
+
+        return result
+
+
+    def load_results(self, program, tests):
+        """Loads the cached results of every test case for a program
+
+        Args:
+            program (Program): The program the test cases were run on
+            tests (list(TestCase)): The test cases
+
+        Returns:
+            list(TestResult): The results for each test case, with None for every test case that isn't cached
+        """
+        program_hash = self.get_program_hash(program)
+        return [self.load(self.get_test_key(program_hash, test), test) for test in tests]
+
+
+    def store(self, key, result):
+        """Stores a test result in the cache
+
+        Args:
+            key (str): The cache key of the result
+            result (TestResult): The result to store
+        """
+        result_path = self._get_path(key)
+        os.makedirs(path.dirname(result_path), exist_ok=True)
+
+        # Write to a temporary file first so that other processes never read a partially written result
+        file_descriptor, temp_path = tempfile.mkstemp(dir=path.dirname(result_path))
+        with os.fdopen(file_descriptor, 'wb') as f:
+            pickle.dump(result, f)
+
+        os.replace(temp_path, result_path)
+
+
+    def store_results(self, program, results):
+        """Stores the results of running a set of test cases on a program. Results that timed out are skipped, since a
+            timeout can come from the machine being busy rather than the program, so those test cases are run again next time
+
+        Args:
+            program (Program): The program the test cases were run on
+            results (list(TestResult)): The results to store
+        """
+        program_hash = self.get_program_hash(program)
+
+        for result in results:
+            if result.timeout:
+                continue
+
+            self.store(self.get_test_key(program_hash, result.test_case), result)
+
+
+    def evict(self):
+        """Deletes the least recently used results until the cache is smaller than its maximum size
+
+        Returns:
+            int: The number of results that were deleted
+        """
+        entries = []
+
+        for dir_name, _, file_list in os.walk(self.directory):
+            for fname in file_list:
+                file_path = path.join(dir_name, fname)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file_path))
+
+        total_size = sum(i[1] for i in entries)
+        max_size = self.max_size_mb * 1024 * 1024
+        evicted = 0
+
+        for _, size, file_path in sorted(entries):
+            if total_size <= max_size:
+                break
+
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+
+            total_size -= size
+            evicted += 1
+
+        return evicted
+
+
+    def _get_path(self, key):
+        return path.join(self.directory, key[:2], key[2:])
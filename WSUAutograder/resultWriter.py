@@ -0,0 +1,120 @@
+import csv
+import json
+from os import path
+
+
+class ResultWriter:
+    """Writes the grades of each student to a JSON Lines or CSV file as soon as they're graded, so the results of
+        a long grading run can be read by other programs, and aren't lost if the run is stopped partway through
+    """
+
+    _formats = ('jsonl', 'csv')
+
+    _csv_columns = ['student', 'status', 'overall_grade', 'test', 'description', 'grade', 'passed', 'total_penalty', 'penalties', 'feedback',
+                    'exit_code', 'timeout', 'cpu_time', 'peak_rss_kb']
+
+
+    def __init__(self, file_path, output_format=None):
+        """Creates a new result writer, overwriting the file if it already exists
+
+        Args:
+            file_path (str): The path of the file to write to
+            output_format (str, optional): Either 'jsonl' or 'csv'. Defaults to None, which picks the format from the file extension.
+
+        Raises:
+            ValueError: Raised if the format isn't supported
+        """
+        if output_format is None:
+            output_format = path.splitext(file_path)[1][1:].lower()
+
+        if output_format not in ResultWriter._formats:
+            raise ValueError(f'Unsupported result format {output_format}, must be one of {", ".join(ResultWriter._formats)}')
+
+        self.file_path = file_path
+        self.output_format = output_format
+
+        self._file = open(file_path, 'w', newline='' if output_format == 'csv' else None, encoding='utf-8')
+        self._csv_writer = None
+
+        if output_format == 'csv':
+            self._csv_writer = csv.DictWriter(self._file, ResultWriter._csv_columns)
+            self._csv_writer.writeheader()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_):
+        self.close()
+
+
+    @staticmethod
+    def get_student_record(student_name, sg, status='graded'):
+        """Builds a dictionary containing everything known about how a student did
+
+        Args:
+            student_name (str): The name of the student
+            sg (SmartGrader): The student's analyzed SmartGrader, or None if they weren't graded
+            status (str, optional): Whether the student was 'graded', 'skipped', or 'failed' to compile or run. Defaults to 'graded'.
+
+        Returns:
+            dict: The student's record, with the details of each test case in the 'tests' list
+        """
+        record = {'student': student_name, 'status': status, 'overall_grade': None, 'tests': []}
+
+        if sg is None:
+            return record
+
+        record['overall_grade'] = sg.get_overall_grade()
+
+        for i, result in enumerate(sg.student_results):
+            details = sg.get_test_details(i)
+
+            record['tests'].append({
+                'test': i,
+                'description': result.test_case.description,
+                'grade': details.grade,
+                'passed': details.grade >= sg.pass_threshold,
+                'total_penalty': details.total_penalty,
+                'penalties': details.penalties,
+                'feedback': details.feedback,
+                'exit_code': result.exit_code,
+                'timeout': result.timeout,
+                'cpu_time': result.user_time + result.system_time if result.user_time is not None else None,
+                'peak_rss_kb': result.peak_rss_kb,
+            })
+
+        return record
+
+
+    def write(self, student_name, sg, status='graded'):
+        """Writes the results of a single student and flushes them to disk
+
+        Args:
+            student_name (str): The name of the student
+            sg (SmartGrader): The student's analyzed SmartGrader, or None if they weren't graded
+            status (str, optional): Whether the student was 'graded', 'skipped', or 'failed' to compile or run. Defaults to 'graded'.
+        """
+        record = self.get_student_record(student_name, sg, status)
+
+        if self.output_format == 'jsonl':
+            self._file.write(json.dumps(record) + '\n')
+
+        else:
+            student_columns = {'student': student_name, 'status': status, 'overall_grade': record['overall_grade']}
+
+            # Students without any test results still get a row, so that every student shows up in the file
+            if len(record['tests']) == 0:
+                self._csv_writer.writerow(student_columns)
+
+            for test in record['tests']:
+                self._csv_writer.writerow({**student_columns, **test, 'penalties': json.dumps(test['penalties']), 'feedback': '\n'.join(test['feedback'])})
+
+        self._file.flush()
+
+
+    def close(self):
+        """Closes the output file
+        """
+        self._file.close()
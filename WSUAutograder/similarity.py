@@ -0,0 +1,234 @@
+import csv
+import keyword
+import random
+import re
+import zlib
+from collections import Counter, defaultdict
+from os import path
+
+
+def _compile_token_pattern(comment_pattern):
+    # The graded languages share their strings, numbers, and names closely enough for one pattern to cover all of them,
+    #   and only differ in how they write comments
+    return re.compile(r'''
+        (?P<comment>''' + comment_pattern + r''')
+        |(?P<string>"""(?:\\.|.)*?"""|\'\'\'(?:\\.|.)*?\'\'\'|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+        |(?P<number>\.?\d[\w.]*)
+        |(?P<name>[^\W\d]\w*)
+        |(?P<other>\S)
+    ''', re.VERBOSE | re.DOTALL)
+
+
+# Java and the C family have // and /* */ comments. C preprocessor lines are dropped along with them, since they're
+#   mostly includes. Python and shell scripts only have # comments, and // is floor division in Python
+_c_token_pattern = _compile_token_pattern(r'\#[^\n]*|//[^\n]*|/\*.*?\*/')
+_script_token_pattern = _compile_token_pattern(r'\#[^\n]*')
+_script_extensions = frozenset(['.py', '.sh', '.bash'])
+
+# Keywords are kept as they are, since they give the program its structure, but every other name is collapsed into
+#   one token, as are strings and numbers, so renaming variables or changing messages doesn't hide copied code
+_keywords = frozenset(keyword.kwlist) | frozenset('''
+    auto bool boolean break byte case catch char class const continue default delete do double else enum extends
+    extern final finally float for goto if implements import int interface long namespace new private
+    protected public return short signed sizeof static struct super switch template this throw throws try typedef
+    union unsigned using virtual void volatile while
+'''.split())
+
+_normalized_tokens = {'string': 'S', 'number': '0', 'name': 'N'}
+
+
+def normalize_tokens(source, file_name=''):
+    """Splits source code into a list of tokens that don't depend on formatting, comments, or names
+
+    Args:
+        source (str): The source code
+        file_name (str, optional): The name of the source file, whose extension decides which comments are dropped. Defaults to '',
+            which drops Java and C comments.
+
+    Returns:
+        list(str): The normalized tokens
+    """
+    tokens = []
+    token_pattern = _script_token_pattern if path.splitext(file_name)[1].lower() in _script_extensions else _c_token_pattern
+
+    for match in token_pattern.finditer(source):
+        kind = match.lastgroup
+
+        if kind == 'other':
+            tokens.append(match.group())
+        elif kind == 'name' and match.group() in _keywords:
+            tokens.append(match.group())
+        elif kind != 'comment':
+            tokens.append(_normalized_tokens[kind])
+
+    return tokens
+
+
+def fingerprint_sources(sources, k=5, window=8):
+    """Fingerprints a program's sources by winnowing the hashes of every k tokens in a row. Any run of at least
+        k + window - 1 tokens that two programs share is guaranteed to give them a shared fingerprint
+
+    Args:
+        sources (dict): The contents of each source file as bytes, like Program.get_source_contents returns
+        k (int, optional): The number of tokens hashed together. Defaults to 5.
+        window (int, optional): The number of hashes the smallest one is picked from. Defaults to 8.
+
+    Returns:
+        frozenset(int): The program's fingerprints
+    """
+    fingerprints = set()
+
+    for file_name, contents in sources.items():
+        tokens = normalize_tokens(contents.decode('utf-8', errors='replace'), file_name)
+
+        # crc32 is used rather than hash so fingerprints match between processes
+        hashes = [zlib.crc32('\0'.join(tokens[i:i + k]).encode('utf-8')) for i in range(len(tokens) - k + 1)]
+
+        if 0 < len(hashes) <= window:
+            fingerprints.add(min(hashes))
+
+        for i in range(len(hashes) - window + 1):
+            fingerprints.add(min(hashes[i:i + window]))
+
+    return frozenset(fingerprints)
+
+
+
+class SimilarityIndex:
+    """Finds pairs of students whose sources are suspiciously similar. Each student's fingerprints are summarized with
+        a MinHash signature, and only students whose signatures match on every row of at least one band are compared,
+        so a whole class is checked without comparing every pair of students
+    """
+
+    def __init__(self, ignored_fingerprints=frozenset(), max_common_fraction=0.5, min_fingerprints=10, bands=25, rows=4, seed=0):
+        """Creates an empty similarity index
+
+        Args:
+            ignored_fingerprints (frozenset(int), optional): Fingerprints of code every student was given, like the grader's
+                sources, which are never counted as similar. Defaults to frozenset().
+            max_common_fraction (float, optional): Fingerprints shared by more than this fraction of students are treated as
+                starter code and ignored. Defaults to 0.5.
+            min_fingerprints (int, optional): Students with fewer fingerprints left after ignoring shared code are skipped,
+                since there's too little to compare. Defaults to 10.
+            bands (int, optional): The number of LSH bands. More bands find less similar pairs, but compare more students.
+                Defaults to 25.
+            rows (int, optional): The number of MinHash values in each band. Defaults to 4.
+            seed (int, optional): Seeds the MinHash function so reports are reproducible. Defaults to 0.
+        """
+        self.ignored_fingerprints = ignored_fingerprints
+        self.max_common_fraction = max_common_fraction
+        self.min_fingerprints = min_fingerprints
+        self.bands = bands
+        self.rows = rows
+
+        self._fingerprints = {}
+
+        # The MinHash function is a random (a * x + b) mod p, with p a prime larger than every crc32
+        rng = random.Random(seed)
+        self._prime = (1 << 61) - 1
+        self._hash_function = (rng.randrange(1, self._prime), rng.randrange(self._prime))
+
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+
+    def add(self, name, fingerprints):
+        """Adds a student to the index
+
+        Args:
+            name (str): The student's name
+            fingerprints (frozenset(int)): The student's fingerprints, from fingerprint_sources
+        """
+        self._fingerprints[name] = fingerprints
+
+
+    def _get_signature(self, fingerprints):
+        # Each fingerprint is hashed once and only counts towards the minimum of one row, picked by its hash, rather than
+        #   hashing it again for every row. Rows no fingerprint landed in borrow the minimum of the next row that has one
+        a, b = self._hash_function
+        size = self.bands * self.rows
+        signature = [None] * size
+
+        for i in fingerprints:
+            row, value = divmod((a * i + b) % self._prime, size)[::-1]
+
+            if signature[row] is None or value < signature[row]:
+                signature[row] = value
+
+        for row in range(size):
+            offset = 1
+            while signature[row] is None:
+                borrowed = signature[(row + offset) % size]
+                # The offset is kept so a borrowed minimum never matches a minimum that wasn't borrowed
+                if borrowed is not None and not isinstance(borrowed, tuple):
+                    signature[row] = (borrowed, offset)
+                offset += 1
+
+        return signature
+
+
+    def find_similar_pairs(self, threshold=0.5):
+        """Finds every pair of students whose fingerprints are at least threshold similar
+
+        Args:
+            threshold (float, optional): The smallest Jaccard similarity reported. Defaults to 0.5.
+
+        Returns:
+            list(tuple): The name of each student in the pair, their similarity, and the number of fingerprints they share,
+                from most to least similar
+        """
+        document_frequency = Counter(i for fingerprints in self._fingerprints.values() for i in fingerprints)
+        max_frequency = max(2, self.max_common_fraction * len(self._fingerprints))
+        common = {i for i, count in document_frequency.items() if count > max_frequency}
+
+        fingerprints = {}
+        for name, student_fingerprints in self._fingerprints.items():
+            student_fingerprints = student_fingerprints - self.ignored_fingerprints - common
+
+            if len(student_fingerprints) >= self.min_fingerprints:
+                fingerprints[name] = student_fingerprints
+
+        # Students whose signatures match on every row of any band are candidates
+        buckets = defaultdict(list)
+
+        for name, student_fingerprints in fingerprints.items():
+            signature = self._get_signature(student_fingerprints)
+
+            for band in range(self.bands):
+                buckets[band, tuple(signature[band * self.rows:(band + 1) * self.rows])].append(name)
+
+        candidates = set()
+        for names in buckets.values():
+            for i, first in enumerate(names):
+                for second in names[i + 1:]:
+                    candidates.add((first, second))
+
+        # Candidates are checked against their exact similarity, since MinHash only estimates it
+        pairs = []
+        for first, second in candidates:
+            shared = len(fingerprints[first] & fingerprints[second])
+            similarity = shared / (len(fingerprints[first]) + len(fingerprints[second]) - shared)
+
+            if similarity >= threshold:
+                pairs.append((first, second, similarity, shared))
+
+        pairs.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+        return pairs
+
+
+
+def write_similarity_report(pairs, file_path):
+    """Writes similar pairs of students to a CSV file
+
+    Args:
+        pairs (list(tuple)): The similar pairs, from SimilarityIndex.find_similar_pairs
+        file_path (str): The path of the CSV file
+    """
+    with open(file_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['student_a', 'student_b', 'similarity', 'shared_fingerprints'])
+
+        for first, second, similarity, shared in pairs:
+            writer.writerow([first, second, f'{similarity:.3f}', shared])
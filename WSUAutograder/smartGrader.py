@@ -1,29 +1,27 @@
 #!/usr/bin/env python
 
 # A quick start at a smart grading program
+import hashlib
+import json
 import re as re
 from difflib import ndiff
 from enum import Enum
 from math import cosh, exp, log
 
-from lark import Lark
+from .myersDiff import myers_diff
+from .profiler import span
 
 # from WSUAutograder import TestCase, TestResult
 
-TOKEN_GRAMMER = '''
-start: (float | int | word | space)*
-
-INTEGER: "0".."9"+
-SPACE: /[\s]+/
-SIGN: "-" | "+"
-DOT: "."
-WORD: /[^\s\d\.+-]/+
-
-int.2: SIGN? INTEGER
-float.3: SIGN? INTEGER? DOT INTEGER
-word: WORD | SIGN DOT? | DOT
-space: SPACE
-'''
+# Splits output into words, integers, floats, and whitespace. The float and integer alternatives come first so that
+#   signs and dots attach to the digits following them, and a sign or dot that isn't part of a number becomes a word
+#   on its own. Only ASCII digits are numeric; any other digit characters are treated as part of a word
+TOKEN_PATTERN = re.compile(r'''
+    (?P<floating>[-+]?[0-9]*\.[0-9]+)
+    | (?P<integer>[-+]?[0-9]+)
+    | (?P<word>[-+]\.?|\.|[^\s0-9.+-]+)
+    | (?P<whitespace>\s+)
+''', re.VERBOSE)
 
 
 class TokenType(Enum):
@@ -48,6 +46,8 @@ class TokenType(Enum):
             return TokenType.word
 
 class Token:
+    __slots__ = ('value', 'start', 'end', 'token_type')
+
     def __init__(self, value, start, end, token_type=TokenType.word):
         self.value = value
         self.start = start
@@ -60,6 +60,15 @@ class Token:
         self.end += delta
         return self
 
+    def get_key(self):
+        """Gets a tuple that orders tokens by position and then by value. Numbers and strings are never
+            compared directly, since numeric values sort before string values at the same position
+
+        Returns:
+            tuple: The sort key of the token
+        """
+        return (self.start, self.end, isinstance(self.value, str), self.value)
+
     def __str__(self):
         return f'{self.value}'
 
@@ -67,31 +76,76 @@ class Token:
         return (self.value, self.start, self.end).__hash__()
 
     def __eq__(self, other):
-        return self.__cmp__(other) == 0
+        return self.get_key() == other.get_key()
 
     def __gt__(self, other):
-        return self.__cmp__(other) > 0
+        return self.get_key() > other.get_key()
 
     def __lt__(self, other):
-        return self.__cmp__(other) < 0
+        return self.get_key() < other.get_key()
 
     def __ne__(self, other):
-        return self.__cmp__(other) != 0
-
-    def __cmp__(self, other):
-        if self.start < other.start:
-            return -1
-        if self.start > other.start:
-            return 1
-        if self.end < other.end:
-            return -1
-        if self.end > other.end:
-            return 1
-        if self.value < other.value:
-            return -1
-        if self.value > other.value:
-            return 1
-        return 0
+        return self.get_key() != other.get_key()
+
+
+class TestGrade:
+    """Data class that stores the grade a student received for a single test case
+    """
+
+    def __init__(self, grade, total_penalty=0, penalties={}, feedback=[]):
+        """Creates a new test case grade
+
+        Arguments:
+            grade {float} -- The grade out of 100 received for the test case
+            total_penalty {float} -- The total penalty accumulated for the test case (default: {0})
+            penalties {dict} -- The accumulated penalty for each type of penalty that was applied (default: {{}})
+            feedback {list} -- A sorted list of feedback strings on what the student got wrong (default: {[]})
+        """
+        self.grade = grade
+        self.total_penalty = total_penalty
+        self.penalties = penalties
+        self.feedback = feedback
+
+
+class GraderProfile:
+    """Stores the token vectors for the grader outputs so that they only need to be computed once,
+        rather than once for every student being graded
+    """
+
+    def __init__(self, settings={}, grader_results=[]):
+        """Creates a new GraderProfile
+
+        Keyword Arguments:
+            settings {dict} -- The settings that will be used by the SmartGraders sharing this profile (default: {{}})
+            grader_results {list} -- An array containing the outputs of the grader program for a set of test cases
+        """
+        self.settings = settings
+        self.grader_results = grader_results
+        self.grader_tokens = SmartGrader(settings).get_token_matrix(grader_results)
+
+        # Identifies the settings, test cases, and grader outputs, which together with a student's outputs decide their grades
+        fingerprint = [settings, [(vars(i.test_case), i.stdout, i.stderr, i.exit_code, i.timeout, i.user_time, i.system_time, i.peak_rss_kb) for i in grader_results]]
+        self.fingerprint = hashlib.sha256(json.dumps(fingerprint, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        self._reference_tokens = {0: self.grader_tokens}
+
+
+    def get_grader_tokens(self, reference=0):
+        """Gets the grader token vectors, computing them the first time they're needed for a reference test case
+
+        Keyword Arguments:
+            reference {int} -- The test case the outputs are compared against when analysis_mode is skeleton (default: {0})
+
+        Returns:
+            list -- The grader token matrix
+        """
+        if self.settings.get('analysis_mode', 'pairwise') != 'skeleton':
+            return self.grader_tokens
+
+        if reference not in self._reference_tokens:
+            self._reference_tokens[reference] = SmartGrader(self.settings).get_token_matrix(self.grader_results, reference)
+
+        return self._reference_tokens[reference]
 
 
 class SmartGrader():
@@ -99,7 +153,10 @@ class SmartGrader():
         from a given student submission matches the output from a master teacher program
     """
 
-    def __init__(self, settings={}, grader_results=[], student_results=[]):
+    # The smallest CPU time limit a test case's relative_to_grader limit can work out to
+    _min_relative_cpu_seconds = 0.1
+
+    def __init__(self, settings={}, grader_results=[], student_results=[], grader_profile=None):
         """ Creates a new SmartGrader object
 
         Keyword Arguments:
@@ -107,16 +164,22 @@ class SmartGrader():
                                 when determining grades (default: {{}})
             grader_results {list} -- An array containing the outputs of the grader program for a set of test cases
             student_results {list} -- An array containing the outputs of the student program for a set of test cases
+            grader_profile {GraderProfile} -- Precomputed grader token vectors to use instead of recomputing
+                                them from grader_results (default: {None})
         """
         self.load_settings(**settings)
-        self.grader_results = grader_results
+        self.grader_profile = grader_profile
+        self.grader_results = grader_profile.grader_results if grader_profile is not None and not grader_results else grader_results
         self.student_results = student_results
         self.grader_tokens = None
         self.student_tokens = None
-        self._lexer = Lark(TOKEN_GRAMMER, parser="lalr")
+        self.analysis_reused = False
+        self.source_fingerprints = None
+        self._test_grades = None
+        self._reference = 0
 
 
-    def load_settings(self, penalties={}, penalty_weight=0.1, pass_threshold=95, collapse_whitespace=True, all_tokens_strings=False, ignore_nonnumeric_tokens=False, enforce_floating_point=False,  language='java', connect_adjacent_words=False, grader_directory='Grader', student_directory='Student', **kwargs):
+    def load_settings(self, penalties={}, penalty_weight=0.1, pass_threshold=95, collapse_whitespace=True, all_tokens_strings=False, ignore_nonnumeric_tokens=False, enforce_floating_point=False,  language='java', connect_adjacent_words=False, diff_engine='ndiff', diff_edit_limit=2000, analysis_mode='pairwise', **kwargs):
         self.load_penalties(**penalties)
         self.penalty_weight = penalty_weight
         self.pass_threshold = pass_threshold
@@ -126,14 +189,22 @@ class SmartGrader():
         self.enforce_floating_point = enforce_floating_point
         self.language = language
         self.connect_adjacent_words = connect_adjacent_words
-        _ = grader_directory
-        _ = student_directory
+        self.diff_engine = diff_engine
+        self.diff_edit_limit = diff_edit_limit
+        self.analysis_mode = analysis_mode
+        self._test_grades = None
+
+        if diff_engine not in ('ndiff', 'myers'):
+            raise ValueError(f'Unknown diff engine {diff_engine}, must be either ndiff or myers')
+
+        if analysis_mode not in ('pairwise', 'skeleton'):
+            raise ValueError(f'Unknown analysis mode {analysis_mode}, must be either pairwise or skeleton')
 
         for i in kwargs:
             print(f'Configuration setting {i} was not recognized')
 
 
-    def load_penalties(self, type_penalty=20, token_count_penalty=50, numeric_penalty=10, character_penalty=50, run_failure_penalty=100, compile_failure_penalty=1000, timeout_penalty=100, missing_string_penalty=100, **kwargs):
+    def load_penalties(self, type_penalty=20, token_count_penalty=50, numeric_penalty=10, character_penalty=50, run_failure_penalty=100, compile_failure_penalty=1000, timeout_penalty=100, missing_string_penalty=100, output_truncated_penalty=100, performance_penalty=50, **kwargs):
         self.type_penalty = type_penalty
         self.token_count_penalty = token_count_penalty
         self.numeric_penalty = numeric_penalty
@@ -142,6 +213,9 @@ class SmartGrader():
         self.compile_failure_penalty = compile_failure_penalty
         self.timeout_penalty = timeout_penalty
         self.missing_string_penalty = missing_string_penalty
+        self.output_truncated_penalty = output_truncated_penalty
+        self.performance_penalty = performance_penalty
+        self._test_grades = None
 
 
         for i in kwargs:
@@ -172,45 +246,239 @@ class SmartGrader():
         if len(self.grader_results) != len(self.student_results):
             raise ValueError("Grader and Student must have the same number of test cases")
 
-        # Fill in the arrays with empty values
-        self.grader_tokens = [None] * len(self.grader_results)
-        self.student_tokens = [None] * len(self.student_results)
+        # When only comparing against a single reference output, use one the student's program ran successfully on, since
+        #   the tests it failed on are left out when the token vectors are combined
+        self._reference = next((i for i, result in enumerate(self.student_results) if result.exit_code == 0), 0)
+
+        with span('tokenize_grader'):
+            if self.grader_profile is not None:
+                self.grader_tokens = self.grader_profile.get_grader_tokens(self._reference)
+            else:
+                self.grader_tokens = self.get_token_matrix(self.grader_results, self._reference)
+
+        with span('tokenize_student'):
+            self.student_tokens = self.get_token_matrix(self.student_results, self._reference)
+
+        with span('grade_tokens'):
+            self._test_grades = [self._grade_token_vectors(i) for i in range(len(self.student_results))]
+
+
+    def get_output_key(self):
+        """Hashes everything about the student results that their grades depend on, so that students whose programs
+            behaved the same way can share a single analysis
+
+        Returns:
+            str -- The hash of the student results
+        """
+        key = hashlib.sha256()
+
+        for student_result, grader_result in zip(self.student_results, self.grader_results):
+            # How much CPU time and memory the program used is different on every run, so only the limits it went over are included
+            parts = [student_result.stdout, student_result.stderr, student_result.exit_code, student_result.timeout, student_result.output_truncated,
+                     self._check_performance(student_result, grader_result)]
+            key.update(json.dumps(parts).encode('utf-8'))
+
+        return key.hexdigest()
+
+
+    def get_analysis(self):
+        """Gets the parts of the analysis that depend on the student results, without the results themselves, so the
+            analysis can be kept around for reuse_analysis without keeping every output it was made from
+
+        Returns:
+            tuple -- The reference test case, the student token vectors, and the test grades
+        """
+        return self._reference, self.student_tokens, self._test_grades
+
+
+    def reuse_analysis(self, analysis):
+        """Takes the analysis of another SmartGrader instead of analyzing the student results again. The token vectors
+            and grades are shared with the other SmartGrader rather than copied
+
+        Arguments:
+            analysis {tuple} -- The get_analysis of an analyzed SmartGrader with the same settings, grader results, and output key
+        """
+        self._reference, self.student_tokens, self._test_grades = analysis
+
+        if self.grader_profile is not None:
+            self.grader_tokens = self.grader_profile.get_grader_tokens(self._reference)
+        else:
+            self.grader_tokens = self.get_token_matrix(self.grader_results, self._reference)
+
+        self.analysis_reused = True
+
+
+    def detach_grader_profile(self):
+        """Removes the grader results and token vectors, which are the same for every student, so that an analyzed
+            SmartGrader can be sent to another process or machine cheaply. attach_grader_profile puts them back
+        """
+        self.grader_profile = None
+        self.grader_results = None
+        self.grader_tokens = None
+
+
+    def attach_grader_profile(self, grader_profile):
+        """Restores the grader results and token vectors removed by detach_grader_profile
+
+        Arguments:
+            grader_profile {GraderProfile} -- A profile of the same grader results the SmartGrader was analyzed with
+        """
+        self.grader_profile = grader_profile
+        self.grader_results = grader_profile.grader_results
+        self.grader_tokens = grader_profile.get_grader_tokens(self._reference)
+
+
+    def get_token_matrix(self, results, reference=0):
+        """Computes the difference token vectors between every pair of outputs in a set of results
+
+        Arguments:
+            results {list} -- The results of a program for a set of test cases
+
+        Keyword Arguments:
+            reference {int} -- The test case every output is compared against when analysis_mode is skeleton (default: {0})
+
+        Returns:
+            list -- A 2D list where element [i][j] contains the tokens in the output of test i that differ from the output of test j
+        """
+        if self.analysis_mode == 'skeleton':
+            return self._get_skeleton_token_matrix(results, reference)
+
+        token_matrix = [[None] * len(results) for _ in results]
+
+        for i in range(len(results)):
+            for j in range(len(results)):
+                token_matrix[i][j] = self.token_vectors_by_line(results[i].stdout, results[j].stdout)
+
+        return token_matrix
+
+
+    def _get_skeleton_token_matrix(self, results, reference):
+        """Approximates the token matrix by only comparing every output against the output of a single reference test
+            case, which takes 2N diffs instead of N^2. The tokens of output i that differ from output j are taken to be
+            the tokens where i differs from the reference, plus the tokens where i matches the reference but
+            j doesn't. When j is the reference itself this is exact
+
+        Arguments:
+            results {list} -- The results of a program for a set of test cases
+            reference {int} -- The index of the reference test case
+
+        Returns:
+            list -- A 2D list in the same format as get_token_matrix
+        """
+        if len(results) == 0:
+            return []
+
+        reference = results[reference].stdout
+
+        # The tokens of the reference output that differ from each output, indexed by the line of the reference they're on
+        reference_tokens = []
+        for result in results:
+            line_tokens = {}
+            for _, _, reference_index, _, tokens in self._get_line_tokens(reference, result.stdout):
+                if reference_index is not None and tokens:
+                    line_tokens[reference_index] = tokens
+            reference_tokens.append(line_tokens)
+
+        token_matrix = [[None] * len(results) for _ in results]
+
+        for i, result in enumerate(results):
+            differences = []
+            paired_lines = {}
+            line_start = 0
+
+            for line, reference_line, index, reference_index, tokens in self._get_line_tokens(result.stdout, reference):
+                differences.extend(Token(t.value, t.start + line_start, t.end + line_start, t.token_type) for t in tokens)
+                if index is not None and reference_index is not None:
+                    paired_lines[reference_index] = (line, reference_line, line_start, tokens)
+                line_start += len(line) + 1
+
+            for j in range(len(results)):
+                if i == j:
+                    token_matrix[i][j] = []
+                    continue
+
+                token_vector = list(differences)
+
+                for reference_index, tokens in reference_tokens[j].items():
+                    if reference_index in paired_lines:
+                        line, reference_line, line_start, line_differences = paired_lines[reference_index]
+                        token_vector.extend(t.offset(line_start) for t in self._map_reference_tokens(tokens, line, reference_line, line_differences))
+
+                token_matrix[i][j] = token_vector
+
+        return token_matrix
 
-        for i in range(len(self.grader_results)):
-            self.grader_tokens[i] = [None] * len(self.grader_results)
-            self.student_tokens[i] = [None] * len(self.student_results)
 
-        # Generate all of the token vectors
-        for i in range(len(self.grader_results)):
-            for j in range(len(self.grader_results)):
-                self.grader_tokens[i][j] = self.token_vectors_by_line(self.grader_results[i].stdout, self.grader_results[j].stdout)
-                self.student_tokens[i][j] = self.token_vectors_by_line(self.student_results[i].stdout, self.student_results[j].stdout)
+    def _map_reference_tokens(self, tokens, line, reference_line, line_differences):
+        # Tokens can only be carried over exactly from the parts of the line that are the same as the reference line,
+        #   which are the common prefix and suffix of the two lines. Anything overlapping a token where the line
+        #   differs from the reference is already covered by that token
+        prefix = 0
+        while prefix < len(line) and prefix < len(reference_line) and line[prefix] == reference_line[prefix]:
+            prefix += 1
+
+        suffix = 0
+        while suffix < min(len(line), len(reference_line)) - prefix and line[-1 - suffix] == reference_line[-1 - suffix]:
+            suffix += 1
+
+        shift = len(line) - len(reference_line)
+        mapped = []
+        middle_mapped = False
+
+        for token in tokens:
+            if token.end <= prefix:
+                start = token.start
+            elif token.start >= len(reference_line) - suffix:
+                start = token.start + shift
+            elif not middle_mapped:
+                # A token in the part of the reference line that changed can't be matched up with a single token, so
+                #   every token in the part of this line that changed is used instead
+                mapped.extend(i for i in self._get_possible_tokens(line) if i.end > prefix and i.start < len(line) - suffix)
+                middle_mapped = True
+                continue
+            else:
+                continue
+
+            end = start + token.end - token.start
+
+            if not any(i.start < end and start < i.end for i in line_differences):
+                mapped.append(Token(token.value, start, end, token.token_type))
+
+        return self._convert_token_values(mapped)
+
 
     def get_combined_vectors(self, test_case_num, mask_array=None):
         if mask_array is None:
             mask_array = [True] * len(self.grader_results)
 
-        grader_vector = self.grader_tokens[test_case_num]
-        combined_grader_vectors = []
-        for vect in (vect for mask, vect in zip(mask_array, grader_vector) if mask):
-            combined_grader_vectors.extend(vect)
-        combined_grader_vectors = list(set(combined_grader_vectors))
-        combined_grader_vectors.sort()
-
-        student_vector = self.student_tokens[test_case_num]
-        combined_student_vectors = []
-        for vect in (vect for mask, vect in zip(mask_array, student_vector) if mask):
-            combined_student_vectors.extend(vect)
-        combined_student_vectors = list(set(combined_student_vectors))
-        combined_student_vectors.sort()
+        combined_grader_vectors = self._combine_vectors(self.grader_tokens[test_case_num], mask_array)
+        combined_student_vectors = self._combine_vectors(self.student_tokens[test_case_num], mask_array)
 
         return combined_grader_vectors, combined_student_vectors
 
 
+    @staticmethod
+    def _combine_vectors(vectors, mask_array):
+        # Dedup and sort on the tokens' tuple keys, so all of the comparisons happen on plain tuples instead of
+        #   going through the Token comparison methods. The first token seen with a given key is the one kept
+        combined = {}
+        for vect in (vect for mask, vect in zip(mask_array, vectors) if mask):
+            for token in vect:
+                combined.setdefault(token.get_key(), token)
+
+        return [combined[key] for key in sorted(combined)]
+
+
     def _grade_token_vectors(self, test_num):
         total_error = 0
+        penalties = {}
         feedback = []
 
+        def add_penalty(name, amount):
+            nonlocal total_error
+            total_error += amount
+            penalties[name] = penalties.get(name, 0) + amount
+
         test_case_passed = [i.exit_code == 0 for i in self.student_results]
         grader_tokens, student_tokens = self.get_combined_vectors(test_num, test_case_passed)
 
@@ -218,19 +486,27 @@ class SmartGrader():
 
         if student_result.exit_code != 0 and self.grader_results[test_num].exit_code == 0:
             feedback.append("Student program encountered an unexpected runtime exception")
-            total_error += self.run_failure_penalty
+            add_penalty('run_failure_penalty', self.run_failure_penalty)
+
+        if student_result.output_truncated:
+            feedback.append(f'Student program printed more than {student_result.test_case.max_output_bytes} bytes and its output was truncated')
+            add_penalty('output_truncated_penalty', self.output_truncated_penalty)
+
+        for i in self._check_performance(student_result, self.grader_results[test_num]):
+            feedback.append(i)
+            add_penalty('performance_penalty', self.performance_penalty)
 
         for i in [i for i in student_result.test_case.required_strings if i not in student_result.stdout]:
             feedback.append(f'Missing string \'{i}\' in standard output')
-            total_error += self.missing_string_penalty
+            add_penalty('missing_string_penalty', self.missing_string_penalty)
 
         for i in [i for i in student_result.test_case.required_strings_stderr if i not in student_result.stderr]:
             feedback.append(f'Missing string \'{i}\' in standard error')
-            total_error += self.missing_string_penalty
+            add_penalty('missing_string_penalty', self.missing_string_penalty)
 
 
         if len(grader_tokens) != len(student_tokens):
-            total_error += self.token_count_penalty
+            add_penalty('token_count_penalty', self.token_count_penalty)
 
             # Convert the token vector into easily readable strings
             grader_string = '[' + ', '.join(f'\'{i}\'' for i in grader_tokens) + ']'
@@ -249,7 +525,7 @@ class SmartGrader():
             if type(grader_value) != type(student_value):
                 # Before supplying any feedback, check to make sure these weren't both numeric types
                 if any(not isinstance(i, (float, int)) for i in (grader_value, student_value)) or self.enforce_floating_point:
-                    total_error += self.type_penalty
+                    add_penalty('type_penalty', self.type_penalty)
                     feedback.append(f"Expected a {type(grader_value)} ({grader_value}), got a {type(student_value)} ({student_value})")
 
             # If the grader and the student vectors are different, this is also bad
@@ -264,13 +540,49 @@ class SmartGrader():
                 #   of blowing up in a nasty way as it gets close to zero
                 if isinstance(grader_value, (float, int)):
                     scale = log(cosh(grader_value)) + 0.25 if abs(grader_value) < 0.292055305409401 else abs(grader_value)
-                    total_error += self.numeric_penalty * abs(grader_value - student_value) / scale
+                    add_penalty('numeric_penalty', self.numeric_penalty * abs(grader_value - student_value) / scale)
 
                 # If they are strings, the penalty will be proportional to the number of characters that are different
                 else:
-                    total_error += self.character_penalty * len(list(i for i in ndiff(grader_value, student_value) if i[0] in '-+'))
+                    add_penalty('character_penalty', self.character_penalty * len(list(i for i in self._diff(grader_value, student_value) if i[0] in '-+')))
+
+        return TestGrade(self.convert_penalty_to_grade(total_error), total_error, penalties, sorted(set(feedback)))
+
+
+    def _check_performance(self, student_result, grader_result):
+        """Checks the CPU time and memory used by the student program against the limits set for the test case.
+            Configs that set limits a runner can't measure are rejected by Program.check_performance_limits before
+            anything is run, so a limit is only skipped here if the program's usage was lost, such as when it couldn't be started
+
+        Arguments:
+            student_result {TestResult} -- The student's result for the test case
+            grader_result {TestResult} -- The grader's result for the same test case
+
+        Returns:
+            list -- Feedback for every limit the student program went over
+        """
+        test = student_result.test_case
+        feedback = []
+
+        if student_result.user_time is not None:
+            cpu_time = student_result.user_time + student_result.system_time
+
+            if test.max_cpu_seconds is not None and cpu_time > test.max_cpu_seconds:
+                feedback.append(f'Student program used {cpu_time:.2f}s of CPU time, more than the limit of {test.max_cpu_seconds}s')
+
+            if test.relative_to_grader is not None and grader_result.user_time is not None:
+                grader_cpu_time = grader_result.user_time + grader_result.system_time
 
-        return total_error, feedback
+                # Very short runs are mostly startup time and noise, so the limit is never allowed to be too small to measure
+                cpu_limit = max(grader_cpu_time * test.relative_to_grader, SmartGrader._min_relative_cpu_seconds)
+
+                if cpu_time > cpu_limit:
+                    feedback.append(f'Student program used {cpu_time:.2f}s of CPU time, more than {test.relative_to_grader}x the {grader_cpu_time:.2f}s the grader used')
+
+        if student_result.peak_rss_kb is not None and test.max_rss_mb is not None and student_result.peak_rss_kb / 1024 > test.max_rss_mb:
+            feedback.append(f'Student program used {student_result.peak_rss_kb / 1024:.1f} MiB of memory, more than the limit of {test.max_rss_mb} MiB')
+
+        return feedback
 
 
     def get_test_grade(self, test_num):
@@ -289,9 +601,7 @@ class SmartGrader():
         if test_num >= len(self.student_results):
             raise IndexError("Test case number must be less than the number of test cases")
 
-        total_error, _ = self._grade_token_vectors(test_num)
-
-        return self.convert_penalty_to_grade(total_error)
+        return self.get_test_details(test_num).grade
 
 
     def get_test_feedback(self, test_num):
@@ -310,11 +620,46 @@ class SmartGrader():
         if test_num >= len(self.student_results):
             raise IndexError("Test case number must be less than the number of test cases")
 
-        _, feedback = self._grade_token_vectors(test_num)
+        return self.get_test_details(test_num).feedback
 
-        feedback = sorted(set(feedback))
 
-        return feedback
+    def get_test_details(self, test_num):
+        """Gets the grade, penalty breakdown, and feedback for a given test case. These are computed once
+            when the grader is analyzed and recomputed only after the settings are changed
+
+        Arguments:
+            test_num {int} -- The test case to get the details for
+
+        Raises:
+            IndexError: Raised if the specified test case index is out of bounds
+
+        Returns:
+            TestGrade -- The graded results of the test case
+        """
+
+        if test_num >= len(self.student_results):
+            raise IndexError("Test case number must be less than the number of test cases")
+
+        if self._test_grades is None:
+            self._test_grades = [self._grade_token_vectors(i) for i in range(len(self.student_results))]
+
+        return self._test_grades[test_num]
+
+
+    def get_overall_grade(self):
+        """Gets the student's overall grade, which is the average of their test case grades weighted by each test case's weight
+
+        Returns:
+            float -- The overall grade out of 100
+        """
+        total_grade = 0
+        total_weight = 0
+
+        for i, result in enumerate(self.student_results):
+            total_grade += self.get_test_grade(i) * result.test_case.weight
+            total_weight += result.test_case.weight
+
+        return total_grade / total_weight if total_weight != 0 else 100
 
 
     # TODO This needs to be more rigorous. It currently has issues with edge cases where a floating point numbers starting with a .
@@ -322,45 +667,40 @@ class SmartGrader():
         """Splits a string into individual tokens
 
         Args:
-            string (str): The string to split into tokenStr
+            string (str): The string to split into tokens
 
         Returns:
-            list(str): A list of tokens representing the string
+            list(Token): A list of tokens representing the string
         """
 
-        tokens = []
-        token_start = 0
-
-        lark_tokens = self._lexer.parse(string)
-
-        for i in lark_tokens.children:
-            if i.data == 'word':
-                token_type = TokenType.word
-            elif i.data == 'int':
-                token_type = TokenType.integer
-            elif i.data == 'float':
-                token_type = TokenType.floating
-            elif i.data == 'space':
-                token_type = TokenType.whitespace
-            else:
-                token_type = TokenType.none
+        with span('split_tokens', detail=True):
+            return [Token(match.group(), match.start(), match.end(), TokenType[match.lastgroup]) for match in TOKEN_PATTERN.finditer(string)]
 
-            token_value = ''.join(t.value for t in i.children)
 
-            tokens.append(Token(token_value, token_start,  token_start + len(token_value), token_type))
-            token_start += len(token_value)
+    def _diff(self, a, b):
+        """Compares two sequences using the configured diff engine
 
-        return tokens
+        Args:
+            a (sequence): The sequence being changed from
+            b (sequence): The sequence being changed to
+
+        Returns:
+            list(str): The differences between the sequences in the format produced by difflib.ndiff
+        """
+        # Both engines produce their differences lazily, so they're collected here to time the diff itself
+        with span('diff', detail=True):
+            if self.diff_engine == 'myers':
+                return list(myers_diff(a, b, self.diff_edit_limit))
+
+            return list(ndiff(a, b))
 
 
     def _get_first_diff(self, a, b, tokens):
         # Find the first character that is different between the two strings
         first_difference = 0
 
-        while a[first_difference] == b[first_difference]:
+        while first_difference < len(a) and first_difference < len(b) and a[first_difference] == b[first_difference]:
             first_difference += 1
-            if first_difference >= len(a) or first_difference >= len(b):
-                break
 
         # We now know where the first difference occurs, but since we're interested in differences
         #   by token, we're more interested in where the token containing this first 
@@ -377,12 +717,9 @@ class SmartGrader():
         # Now do the same thing, only for the last difference
         last_difference = -1
 
-        while a[last_difference] == b[last_difference]:
+        while -last_difference <= len(a) and -last_difference <= len(b) and a[last_difference] == b[last_difference]:
             last_difference -= 1
 
-            if -last_difference > len(a) or -last_difference > len(b):
-                break
-
         last_difference += len(a) + 1
 
         for token in reversed(tokens):
@@ -408,9 +745,35 @@ class SmartGrader():
         if output_a == output_b:
             return []
 
+        line_start = 0
+        tokens = []
+
+        # Get the difference tokens from each of the individual lines
+        for line_a, _, _, _, line_tokens in self._get_line_tokens(output_a, output_b):
+            for token in line_tokens:
+                token.offset(line_start)
+                tokens.append(token)
+            line_start += len(line_a) + 1
+
+        return tokens
+
+
+    def _get_line_tokens(self, output_a, output_b):
+        """Pairs up the lines of two outputs and gets the difference tokens of each pair of lines
+
+        Arguments:
+            output_a {str} -- The string to get the changes in
+            output_b {str} -- The base string to compare output_a to
+
+        Returns:
+            list -- A tuple for each pair of lines, containing the line from each output, the index of each line in its output
+                    (None if the line only exists in the other output), and the difference tokens, relative to the start of the line
+        """
         # Get a list of line by line differences
-        diffs = ndiff([i + '\n' for i in output_a.splitlines()], [i + '\n' for i in output_b.splitlines()])
+        diffs = self._diff([i + '\n' for i in output_a.splitlines()], [i + '\n' for i in output_b.splitlines()])
         diff_lines = []
+        index_a = 0
+        index_b = 0
 
         # Generate matched pairs of lines from both outputs
         for diff in diffs:
@@ -418,28 +781,23 @@ class SmartGrader():
             line = diff[2:]
 
             if prefix == '  ':
-                diff_lines.append([line, line])
+                diff_lines.append([line, line, index_a, index_b])
+                index_a += 1
+                index_b += 1
             elif prefix == '+ ' and len(diff_lines) > 0 and diff_lines[-1][1] is None:
                 diff_lines[-1][1] = line
+                diff_lines[-1][3] = index_b
+                index_b += 1
             elif prefix == '+ ':
-                diff_lines.append(['', line])
+                diff_lines.append(['', line, None, index_b])
+                index_b += 1
             elif prefix == '- ':
-                diff_lines.append([line, None])
+                diff_lines.append([line, None, index_a, None])
+                index_a += 1
 
-        diff_lines = list(map(lambda x: (x[0].replace('\n', ''), '' if x[1] is None else x[1].replace('\n', '')), diff_lines))
+        diff_lines = list(map(lambda x: (x[0].replace('\n', ''), '' if x[1] is None else x[1].replace('\n', ''), x[2], x[3]), diff_lines))
 
-        line_start = 0
-        tokens = []
-
-        # Get the difference tokens from each of the individual lines
-        for line in diff_lines:
-            newTokens = self.get_token_vector(line[0], line[1]) if line[0] != line[1] else []
-            for token in newTokens:
-                token.offset(line_start)
-                tokens.append(token)
-            line_start += len(line[0]) + 1
-
-        return tokens
+        return [(*line, self.get_token_vector(line[0], line[1]) if line[0] != line[1] else []) for line in diff_lines]
 
 
     def get_token_vector(self, line_a, line_b):
@@ -455,8 +813,7 @@ class SmartGrader():
         if line_a == line_b or len(line_a) == 0:
             return []
 
-        possible_tokens = list(filter(lambda x: not(x.token_type == TokenType.whitespace and self.collapse_whitespace), self._split_tokens(line_a)))
-        possible_tokens = list(filter(lambda x: x.token_type in (TokenType.integer, TokenType.floating) or not self.ignore_nonnumeric_tokens, possible_tokens))
+        possible_tokens = self._get_possible_tokens(line_a)
 
         first_difference = self._get_first_diff(line_a, line_b, possible_tokens)
         last_difference = self._get_last_diff(line_a, line_b, possible_tokens)
@@ -468,7 +825,7 @@ class SmartGrader():
             trimmed_line_a = line_a[first_difference:last_difference]
             trimmed_line_b = line_b[first_difference:last_difference]
 
-        raw_diffs = list(ndiff(trimmed_line_a, trimmed_line_b))
+        raw_diffs = list(self._diff(trimmed_line_a, trimmed_line_b))
         diffs = []
 
         for diff in raw_diffs:
@@ -495,12 +852,21 @@ class SmartGrader():
                 else:
                     token_vector.append(token)
 
-        for token in token_vector:
+        # TODO Maybe make it so that adjacent words can be combined into a single token?
+        return self._convert_token_values(token_vector)
+
+
+    def _get_possible_tokens(self, line):
+        possible_tokens = list(filter(lambda x: not(x.token_type == TokenType.whitespace and self.collapse_whitespace), self._split_tokens(line)))
+        return list(filter(lambda x: x.token_type in (TokenType.integer, TokenType.floating) or not self.ignore_nonnumeric_tokens, possible_tokens))
+
+
+    @staticmethod
+    def _convert_token_values(tokens):
+        for token in tokens:
             if token.token_type == TokenType.integer:
                 token.value = int(token.value)
             elif token.token_type == TokenType.floating:
                 token.value = float(token.value)
 
-
-        # TODO Maybe make it so that adjacent words can be combined into a single token?
-        return token_vector
+        return tokens
@@ -0,0 +1,343 @@
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from os import path
+
+from tqdm import tqdm
+
+from . import profiler
+from ._utils import create_program, grade_student
+from .profiler import span
+
+# Pilot bulk downloads put every file in the root of the zip, named '<id> - <student name> - <submission date> - <file name>'
+PILOT_FILE_PATTERN = re.compile(r'^(?P<id>[\d-]+) - (?P<name>.+?) - (?P<date>[A-Z][a-z]{2} \d{1,2}, \d{4} \d{3,4} [AP]M) - (?P<file>.+)$')
+
+# Pilot writes submission times without a separator, so the last two digits are the minutes and anything before them is the hour
+PILOT_DATE_PATTERN = re.compile(r'^(?P<day>[A-Z][a-z]{2} \d{1,2}, \d{4}) (?P<hour>\d{1,2})(?P<minute>\d{2}) (?P<meridiem>[AP]M)$')
+
+
+def parse_pilot_date(text):
+    """Parses the submission date in the name of a file from a Pilot bulk download, such as 'Mar 5, 2024 110 PM'. strptime can't
+        be used for the time, since it reads as many digits as it can for the hour and would parse '110 PM' as 11:00 PM
+
+    Args:
+        text (str): The date from the file name
+
+    Raises:
+        ValueError: Raised if the text isn't a valid Pilot date
+
+    Returns:
+        datetime: The submission date
+    """
+    match = PILOT_DATE_PATTERN.match(text)
+
+    if match is None or not 1 <= int(match.group('hour')) <= 12:
+        raise ValueError(f'{text} is not a Pilot submission date')
+
+    hour = int(match.group('hour')) % 12 + (12 if match.group('meridiem') == 'PM' else 0)
+
+    return datetime.strptime(match.group('day'), '%b %d, %Y').replace(hour=hour, minute=int(match.group('minute')))
+
+
+def get_scratch_root():
+    """Picks the directory student submissions are extracted into. A tmpfs such as /dev/shm is used if there is one,
+        so extracted submissions never have to touch the disk
+
+    Returns:
+        str: The path of the scratch directory
+    """
+    if path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+
+    return tempfile.gettempdir()
+
+
+class SubmissionArchive:
+    """A bulk download of student submissions in a single zip file. Only the index of the zip is read up front, and
+        each student's files are extracted on their own when they're needed
+    """
+
+    # How many levels of zip files inside of submissions are extracted
+    _max_nesting = 3
+
+    # The largest file extracted from a submission, including zips inside of it, which are read into memory. A zip
+    #   can claim any size for its files, so this is checked against what's actually read
+    _max_file_bytes = 64 * 1024 * 1024
+
+    _chunk_size = 65536
+
+
+    def __init__(self, archive_path):
+        """Reads the index of a bulk download and groups its files by student. Zips with a directory for every student
+            and Pilot bulk downloads are both supported. If a Pilot download has more than one submission from a
+            student, only their latest submission is used. Students in a Pilot download are told apart by their id, so
+            two students with the same name get their id added to their names
+
+        Args:
+            archive_path (str): The path of the zip file
+        """
+        self.archive_path = archive_path
+        self._submissions = defaultdict(dict)
+
+        pilot_submissions = defaultdict(dict)
+        pilot_dates = {}
+
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or self._is_ignored(info.filename):
+                    continue
+
+                match = PILOT_FILE_PATTERN.match(info.filename)
+
+                if match is not None:
+                    student = (match.group('id'), self._clean_name(match.group('name')))
+
+                    if student[1] in ('', '.', '..'):
+                        continue
+
+                    try:
+                        date = parse_pilot_date(match.group('date'))
+                    except ValueError:
+                        date = datetime.min
+
+                    # Throw away anything from an older submission as soon as a newer one turns up
+                    if date > pilot_dates.get(student, datetime.min):
+                        pilot_submissions[student].clear()
+                        pilot_dates[student] = date
+                    elif date < pilot_dates.get(student, datetime.min):
+                        continue
+
+                    pilot_submissions[student][match.group('file')] = info.filename
+                    continue
+
+                elif '/' in info.filename:
+                    student_directory, file_name = info.filename.split('/', 1)
+                    student_name = self._clean_name(student_directory)
+
+                else:
+                    # Loose files in the root of the zip, such as Pilot's index.html, don't belong to anyone
+                    continue
+
+                if student_name in ('', '.', '..'):
+                    continue
+
+                self._submissions[student_name][file_name] = info.filename
+
+        name_counts = Counter(name for _, name in pilot_submissions)
+
+        for (student_id, name), files in pilot_submissions.items():
+            self._submissions[name if name_counts[name] == 1 else f'{name} ({student_id})'].update(files)
+
+
+    def get_student_names(self):
+        """Gets the name of every student with a submission in the archive
+
+        Returns:
+            list(str): The student names, in sorted order
+        """
+        return sorted(self._submissions)
+
+
+    def extract(self, student_name, directory):
+        """Extracts a student's submission. Any zip files in the submission are extracted in place, and if everything
+            in the submission is inside a single directory, that directory's contents are moved up a level
+
+        Args:
+            student_name (str): The name of the student
+            directory (str): The directory to extract the submission into, which is created if it doesn't exist
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        with zipfile.ZipFile(self.archive_path) as archive:
+            for file_name, member_name in self._submissions[student_name].items():
+                with archive.open(member_name) as source:
+                    self._extract_file(source, file_name, directory, 0)
+
+        self._flatten(directory)
+
+
+    @classmethod
+    def _extract_file(cls, source, file_name, directory, nesting):
+        target = cls._get_safe_path(directory, file_name)
+
+        if target is None:
+            return
+
+        if file_name.lower().endswith('.zip') and nesting < SubmissionArchive._max_nesting:
+            # zipfile needs to seek, so the nested zip is read into memory instead of being written to the scratch directory
+            data = source.read(SubmissionArchive._max_file_bytes + 1)
+
+            if len(data) > SubmissionArchive._max_file_bytes:
+                cls._print_too_large(file_name)
+                return
+
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as nested_archive:
+                    nested_directory = path.dirname(target)
+
+                    for info in nested_archive.infolist():
+                        if not info.is_dir() and not cls._is_ignored(info.filename):
+                            with nested_archive.open(info) as nested_source:
+                                cls._extract_file(nested_source, info.filename, nested_directory, nesting + 1)
+
+                return
+
+            except zipfile.BadZipFile:
+                return
+
+        os.makedirs(path.dirname(target), exist_ok=True)
+        size = 0
+
+        with open(target, 'wb') as f:
+            for chunk in iter(lambda: source.read(SubmissionArchive._chunk_size), b''):
+                size += len(chunk)
+
+                if size > SubmissionArchive._max_file_bytes:
+                    break
+
+                f.write(chunk)
+
+        if size > SubmissionArchive._max_file_bytes:
+            os.remove(target)
+            cls._print_too_large(file_name)
+
+
+    @staticmethod
+    def _print_too_large(file_name):
+        print(f'Skipped {file_name}, which is larger than {SubmissionArchive._max_file_bytes // (1024 * 1024)} MB')
+
+
+    @staticmethod
+    def _flatten(directory):
+        # Students often zip up their whole project folder, which would otherwise hide the src and bin directories a level down
+        entries = os.listdir(directory)
+
+        if len(entries) != 1 or not path.isdir(path.join(directory, entries[0])):
+            return
+
+        wrapper = path.join(directory, entries[0])
+        temporary_wrapper = tempfile.mkdtemp(dir=directory)
+        os.rename(wrapper, path.join(temporary_wrapper, 'contents'))
+
+        for entry in os.listdir(path.join(temporary_wrapper, 'contents')):
+            os.rename(path.join(temporary_wrapper, 'contents', entry), path.join(directory, entry))
+
+        shutil.rmtree(temporary_wrapper)
+
+
+    @staticmethod
+    def _get_safe_path(directory, file_name):
+        # Never write outside of the submission's directory, no matter what the names in the zip say
+        parts = [i for i in re.split(r'[\\/]', file_name) if i not in ('', '.')]
+
+        if len(parts) == 0 or '..' in parts:
+            return None
+
+        return path.join(directory, *parts)
+
+
+    @staticmethod
+    def _is_ignored(file_name):
+        return file_name.startswith('__MACOSX/') or '/__MACOSX/' in file_name or path.basename(file_name) in ('.DS_Store', 'Thumbs.db')
+
+
+    @staticmethod
+    def _clean_name(name):
+        return re.sub(r'[\\/:*?"<>|]', '_', name).strip()
+
+
+
+def extract_zip(archive_path, directory):
+    """Extracts a whole zip file, such as an uploaded grader program, the same way a student's submission is extracted
+
+    Args:
+        archive_path (str): The path of the zip file
+        directory (str): The directory to extract the zip into, which is created if it doesn't exist
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and not SubmissionArchive._is_ignored(info.filename):
+                with archive.open(info) as source:
+                    SubmissionArchive._extract_file(source, info.filename, directory, 0)
+
+    SubmissionArchive._flatten(directory)
+
+
+def grade_archived_student(archive, student_name, test_cases, settings, grader_profile, cache=None, max_parallel_tests=1, interactive=True, scratch_root=None):
+    """Extracts a single student's submission into a scratch directory, grades it, and deletes it again
+
+    Args:
+        archive (SubmissionArchive): The archive containing the submission
+        student_name (str): The name of the student
+        test_cases (list(TestCase)): The test cases to run the student program on
+        settings (dict): The settings section of the config
+        grader_profile (GraderProfile): The results and token vectors of running the grader program on the test cases
+        cache (ResultCache, optional): The cache to reuse test results from. Defaults to None.
+        max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+        interactive (bool, optional): Whether the user can be prompted while grading, and whether progress bars
+            are displayed. Defaults to True.
+        scratch_root (str, optional): The directory to extract the submission in. Defaults to None, which uses get_scratch_root.
+
+    Returns:
+        tuple: The same value grade_student returns for the submission
+    """
+    scratch_directory = tempfile.mkdtemp(prefix='wsu-autograder-', dir=scratch_root if scratch_root is not None else get_scratch_root())
+
+    try:
+        student_directory = path.join(scratch_directory, student_name)
+
+        with span('extract', student=student_name):
+            archive.extract(student_name, student_directory)
+
+        return grade_student(create_program(student_directory, settings), test_cases, settings, grader_profile, cache, max_parallel_tests, interactive)
+
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+
+def _grade_archived_student_worker(job):
+    # ProcessPoolExecutor.map only passes a single argument, so the grade_archived_student arguments are bundled together
+    profile, *job = job
+    return profiler.call_profiled(profile, grade_archived_student, *job, interactive=False)
+
+
+def grade_archive(archive, test_cases, settings, grader_profile, cache=None, max_parallel_tests=1, max_parallel_students=1, interactive=True, mp_context=None):
+    """Grades every submission in an archive. Only as many submissions are extracted at once as there are students
+        being graded at once, so the scratch space used doesn't grow with the size of the class
+
+    Args:
+        archive (SubmissionArchive): The archive to grade
+        test_cases (list(TestCase)): The test cases to run the student programs on
+        settings (dict): The settings section of the config
+        grader_profile (GraderProfile): The results and token vectors of running the grader program on the test cases
+        cache (ResultCache, optional): The cache to reuse test results from. Defaults to None.
+        max_parallel_tests (int, optional): The maximum number of test cases to run at the same time. Defaults to 1.
+        max_parallel_students (int, optional): The maximum number of students to grade at the same time, each in its own process. Defaults to 1.
+        interactive (bool, optional): Whether the user can be prompted while grading, and whether progress bars are displayed. Defaults to True.
+        mp_context (multiprocessing.context.BaseContext, optional): The context the processes students are graded in are started with. Forking
+            a process that has other threads running can deadlock the child, so callers with threads should pass a forkserver or spawn
+            context. Defaults to None, which uses the default start method.
+
+    Yields:
+        tuple: Each student's name along with the value grade_student returned for them, in sorted order by name
+    """
+    student_names = archive.get_student_names()
+
+    if max_parallel_students <= 1:
+        for student_name in student_names:
+            yield student_name, grade_archived_student(archive, student_name, test_cases, settings, grader_profile, cache, max_parallel_tests, interactive)
+
+    else:
+        jobs = [(profiler.is_enabled(), archive, student_name, test_cases, settings, grader_profile, cache, max_parallel_tests) for student_name in student_names]
+
+        with ProcessPoolExecutor(max_workers=max_parallel_students, mp_context=mp_context) as executor:
+            results = map(profiler.merge_profiled, executor.map(_grade_archived_student_worker, jobs))
+            yield from zip(student_names, tqdm(results, total=len(jobs), desc='Grading Student Submissions', disable=not interactive))
@@ -0,0 +1,592 @@
+#!/usr/bin/env python
+
+"""Benchmarks the autograder on the sample assignments and on generated stress cases, and compares the results against
+    a saved baseline so performance regressions are caught before they're released.
+
+    The stress cases only use python and bash programs, so no JDK is needed. The sample assignments are Java, so they
+    are only benchmarked when javac and java are available.
+
+    Usage:
+        python benchmarks/benchmark.py                          Run every benchmark and print the results
+        python benchmarks/benchmark.py --save baseline.json     Also save the results as a baseline
+        python benchmarks/benchmark.py --compare baseline.json  Compare against a baseline, exiting with 1 on a regression
+"""
+
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+
+REPO_DIRECTORY = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+from WSUAutograder import GraderProfile, Program, SmartGrader, TestCase, TestResult  # noqa: E402
+from WSUAutograder._utils import _grade_cache, create_program, get_grading_settings, grade_students, run_program  # noqa: E402
+from WSUAutograder.similarity import SimilarityIndex, fingerprint_sources  # noqa: E402
+
+SAMPLE_DIRECTORY = path.join(REPO_DIRECTORY, 'samplePrograms')
+
+WORDS = ['total', 'average', 'count', 'value', 'result', 'item', 'sum', 'max', 'min', 'ok', 'error', 'found']
+
+# A grader that prints a line for every number read in, along with a few running totals
+PYTHON_PROGRAM = '''import sys
+numbers = [int(i) for i in sys.stdin.read().split()]
+total = 0
+for i, number in enumerate(numbers):
+    total += number
+    print(f'Item {i}: value {number} running total {total} average {total / (i + 1):.2f}')
+print(f'Count {len(numbers)} sum {total}')
+'''
+
+# The same program, with an off by one error in the running average
+PYTHON_PROGRAM_WRONG = PYTHON_PROGRAM.replace('(i + 1)', '(i + 2)')
+
+BASH_PROGRAM = '''total=0
+i=0
+for number in $(cat); do
+    total=$((total + number))
+    echo "Item $i: value $number running total $total"
+    i=$((i + 1))
+done
+echo "Count $i sum $total"
+'''
+
+BASH_PROGRAM_WRONG = BASH_PROGRAM.replace('total + number', 'total + number + 1')
+
+# The settings recommended for large outputs and many test cases. The default ndiff engine and pairwise analysis take
+#   too long on the larger stress cases, so they're only benchmarked on a small one
+FAST_SETTINGS = {'diff_engine': 'myers', 'analysis_mode': 'skeleton'}
+
+
+def generate_output(rng, line_count, numbers_per_line=4):
+    """Generates program output with a mix of words, integers, and floats on every line. Like the outputs of a real
+        program on different test cases, the words on each line are always the same and only the numbers change
+
+    Args:
+        rng (random.Random): The random number generator to use for the numbers
+        line_count (int): The number of lines to generate
+        numbers_per_line (int, optional): The number of numeric tokens on each line. Defaults to 4.
+
+    Returns:
+        str: The generated output
+    """
+    words = random.Random(line_count * numbers_per_line)
+    lines = []
+
+    for i in range(line_count):
+        parts = [words.choice(WORDS).capitalize(), f'{i}:']
+
+        for _ in range(numbers_per_line):
+            parts.append(words.choice(WORDS))
+            parts.append(str(rng.randint(-1000, 1000)) if words.random() < 0.5 else f'{rng.uniform(-1000, 1000):.2f}')
+
+        lines.append(' '.join(parts))
+
+    return '\n'.join(lines) + '\n'
+
+
+def mutate_output(rng, output, rate):
+    """Makes the kinds of mistakes a student might make in a fraction of the lines of an output
+
+    Args:
+        rng (random.Random): The random number generator to use
+        output (str): The output to change
+        rate (float): The fraction of lines to change
+
+    Returns:
+        str: The changed output
+    """
+    lines = output.splitlines()
+
+    for i, line in enumerate(lines):
+        if rng.random() >= rate:
+            continue
+
+        words = line.split(' ')
+        position = rng.randrange(len(words))
+        mistake = rng.random()
+
+        if mistake < 0.5:
+            words[position] = str(rng.randint(-1000, 1000))
+        elif mistake < 0.8:
+            words[position] = rng.choice(WORDS)
+        else:
+            del words[position]
+
+        lines[i] = ' '.join(words)
+
+    return '\n'.join(lines) + '\n'
+
+
+def generate_source(rng, function_count):
+    """Generates a random python program, so that every student in a class writes different code
+
+    Args:
+        rng (random.Random): The random number generator to use
+        function_count (int): The number of functions in the program
+
+    Returns:
+        str: The program's source
+    """
+    def expression():
+        kind = rng.random()
+
+        if kind < 0.3:
+            return rng.choice(WORDS)
+        elif kind < 0.5:
+            return str(rng.randint(0, 99))
+        elif kind < 0.7:
+            return f'{rng.choice(WORDS)} {rng.choice("+-*%")} {expression()}'
+        elif kind < 0.85:
+            return f'len({rng.choice(WORDS)})'
+        else:
+            return f'{rng.choice(WORDS)}[{expression()}]'
+
+    def block(indent, depth):
+        lines = []
+
+        for _ in range(rng.randint(1, 4)):
+            kind = rng.random() if depth < 2 else rng.random() * 0.5
+
+            if kind < 0.3:
+                lines.append(f'{indent}{rng.choice(WORDS)} = {expression()}')
+            elif kind < 0.4:
+                lines.append(f'{indent}print({expression()}, {expression()})')
+            elif kind < 0.5:
+                lines.append(f'{indent}{rng.choice(WORDS)}.append({expression()})')
+            elif kind < 0.7:
+                lines.append(f'{indent}for {rng.choice(WORDS)} in range({expression()}):')
+                lines += block(indent + '    ', depth + 1)
+            elif kind < 0.8:
+                lines.append(f'{indent}while {expression()} < {expression()}:')
+                lines += block(indent + '    ', depth + 1)
+            else:
+                lines.append(f'{indent}if {expression()} {rng.choice(["<", ">", "=="])} {expression()}:')
+                lines += block(indent + '    ', depth + 1)
+                lines.append(f'{indent}else:')
+                lines += block(indent + '    ', depth + 1)
+
+        return lines
+
+    lines = []
+    for i in range(function_count):
+        lines.append(f'def function_{i}(value, count):')
+        lines += block('    ', 0)
+        lines.append(f'    return {expression()}\n')
+
+    return '\n'.join(lines)
+
+
+def make_results(outputs):
+    return [TestResult(TestCase(description=f'Test {i}'), output, '') for i, output in enumerate(outputs)]
+
+
+def make_scratch_directory():
+    directory = tempfile.mkdtemp(prefix='wsu-autograder-benchmark-')
+    atexit.register(shutil.rmtree, directory, True)
+    return directory
+
+
+def write_program(directory, file_name, source):
+    os.makedirs(directory, exist_ok=True)
+
+    with open(path.join(directory, file_name), 'w') as f:
+        f.write(source)
+
+
+def make_number_tests(rng, test_count, numbers_per_test):
+    return [TestCase(stdin=' '.join(str(rng.randint(-100, 100)) for _ in range(numbers_per_test)) + '\n', description=f'Test {i}', timeout=10)
+            for i in range(test_count)]
+
+
+
+class Benchmark:
+    """A single benchmark. setup is called once to build everything the benchmark needs, and run is the code being
+        measured, which may be called many times
+    """
+
+    def __init__(self, name, setup, units, starts_processes=False):
+        """Creates a new benchmark
+
+        Args:
+            name (str): The name of the benchmark, which is used to match it up with the baseline
+            setup (callable): Takes the scale and returns the function to measure, along with a dictionary of how
+                many of each unit (students, tokens, tests) that function processes
+            units (list(str)): The units to report the throughput in, the first of which is compared against the baseline
+            starts_processes (bool, optional): Whether the benchmark starts subprocesses. How long a process takes to start
+                depends a lot on whatever else the machine is doing, so these benchmarks get twice the tolerance. Defaults to False.
+        """
+        self.name = name
+        self.setup = setup
+        self.units = units
+        self.starts_processes = starts_processes
+
+
+    def measure(self, scale, repeat):
+        """Runs the benchmark, timing it without tracemalloc and then measuring its memory with it, since tracing
+            allocations slows python down too much to time anything
+
+        Args:
+            scale (float): How much to scale the size of the generated inputs by
+            repeat (int): How many times to time the benchmark. The fastest time is kept, since it's the least affected by
+                anything else running on the machine
+
+        Returns:
+            dict: The fastest time in seconds, the throughput in each unit per second, and the peak memory allocated in KiB
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            run, counts = self.setup(scale)
+
+            # Run once first so that anything cached on the first run, such as compiled regexes, isn't counted
+            run()
+
+            times = []
+            for _ in range(max(repeat, 1)):
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+
+            try:
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        seconds = min(times)
+
+        return {
+            'seconds': seconds,
+            'throughput': {unit: counts[unit] / seconds for unit in self.units},
+            'peak_kb': peak / 1024,
+            'starts_processes': self.starts_processes,
+        }
+
+
+
+def setup_split_tokens(line_count, numbers_per_line):
+    def setup(scale):
+        output = generate_output(random.Random(0), max(int(line_count * scale), 1), numbers_per_line)
+        sg = SmartGrader()
+        lines = output.splitlines()
+
+        def run():
+            for line in lines:
+                sg._split_tokens(line)
+
+        return run, {'tokens': sum(len(sg._split_tokens(line)) for line in lines)}
+
+    return setup
+
+
+def setup_analyze(line_count, test_count, student_count, mutation_rate, settings=None, numbers_per_line=4):
+    def setup(scale):
+        rng = random.Random(0)
+        scaled_lines = max(int(line_count * scale), 1)
+
+        grader_outputs = [generate_output(rng, scaled_lines, numbers_per_line) for _ in range(test_count)]
+        student_outputs = [[mutate_output(rng, output, mutation_rate) for output in grader_outputs] for _ in range(student_count)]
+
+        grader_profile = GraderProfile(settings or {}, make_results(grader_outputs))
+        student_results = [make_results(outputs) for outputs in student_outputs]
+
+        def run():
+            for results in student_results:
+                sg = SmartGrader(settings or {}, student_results=results, grader_profile=grader_profile)
+                sg.analyze()
+
+        tokenizer = SmartGrader()
+        tokens = sum(len(tokenizer._split_tokens(output)) for outputs in student_outputs for output in outputs)
+
+        return run, {'students': student_count, 'tokens': tokens}
+
+    return setup
+
+
+def setup_get_test_grade(line_count, test_count, student_count, mutation_rate, settings=None):
+    def setup(scale):
+        rng = random.Random(0)
+        scaled_lines = max(int(line_count * scale), 1)
+
+        grader_outputs = [generate_output(rng, scaled_lines) for _ in range(test_count)]
+        grader_profile = GraderProfile(settings or {}, make_results(grader_outputs))
+        graders = []
+
+        # Analyze every student once up front, so that only the grading of their token vectors is measured
+        for _ in range(student_count):
+            sg = SmartGrader(settings or {}, student_results=make_results([mutate_output(rng, output, mutation_rate) for output in grader_outputs]),
+                             grader_profile=grader_profile)
+            sg.analyze()
+            graders.append(sg)
+
+        def run():
+            for sg in graders:
+                sg._test_grades = None
+                for i in range(test_count):
+                    sg.get_test_grade(i)
+
+        return run, {'tests': student_count * test_count, 'students': student_count}
+
+    return setup
+
+
+def setup_run_tests(language, file_name, source, test_count, numbers_per_test, max_parallel_tests=1, runner='subprocess'):
+    def setup(scale):
+        directory = make_scratch_directory()
+        write_program(directory, file_name, source)
+
+        program = Program(directory, language, runner=runner)
+        program.compile()
+        program.find_main_executable(interactive=False)
+
+        tests = make_number_tests(random.Random(0), max(int(test_count * scale), 1), numbers_per_test)
+
+        def run():
+            program.run_tests(tests, max_parallel_tests=max_parallel_tests, show_progress=False)
+
+        return run, {'tests': len(tests)}
+
+    return setup
+
+
+def setup_grade_students(language, file_name, source, wrong_source, student_count, test_count, numbers_per_test, max_parallel_students=1):
+    def setup(scale):
+        directory = make_scratch_directory()
+        settings = {'language': language, **FAST_SETTINGS}
+
+        write_program(path.join(directory, 'Grader'), file_name, source)
+
+        students = []
+        for i in range(max(int(student_count * scale), 1)):
+            student_directory = path.join(directory, 'Student', f'Student{i:03}')
+            write_program(student_directory, file_name, wrong_source if i % 3 == 0 else source)
+            students.append(student_directory)
+
+        test_cases = make_number_tests(random.Random(0), test_count, numbers_per_test)
+        grader_outputs = run_program(create_program(path.join(directory, 'Grader'), settings), test_cases, interactive=False)
+        grader_profile = GraderProfile(get_grading_settings(settings), grader_outputs)
+
+        def run():
+            # Every run starts out like a fresh grading run, where only students within the run share grades
+            _grade_cache.clear()
+
+            programs = [create_program(i, settings) for i in students]
+            for _ in grade_students(programs, test_cases, settings, grader_profile, max_parallel_students=max_parallel_students, interactive=False):
+                pass
+
+        return run, {'students': len(students), 'tests': len(students) * test_count}
+
+    return setup
+
+
+def setup_sample(sample_directory):
+    def setup(scale):
+        with open(path.join(sample_directory, 'tests.json')) as f:
+            configs = json.load(f)
+
+        settings = configs['settings']
+        test_cases = TestCase.load_from_array(configs['tests'])
+
+        # Grade a copy, so that compiling doesn't leave class files behind in the repo
+        directory = make_scratch_directory()
+        shutil.copytree(sample_directory, path.join(directory, 'sample'))
+        sample_copy = path.join(directory, 'sample')
+
+        grader_outputs = run_program(create_program(path.join(sample_copy, settings['grader_directory']), settings), test_cases, interactive=False)
+        grader_profile = GraderProfile(get_grading_settings(settings), grader_outputs)
+
+        student_root = path.join(sample_copy, settings['student_directory'])
+        students = [path.join(student_root, i) for i in sorted(os.listdir(student_root)) if path.isdir(path.join(student_root, i))]
+
+        def run():
+            # Every run starts out like a fresh grading run, where only students within the run share grades
+            _grade_cache.clear()
+
+            programs = [create_program(i, settings) for i in students]
+            for _ in grade_students(programs, test_cases, settings, grader_profile, interactive=False):
+                pass
+
+        return run, {'students': len(students), 'tests': len(students) * len(test_cases)}
+
+    return setup
+
+
+def setup_fingerprint(student_count, function_count):
+    def setup(scale):
+        rng = random.Random(0)
+        sources = [{'main.py': generate_source(rng, function_count).encode('utf-8')} for _ in range(max(int(student_count * scale), 1))]
+
+        def run():
+            for source in sources:
+                fingerprint_sources(source)
+
+        return run, {'students': len(sources)}
+
+    return setup
+
+
+def setup_find_similar_pairs(student_count, function_count, copy_count):
+    def setup(scale):
+        rng = random.Random(0)
+        scaled_students = max(int(student_count * scale), 2)
+        sources = [generate_source(rng, function_count) for _ in range(scaled_students)]
+
+        # A few students copy someone else's code and rename everything
+        for i in range(min(copy_count, scaled_students // 2)):
+            sources[-1 - i] = sources[i].replace('function_', 'my_function_').replace('value', 'x')
+
+        fingerprints = [fingerprint_sources({'main.py': source.encode('utf-8')}) for source in sources]
+
+        def run():
+            index = SimilarityIndex()
+            for i, student_fingerprints in enumerate(fingerprints):
+                index.add(f'Student {i}', student_fingerprints)
+            index.find_similar_pairs()
+
+        return run, {'students': scaled_students}
+
+    return setup
+
+
+def get_benchmarks():
+    """Builds the list of every benchmark
+
+    Returns:
+        list(Benchmark): The benchmarks
+    """
+    benchmarks = [
+        Benchmark('split_tokens/many_lines', setup_split_tokens(20000, 4), ['tokens']),
+        Benchmark('split_tokens/long_lines', setup_split_tokens(200, 500), ['tokens']),
+        Benchmark('analyze/ndiff', setup_analyze(10, 4, 3, 0.1), ['students', 'tokens']),
+        Benchmark('analyze/many_lines', setup_analyze(60, 4, 3, 0.02, FAST_SETTINGS), ['students', 'tokens']),
+        Benchmark('analyze/many_tests', setup_analyze(2, 30, 2, 0.1, FAST_SETTINGS), ['students', 'tokens']),
+        Benchmark('analyze/many_tests_pairwise', setup_analyze(5, 10, 3, 0.1, {'diff_engine': 'myers'}), ['students', 'tokens']),
+        Benchmark('analyze/long_lines', setup_analyze(3, 4, 2, 0.1, FAST_SETTINGS, numbers_per_line=50), ['students', 'tokens']),
+        Benchmark('analyze/many_students', setup_analyze(2, 5, 50, 0.1, FAST_SETTINGS), ['students', 'tokens']),
+        Benchmark('get_test_grade/many_lines', setup_get_test_grade(100, 4, 3, 0.02, FAST_SETTINGS), ['tests']),
+        Benchmark('similarity/fingerprint', setup_fingerprint(200, 8), ['students']),
+        Benchmark('similarity/find_similar_pairs', setup_find_similar_pairs(2000, 8, 10), ['students']),
+        Benchmark('run_tests/python', setup_run_tests('python', 'main.py', PYTHON_PROGRAM, 20, 100), ['tests'], starts_processes=True),
+        Benchmark('run_tests/python_parallel', setup_run_tests('python', 'main.py', PYTHON_PROGRAM, 20, 100, max_parallel_tests=4), ['tests'], starts_processes=True),
+        Benchmark('run_tests/python_forkserver', setup_run_tests('python', 'main.py', PYTHON_PROGRAM, 20, 100, runner='forkserver'), ['tests'], starts_processes=True),
+        Benchmark('run_tests/bash', setup_run_tests('bash', 'main.sh', BASH_PROGRAM, 20, 100), ['tests'], starts_processes=True),
+        Benchmark('grade_students/python', setup_grade_students('python', 'main.py', PYTHON_PROGRAM, PYTHON_PROGRAM_WRONG, 10, 5, 50), ['students', 'tests'], starts_processes=True),
+        Benchmark('grade_students/bash', setup_grade_students('bash', 'main.sh', BASH_PROGRAM, BASH_PROGRAM_WRONG, 10, 5, 50), ['students', 'tests'], starts_processes=True),
+    ]
+
+    if shutil.which('javac') is not None and shutil.which('java') is not None:
+        for sample in sorted(os.listdir(SAMPLE_DIRECTORY)):
+            if path.isfile(path.join(SAMPLE_DIRECTORY, sample, 'tests.json')):
+                benchmarks.append(Benchmark(f'sample/{sample}', setup_sample(path.join(SAMPLE_DIRECTORY, sample)), ['students', 'tests'], starts_processes=True))
+
+    return benchmarks
+
+
+def compare_results(results, baseline, tolerance):
+    """Compares benchmark results against a baseline
+
+    Args:
+        results (dict): The results of each benchmark, by name
+        baseline (dict): The baseline results of each benchmark, by name
+        tolerance (float): How much slower, as a fraction, a benchmark can be, or how much more memory it can use,
+            before it counts as a regression
+
+    Returns:
+        dict: The change in throughput and memory of each benchmark in the baseline, along with whether it regressed
+    """
+    comparisons = {}
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        unit = next(iter(result['throughput']))
+        speed = result['throughput'][unit] / baseline[name]['throughput'][unit]
+        speed_tolerance = tolerance * 2 if result['starts_processes'] else tolerance
+
+        # Tiny allocations are noisy, so small absolute differences in memory never count as a regression
+        memory = result['peak_kb'] / max(baseline[name]['peak_kb'], 1)
+        memory_regressed = memory > 1 + tolerance and result['peak_kb'] - baseline[name]['peak_kb'] > 256
+
+        comparisons[name] = {'speed': speed, 'memory': memory, 'regressed': speed < 1 - speed_tolerance or memory_regressed}
+
+    return comparisons
+
+
+def format_throughput(throughput):
+    return ', '.join(f'{value:,.0f} {unit}/s' if value >= 100 else f'{value:,.2f} {unit}/s' for unit, value in throughput.items())
+
+
+def print_results(results, comparisons):
+    rows = [('BENCHMARK', 'TIME', 'THROUGHPUT', 'PEAK MEMORY', 'VS BASELINE')]
+
+    for name, result in results.items():
+        comparison = ''
+
+        if name in comparisons:
+            change = comparisons[name]
+            comparison = f'{change["speed"]:.2f}x speed, {change["memory"]:.2f}x memory{"  REGRESSION" if change["regressed"] else ""}'
+
+        rows.append((name, f'{result["seconds"] * 1000:.1f}ms', format_throughput(result['throughput']), f'{result["peak_kb"]:,.0f} KiB', comparison))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+
+    for row in rows:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the autograder and compares the results against a saved baseline')
+
+    parser.add_argument('--save', type=str, default=None, help='Save the results to this file, to be used as a baseline later')
+    parser.add_argument('--compare', type=str, default=None, help='Compare the results against a baseline saved with --save. Exits with 1 if anything regressed')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='How much slower, as a fraction, a benchmark can be before it counts as a regression. Defaults to 0.2')
+    parser.add_argument('--scale', type=float, default=1, help='Multiplies the size of the generated inputs. Use a small scale for a quick check')
+    parser.add_argument('--repeat', type=int, default=5, help='How many times to time each benchmark. The fastest time is kept. Defaults to 5')
+    parser.add_argument('-k', '--only', type=str, default=None, help='Only run benchmarks whose name contains this string')
+
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        if baseline.get('scale') != args.scale:
+            print(f'Warning: the baseline was run with --scale {baseline.get("scale")}, but this run uses --scale {args.scale}')
+
+    results = {}
+
+    for benchmark in get_benchmarks():
+        if args.only is not None and args.only not in benchmark.name:
+            continue
+
+        print(f'Running {benchmark.name}...', file=sys.stderr)
+        results[benchmark.name] = benchmark.measure(args.scale, args.repeat)
+
+    comparisons = compare_results(results, baseline['benchmarks'], args.tolerance) if baseline is not None else {}
+
+    print_results(results, comparisons)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump({'scale': args.scale, 'python': platform.python_version(), 'machine': platform.machine(), 'benchmarks': results}, f, indent=4)
+
+    if any(i['regressed'] for i in comparisons.values()):
+        print(f'\n{sum(i["regressed"] for i in comparisons.values())} benchmark(s) regressed by more than {args.tolerance:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
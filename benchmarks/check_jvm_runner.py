@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""Checks that the jvm runner gives the same results as the subprocess runner on the sample assignments. Every java
+    program in the samples, graders and students alike, is compiled once and run on its test cases with both runners,
+    and any test case whose stdout, stderr, exit code, or timeout differs is reported.
+
+    The samples are Java, so the check is skipped when javac and java aren't available.
+
+    Usage:
+        python benchmarks/check_jvm_runner.py               Check every sample
+        python benchmarks/check_jvm_runner.py -k prism      Only check samples whose name contains prism
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from os import path
+
+REPO_DIRECTORY = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+from WSUAutograder import TestCase  # noqa: E402
+from WSUAutograder._utils import create_program  # noqa: E402
+
+SAMPLE_DIRECTORY = path.join(REPO_DIRECTORY, 'samplePrograms')
+
+RUNNERS = ('subprocess', 'jvm')
+
+
+def get_sample_programs(sample_directory, settings):
+    """Finds the grader and every student program of a sample assignment
+
+    Args:
+        sample_directory (str): The sample assignment's directory
+        settings (dict): The settings section of the sample's config
+
+    Returns:
+        list(str): The directory of each program, grader first
+    """
+    student_root = path.join(sample_directory, settings['student_directory'])
+    students = [path.join(student_root, i) for i in sorted(os.listdir(student_root)) if path.isdir(path.join(student_root, i))]
+
+    return [path.join(sample_directory, settings['grader_directory']), *students]
+
+
+def run_with_runner(directory, settings, test_cases, runner):
+    """Runs a program on every test case with one of the runners. The program is expected to already be compiled
+
+    Args:
+        directory (str): The program's directory
+        settings (dict): The settings section of the sample's config
+        test_cases (list(TestCase)): The test cases to run
+        runner (str): The runner to use
+
+    Returns:
+        list(TestResult): The results, or None if no executable was found
+    """
+    program = create_program(directory, {**settings, 'runner': runner})
+
+    # The runners print which executable they picked, which only clutters the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not program.find_main_executable(interactive=False):
+            return None
+
+    return program.run_tests(test_cases, show_progress=False)
+
+
+def compare_results(subprocess_results, jvm_results):
+    """Compares the results of the two runners on the same test cases
+
+    Args:
+        subprocess_results (list(TestResult)): The results from the subprocess runner
+        jvm_results (list(TestResult)): The results from the jvm runner
+
+    Returns:
+        list(str): A description of every difference, which is empty if the runners agree
+    """
+    differences = []
+
+    for i, (expected, actual) in enumerate(zip(subprocess_results, jvm_results)):
+        for field in ('stdout', 'stderr', 'exit_code', 'timeout'):
+            if getattr(expected, field) != getattr(actual, field):
+                differences.append(f'test {i} ({expected.test_case.description}): {field} was {getattr(expected, field)!r} '
+                                   f'with subprocess but {getattr(actual, field)!r} with jvm')
+
+    return differences
+
+
+def check_sample(sample_directory):
+    """Checks the runners against each other on every program in a sample assignment
+
+    Args:
+        sample_directory (str): The sample assignment's directory
+
+    Returns:
+        tuple: The number of programs checked and a list of the differences found
+    """
+    with open(path.join(sample_directory, 'tests.json')) as f:
+        configs = json.load(f)
+
+    settings = configs['settings']
+    test_cases = TestCase.load_from_array(configs['tests'])
+
+    # Check a copy, so that compiling doesn't leave class files behind in the repo
+    scratch_directory = tempfile.mkdtemp(prefix='wsu-autograder-check-')
+    sample_copy = path.join(scratch_directory, 'sample')
+    shutil.copytree(sample_directory, sample_copy)
+
+    checked = 0
+    differences = []
+
+    try:
+        for directory in get_sample_programs(sample_copy, settings):
+            name = path.relpath(directory, sample_copy)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                compiled = create_program(directory, settings).compile()
+
+            if not compiled:
+                continue
+
+            results = {runner: run_with_runner(directory, settings, test_cases, runner) for runner in RUNNERS}
+
+            if results['subprocess'] is None or results['jvm'] is None:
+                continue
+
+            checked += 1
+            differences.extend(f'{name}: {i}' for i in compare_results(results['subprocess'], results['jvm']))
+
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+    return checked, differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks that the jvm runner gives the same results as the subprocess runner on the sample assignments')
+
+    parser.add_argument('-k', '--only', type=str, default=None, help='Only check samples whose name contains this string')
+
+    args = parser.parse_args()
+
+    if shutil.which('javac') is None or shutil.which('java') is None:
+        print('javac and java are needed to check the jvm runner, skipping')
+        return
+
+    failed = False
+
+    for sample in sorted(os.listdir(SAMPLE_DIRECTORY)):
+        sample_directory = path.join(SAMPLE_DIRECTORY, sample)
+
+        if args.only is not None and args.only not in sample:
+            continue
+
+        if not path.isfile(path.join(sample_directory, 'tests.json')):
+            continue
+
+        with open(path.join(sample_directory, 'tests.json')) as f:
+            if json.load(f)['settings'].get('language', 'java') != 'java':
+                continue
+
+        checked, differences = check_sample(sample_directory)
+        print(f'{sample}: {checked} programs checked, {len(differences)} differences')
+
+        for difference in differences:
+            print(f'  {difference}')
+
+        failed = failed or len(differences) > 0
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
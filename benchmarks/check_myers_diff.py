@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+
+"""Checks the Myers diff engine against difflib.ndiff, which it's a drop in replacement for. Random sequences are diffed
+    with both, and every Myers diff has to rebuild both sequences and use the fewest possible edits, which is never more
+    than ndiff uses. Where there's only one way to line the sequences up, the changed regions both engines find have to
+    be identical.
+
+    ndiff doesn't always find the fewest edits, so the engines can legitimately line outputs up differently and give
+    different grades. Generated outputs are graded with both engines, and the grades have to match whenever the engines
+    agreed on every comparison the grader made, meaning the same lines paired up and the same characters changed. Where
+    they didn't, the Myers diff still has to use no more edits than ndiff's. Only short outputs tend to be lined up the
+    same way by both, so how much the grades differ on the rest is reported too.
+
+    Usage:
+        python benchmarks/check_myers_diff.py                   Fuzz 20000 pairs of sequences and 200 graded outputs
+        python benchmarks/check_myers_diff.py --count 200000    Fuzz more pairs of sequences
+"""
+
+import argparse
+import random
+import sys
+from difflib import ndiff
+from os import path
+
+REPO_DIRECTORY = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+from WSUAutograder import SmartGrader  # noqa: E402
+from WSUAutograder.myersDiff import myers_diff  # noqa: E402
+from benchmark import generate_output, make_results, mutate_output  # noqa: E402
+
+# A small alphabet, so that random strings share plenty of characters and have many ways of being lined up
+ALPHABET = 'ab01 .-'
+
+ANALYSIS_MODES = ('pairwise', 'skeleton')
+
+
+def get_differences(diff):
+    """Drops the '? ' hint lines ndiff adds, leaving only the lines both engines produce
+
+    Args:
+        diff (iterable(str)): A diff in the format produced by difflib.ndiff
+
+    Returns:
+        list(str): The '  ', '- ', and '+ ' lines of the diff
+    """
+    return [i for i in diff if i[:2] in ('  ', '- ', '+ ')]
+
+
+def get_opcodes(differences):
+    """Works out the regions of two sequences that are the same and that changed, the way SequenceMatcher.get_opcodes
+        describes them
+
+    Args:
+        differences (list(str)): The lines of a diff, without any '? ' lines
+
+    Returns:
+        list(tuple): The tag, start and end in the first sequence, and start and end in the second sequence of each region
+    """
+    opcodes = []
+    i = 0
+    j = 0
+
+    for difference in differences:
+        tag = 'equal' if difference[:2] == '  ' else 'change'
+
+        if len(opcodes) == 0 or opcodes[-1][0] != tag:
+            opcodes.append([tag, i, i, j, j])
+
+        if difference[:2] in ('  ', '- '):
+            i += 1
+        if difference[:2] in ('  ', '+ '):
+            j += 1
+
+        opcodes[-1][2] = i
+        opcodes[-1][4] = j
+
+    # Name the changed regions the way SequenceMatcher does
+    for opcode in opcodes:
+        if opcode[0] == 'change':
+            opcode[0] = 'replace' if opcode[1] < opcode[2] and opcode[3] < opcode[4] else 'delete' if opcode[1] < opcode[2] else 'insert'
+
+    return [tuple(i) for i in opcodes]
+
+
+def count_edits(differences):
+    """Counts the items a diff deletes or inserts
+
+    Args:
+        differences (list(str)): The lines of a diff
+
+    Returns:
+        int: The number of '- ' and '+ ' lines
+    """
+    return sum(1 for i in differences if i[:2] in ('- ', '+ '))
+
+
+def get_min_edits(a, b):
+    """Finds the fewest deletions and insertions that turn one sequence into another from their longest common subsequence
+
+    Args:
+        a (sequence): The sequence being changed from
+        b (sequence): The sequence being changed to
+
+    Returns:
+        int: The fewest edits needed
+    """
+    previous = [0] * (len(b) + 1)
+
+    for i in range(len(a)):
+        current = [0] * (len(b) + 1)
+
+        for j in range(len(b)):
+            current[j + 1] = previous[j] + 1 if a[i] == b[j] else max(previous[j + 1], current[j])
+
+        previous = current
+
+    return len(a) + len(b) - 2 * previous[-1]
+
+
+def check_diff(a, b, max_edits):
+    """Diffs a pair of sequences with Myers, with and without an edit limit, and checks the diffs against ndiff's
+
+    Args:
+        a (sequence): The sequence being changed from
+        b (sequence): The sequence being changed to
+        max_edits (int): The edit limit to also diff the sequences with
+
+    Returns:
+        list(str): A description of everything wrong with the diffs
+    """
+    problems = []
+    min_edits = get_min_edits(a, b)
+    ndiff_edits = count_edits(get_differences(ndiff(a, b)))
+    unlimited = list(myers_diff(a, b))
+
+    for name, differences in (('unlimited', unlimited), (f'max_edits={max_edits}', list(myers_diff(a, b, max_edits)))):
+        if [i[2:] for i in differences if i[:2] != '+ '] != list(a) or [i[2:] for i in differences if i[:2] != '- '] != list(b):
+            problems.append(f'{a!r} -> {b!r}: the {name} diff doesn\'t rebuild both sequences')
+
+    if count_edits(unlimited) != min_edits:
+        problems.append(f'{a!r} -> {b!r}: used {count_edits(unlimited)} edits, but {min_edits} are enough')
+
+    if count_edits(unlimited) > ndiff_edits:
+        problems.append(f'{a!r} -> {b!r}: used {count_edits(unlimited)} edits, more than the {ndiff_edits} ndiff used')
+
+    # The limit only gives up on regions that need more edits than it allows, so within the limit nothing changes
+    if min_edits <= max_edits and list(myers_diff(a, b, max_edits)) != unlimited:
+        problems.append(f'{a!r} -> {b!r}: max_edits={max_edits} changed a diff that only needs {min_edits} edits')
+
+    return problems
+
+
+def check_random_sequences(count, seed):
+    """Diffs random strings, and random lists of lines, built from a small alphabet
+
+    Args:
+        count (int): The number of pairs of sequences to check
+        seed (int): Seeds the random sequences
+
+    Returns:
+        list(str): A description of every problem found
+    """
+    rng = random.Random(seed)
+    problems = []
+
+    for i in range(count):
+        a = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 30)))
+        b = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 30)))
+
+        # Every other pair is split into lines instead, like the outputs compared line by line
+        if i % 2 == 1:
+            a = [f'{line}\n' for line in a.split(' ')]
+            b = [f'{line}\n' for line in b.split(' ')]
+
+        problems.extend(check_diff(a, b, rng.randint(0, 20)))
+
+    return problems
+
+
+def check_unique_alignments(count, seed):
+    """Diffs sequences that can only be lined up one way, because every item is different and the second sequence only
+        deletes and inserts items, and checks that both engines find the same changed regions
+
+    Args:
+        count (int): The number of pairs of sequences to check
+        seed (int): Seeds the random sequences
+
+    Returns:
+        list(str): A description of every pair the engines disagreed on
+    """
+    rng = random.Random(seed)
+    problems = []
+
+    for _ in range(count):
+        a = [f'line {i}\n' for i in range(rng.randint(0, 30))]
+        b = []
+        inserted = 0
+
+        for item in a + [None]:
+            while rng.random() < 0.2:
+                b.append(f'new {inserted}\n')
+                inserted += 1
+
+            if item is not None and rng.random() >= 0.3:
+                b.append(item)
+
+        myers_opcodes = get_opcodes(list(myers_diff(a, b)))
+        ndiff_opcodes = get_opcodes(get_differences(ndiff(a, b)))
+
+        if myers_opcodes != ndiff_opcodes:
+            problems.append(f'{a!r} -> {b!r}: opcodes were {myers_opcodes} with myers but {ndiff_opcodes} with ndiff')
+
+    return problems
+
+
+class _ComparingGrader(SmartGrader):
+    # Grades with ndiff, but also diffs everything with Myers, keeping the edit counts of every diff the two disagree on.
+    #   Lines are paired up in the order the diff lists them, so line diffs have to match exactly, but for characters
+    #   only which ones changed matters, so those only have to change the same regions
+    def __init__(self, *args, **kwargs):
+        self.disagreements = []
+        super().__init__(*args, **kwargs)
+
+
+    def _diff(self, a, b):
+        differences = get_differences(super()._diff(a, b))
+        myers_differences = list(myers_diff(a, b, self.diff_edit_limit))
+
+        if (myers_differences != differences) if isinstance(a, list) else (get_opcodes(myers_differences) != get_opcodes(differences)):
+            self.disagreements.append((a, b, count_edits(myers_differences), count_edits(differences)))
+
+        return differences
+
+
+def check_grades(count, seed):
+    """Grades generated outputs with both diff engines and both analysis modes
+
+    Args:
+        count (int): The number of students to generate
+        seed (int): Seeds the generated outputs
+
+    Returns:
+        tuple: The number of gradings where the engines agreed on every diff, the number where the grades differed,
+            the largest difference in a grade, and a description of every problem found
+    """
+    rng = random.Random(seed)
+    aligned_same = 0
+    graded_differently = 0
+    largest_difference = 0.0
+    problems = []
+
+    for student in range(count):
+        line_count = rng.choice([1, 1, 3, 8, 20])
+        numbers_per_line = rng.choice([1, 4])
+        rate = rng.choice([0.0, 0.1, 0.3, 0.7])
+
+        grader_outputs = [generate_output(rng, line_count, numbers_per_line) for _ in range(rng.choice([2, 3]))]
+        student_outputs = [mutate_output(rng, output, rate) for output in grader_outputs]
+
+        for mode in ANALYSIS_MODES:
+            ndiff_grader = _ComparingGrader({'analysis_mode': mode}, make_results(grader_outputs), make_results(student_outputs))
+            ndiff_grader.analyze()
+
+            myers_grader = SmartGrader({'analysis_mode': mode, 'diff_engine': 'myers'}, make_results(grader_outputs), make_results(student_outputs))
+            myers_grader.analyze()
+
+            ndiff_grades = [ndiff_grader.get_test_grade(i) for i in range(len(grader_outputs))]
+            myers_grades = [myers_grader.get_test_grade(i) for i in range(len(grader_outputs))]
+
+            difference = max(abs(i - j) for i, j in zip(ndiff_grades, myers_grades))
+            graded_differently += 1 if difference > 0 else 0
+            largest_difference = max(largest_difference, difference)
+
+            if len(ndiff_grader.disagreements) == 0:
+                aligned_same += 1
+
+                if ndiff_grades != myers_grades:
+                    problems.append(f'student {student} ({mode}): both engines gave the same diffs, but the grades were {ndiff_grades} '
+                                    f'with ndiff and {myers_grades} with myers')
+
+            for a, b, myers_edits, ndiff_edits in ndiff_grader.disagreements:
+                if myers_edits > ndiff_edits:
+                    problems.append(f'student {student} ({mode}): {a!r} -> {b!r} used {myers_edits} edits with myers but {ndiff_edits} with ndiff')
+
+    return aligned_same, graded_differently, largest_difference, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks the Myers diff engine against difflib.ndiff')
+
+    parser.add_argument('--count', type=int, default=20000, help='The number of random pairs of sequences to check. Defaults to 20000')
+    parser.add_argument('--students', type=int, default=200, help='The number of generated students to grade with both engines. Defaults to 200')
+    parser.add_argument('--seed', type=int, default=0, help='Seeds the random sequences and generated outputs. Defaults to 0')
+
+    args = parser.parse_args()
+
+    problems = check_random_sequences(args.count, args.seed)
+    print(f'{args.count} random pairs of sequences checked, {len(problems)} problems')
+
+    unique_problems = check_unique_alignments(args.count, args.seed)
+    print(f'{args.count} pairs with only one alignment checked, {len(unique_problems)} problems')
+
+    aligned_same, graded_differently, largest_difference, grade_problems = check_grades(args.students, args.seed)
+    print(f'{args.students} students graded with {len(ANALYSIS_MODES)} analysis modes, {aligned_same} lined up the same way by both engines, '
+          f'{len(grade_problems)} problems')
+    print(f'  {graded_differently} graded differently by the engines, by at most {largest_difference:.2f} points')
+
+    problems += unique_problems + grade_problems
+
+    for problem in problems[:20]:
+        print(f'  {problem}')
+
+    if len(problems) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+"""Checks that submission dates in Pilot bulk downloads are parsed correctly. Pilot writes times without a separator,
+    like '105 PM', which strptime misreads as 10:05 PM, so every time of day is written the way Pilot writes it and
+    parsed back. A bulk download with an earlier and a later submission from the same student is also read, to check
+    that the later one is the one that gets graded.
+
+    Usage:
+        python benchmarks/check_pilot_dates.py
+"""
+
+import argparse
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+from os import path
+
+REPO_DIRECTORY = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+from WSUAutograder.submissionArchive import SubmissionArchive, parse_pilot_date  # noqa: E402
+
+# Dates as they appear in Pilot file names, along with when they actually were
+KNOWN_DATES = [
+    ('Mar 5, 2024 105 PM', datetime(2024, 3, 5, 13, 5)),
+    ('Mar 5, 2024 110 PM', datetime(2024, 3, 5, 13, 10)),
+    ('Mar 5, 2024 1100 AM', datetime(2024, 3, 5, 11, 0)),
+    ('Mar 5, 2024 1159 PM', datetime(2024, 3, 5, 23, 59)),
+    ('Mar 5, 2024 1200 AM', datetime(2024, 3, 5, 0, 0)),
+    ('Mar 5, 2024 1200 PM', datetime(2024, 3, 5, 12, 0)),
+    ('Dec 31, 2023 959 AM', datetime(2023, 12, 31, 9, 59)),
+]
+
+
+def format_pilot_date(date):
+    """Writes a date the way Pilot does in the names of the files in a bulk download
+
+    Args:
+        date (datetime): The date to write
+
+    Returns:
+        str: The date, such as 'Mar 5, 2024 105 PM'
+    """
+    hour = date.hour % 12 if date.hour % 12 != 0 else 12
+    return f'{date.strftime("%b")} {date.day}, {date.year} {hour}{date.minute:02d} {"PM" if date.hour >= 12 else "AM"}'
+
+
+def check_dates():
+    """Parses the known dates and every minute of a day written the way Pilot writes them
+
+    Returns:
+        list(str): A description of every date that was parsed wrong
+    """
+    failures = []
+    cases = list(KNOWN_DATES)
+
+    for minute in range(24 * 60):
+        date = datetime(2024, 3, 5, minute // 60, minute % 60)
+        cases.append((format_pilot_date(date), date))
+
+    for text, expected in cases:
+        try:
+            actual = parse_pilot_date(text)
+        except ValueError as e:
+            actual = e
+
+        if actual != expected:
+            failures.append(f'{text!r} was parsed as {actual}, not {expected}')
+
+    return failures
+
+
+def check_latest_submission():
+    """Reads a bulk download with two submissions from the same student, where the earlier one has a 4 digit time
+        and the later one a 3 digit time
+
+    Returns:
+        list(str): A description of the problem if the wrong submission was kept, otherwise empty
+    """
+    with tempfile.TemporaryDirectory(prefix='wsu-autograder-check-') as scratch_directory:
+        archive_path = path.join(scratch_directory, 'pilot.zip')
+
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.writestr('1234 - Ada Lovelace - Mar 5, 2024 1100 AM - main.py', 'print("earlier")\n')
+            archive.writestr('1234 - Ada Lovelace - Mar 5, 2024 105 PM - main.py', 'print("later")\n')
+
+        SubmissionArchive(archive_path).extract('Ada Lovelace', path.join(scratch_directory, 'ada'))
+
+        with open(path.join(scratch_directory, 'ada', 'main.py')) as f:
+            source = f.read()
+
+    if 'later' not in source:
+        return [f'The 11:00 AM submission was kept instead of the 1:05 PM one: {source!r}']
+
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks that submission dates in Pilot bulk downloads are parsed correctly')
+    parser.parse_args()
+
+    failures = check_dates() + check_latest_submission()
+    print(f'{len(KNOWN_DATES) + 24 * 60} dates and 1 bulk download checked, {len(failures)} failures')
+
+    for failure in failures[:20]:
+        print(f'  {failure}')
+
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
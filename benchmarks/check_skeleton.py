@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+"""Checks how far the grades from the skeleton analysis mode drift from the pairwise analysis it approximates. Every
+    student is graded with both modes on the same results, and the largest difference in a test case grade and in an
+    overall grade is reported, along with where it happened.
+
+    Generated outputs with a range of line counts and mistake rates are always checked. The sample assignments are
+    also checked when the compilers they need are available, so the Java samples are skipped without javac and java.
+
+    Usage:
+        python benchmarks/check_skeleton.py                     Check the generated cases and the samples
+        python benchmarks/check_skeleton.py --tolerance 5       Exit with 1 if any grade differs by more than 5 points
+        python benchmarks/check_skeleton.py -k prism            Only check samples whose name contains prism
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from os import path
+
+REPO_DIRECTORY = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+from WSUAutograder import GraderProfile, SmartGrader, TestCase  # noqa: E402
+from WSUAutograder._utils import create_program, get_grading_settings, run_program  # noqa: E402
+from benchmark import SAMPLE_DIRECTORY, generate_output, make_results, mutate_output  # noqa: E402
+
+ANALYSIS_MODES = ('pairwise', 'skeleton')
+
+# The line counts, numbers per line, and fractions of lines with mistakes the generated cases are made with
+GENERATED_LINE_COUNTS = (1, 5, 20, 40)
+GENERATED_NUMBERS_PER_LINE = (1, 4)
+GENERATED_MUTATION_RATES = (0.0, 0.05, 0.2, 0.5, 1.0)
+
+# Grades that differ by less than this round to the same grade in the report, so they aren't counted as different
+_grade_epsilon = 0.005
+
+# The compilers each sample language needs before its sample can be checked
+_language_tools = {'java': ('javac', 'java'), 'c': ('gcc',), 'cpp': ('g++',)}
+
+
+def grade_both_modes(settings, grader_results, student_results):
+    """Grades a student's results against the grader's with each analysis mode
+
+    Args:
+        settings (dict): The grading settings, without analysis_mode
+        grader_results (list(TestResult)): The grader's results on the test cases
+        student_results (list(TestResult)): The student's results on the same test cases
+
+    Returns:
+        dict: Each analysis mode's test case grades followed by its overall grade
+    """
+    grades = {}
+
+    for mode in ANALYSIS_MODES:
+        mode_settings = {**settings, 'analysis_mode': mode}
+        grader_profile = GraderProfile(mode_settings, grader_results)
+
+        sg = SmartGrader(mode_settings, student_results=student_results, grader_profile=grader_profile)
+        sg.analyze()
+
+        grades[mode] = [sg.get_test_grade(i) for i in range(len(student_results))] + [sg.get_overall_grade()]
+
+    return grades
+
+
+def compare_grades(name, grades):
+    """Finds the test case grade and the overall grade that differ the most between the analysis modes
+
+    Args:
+        name (str): Describes the student the grades are for
+        grades (dict): The grades from grade_both_modes
+
+    Returns:
+        tuple: The largest test case difference and the largest overall difference, each as a tuple of the difference
+            and a description of where it is
+    """
+    differences = [abs(pairwise - skeleton) for pairwise, skeleton in zip(grades['pairwise'], grades['skeleton'])]
+    test_num = max(range(len(differences) - 1), key=lambda i: differences[i], default=None)
+
+    if test_num is None:
+        largest_test = (0.0, name)
+    else:
+        largest_test = (differences[test_num], f'{name}, test {test_num}: {grades["pairwise"][test_num]:.2f} pairwise, '
+                                               f'{grades["skeleton"][test_num]:.2f} skeleton')
+
+    largest_overall = (differences[-1], f'{name}: {grades["pairwise"][-1]:.2f} pairwise, {grades["skeleton"][-1]:.2f} skeleton')
+
+    return largest_test, largest_overall
+
+
+def check_generated(seed, student_count, test_count):
+    """Grades generated students with both analysis modes
+
+    Args:
+        seed (int): Seeds the generated outputs
+        student_count (int): The number of students to generate for each case
+        test_count (int): The number of test cases in each case
+
+    Returns:
+        list(tuple): The largest test case and overall differences of every student, from compare_grades
+    """
+    rng = random.Random(seed)
+    comparisons = []
+
+    for line_count in GENERATED_LINE_COUNTS:
+        for numbers_per_line in GENERATED_NUMBERS_PER_LINE:
+            for rate in GENERATED_MUTATION_RATES:
+                grader_outputs = [generate_output(rng, line_count, numbers_per_line) for _ in range(test_count)]
+                grader_results = make_results(grader_outputs)
+
+                for student in range(student_count):
+                    student_results = make_results([mutate_output(rng, output, rate) for output in grader_outputs])
+                    name = f'{line_count} lines, {numbers_per_line} numbers per line, mistake rate {rate}, student {student}'
+
+                    comparisons.append(compare_grades(name, grade_both_modes({}, grader_results, student_results)))
+
+    return comparisons
+
+
+def check_sample(sample_directory):
+    """Runs the grader and every student of a sample assignment once, then grades the students with both analysis modes
+
+    Args:
+        sample_directory (str): The sample assignment's directory
+
+    Returns:
+        list(tuple): The largest test case and overall differences of every student, from compare_grades
+    """
+    with open(path.join(sample_directory, 'tests.json')) as f:
+        configs = json.load(f)
+
+    settings = configs['settings']
+    test_cases = TestCase.load_from_array(configs['tests'])
+    grading_settings = {name: value for name, value in get_grading_settings(settings).items() if name != 'analysis_mode'}
+
+    # Check a copy, so that compiling doesn't leave build outputs behind in the repo
+    scratch_directory = tempfile.mkdtemp(prefix='wsu-autograder-check-')
+    sample_copy = path.join(scratch_directory, 'sample')
+    shutil.copytree(sample_directory, sample_copy)
+
+    comparisons = []
+
+    try:
+        # Compiling and running prints progress that only clutters the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            grader_results = run_program(create_program(path.join(sample_copy, settings['grader_directory']), settings), test_cases, interactive=False)
+
+        if grader_results is None:
+            return comparisons
+
+        student_root = path.join(sample_copy, settings['student_directory'])
+
+        for student in sorted(os.listdir(student_root)):
+            if not path.isdir(path.join(student_root, student)):
+                continue
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                student_results = run_program(create_program(path.join(student_root, student), settings), test_cases, interactive=False)
+
+            if student_results is None:
+                continue
+
+            comparisons.append(compare_grades(student, grade_both_modes(grading_settings, grader_results, student_results)))
+
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+    return comparisons
+
+
+def report(title, comparisons, tolerance):
+    """Prints the largest differences found in a set of comparisons
+
+    Args:
+        title (str): What was checked
+        comparisons (list(tuple)): The results of compare_grades
+        tolerance (float): The largest difference allowed, or None if any difference is allowed
+
+    Returns:
+        bool: Whether any difference was larger than the tolerance
+    """
+    if len(comparisons) == 0:
+        print(f'{title}: no students were graded')
+        return False
+
+    largest_test = max((i[0] for i in comparisons), key=lambda i: i[0])
+    largest_overall = max((i[1] for i in comparisons), key=lambda i: i[0])
+    differing = sum(1 for i in comparisons if i[0][0] >= _grade_epsilon or i[1][0] >= _grade_epsilon)
+
+    print(f'{title}: {len(comparisons)} students checked, {differing} graded differently, '
+          f'largest test case difference {largest_test[0]:.2f}, largest overall difference {largest_overall[0]:.2f}')
+
+    if largest_test[0] >= _grade_epsilon:
+        print(f'  {largest_test[1]}')
+    if largest_overall[0] >= _grade_epsilon:
+        print(f'  {largest_overall[1]}')
+
+    if tolerance is None:
+        return False
+
+    over_tolerance = [i for comparison in comparisons for i in comparison if i[0] > tolerance]
+
+    for difference, description in over_tolerance[:20]:
+        print(f'  Over the tolerance by {difference - tolerance:.2f}: {description}')
+
+    return len(over_tolerance) > 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks how far skeleton grades drift from pairwise grades')
+
+    parser.add_argument('--tolerance', type=float, default=None, help='Exit with 1 if any grade differs by more than this many points. By default differences are only reported')
+    parser.add_argument('--seed', type=int, default=0, help='Seeds the generated outputs. Defaults to 0')
+    parser.add_argument('--students', type=int, default=3, help='The number of students generated for each case. Defaults to 3')
+    parser.add_argument('--tests', type=int, default=3, help='The number of test cases in each generated case. Defaults to 3')
+    parser.add_argument('-k', '--only', type=str, default=None, help='Only check samples whose name contains this string')
+
+    args = parser.parse_args()
+
+    failed = report('generated', check_generated(args.seed, args.students, args.tests), args.tolerance)
+
+    for sample in sorted(os.listdir(SAMPLE_DIRECTORY)):
+        sample_directory = path.join(SAMPLE_DIRECTORY, sample)
+
+        if args.only is not None and args.only not in sample:
+            continue
+
+        if not path.isfile(path.join(sample_directory, 'tests.json')):
+            continue
+
+        with open(path.join(sample_directory, 'tests.json')) as f:
+            language = json.load(f)['settings'].get('language', 'java')
+
+        missing_tools = [i for i in _language_tools.get(language, ()) if shutil.which(i) is None]
+
+        if len(missing_tools) > 0:
+            print(f'{sample}: {" and ".join(missing_tools)} needed to run the sample, skipping')
+            continue
+
+        failed = report(sample, check_sample(sample_directory), args.tolerance) or failed
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
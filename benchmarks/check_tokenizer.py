@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+"""Checks that the regex tokenizer splits output into the same tokens as the Lark grammar it replaced, and times the
+    two against each other. Random strings built from digits, signs, dots, whitespace, and letters are split by both,
+    and any string Lark accepts must give exactly the same tokens. Strings Lark rejected used to crash analyze, so for
+    those the regex tokens only need to cover the whole string.
+
+    Needs lark-parser, which is in environment.yml but isn't a dependency of the autograder itself, so the check is
+    skipped when it isn't installed.
+
+    Usage:
+        python benchmarks/check_tokenizer.py                    Fuzz 100000 strings and time both tokenizers
+        python benchmarks/check_tokenizer.py --count 1000000    Fuzz more strings
+"""
+
+import argparse
+import random
+import sys
+import time
+from os import path
+
+REPO_DIRECTORY = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+from WSUAutograder import SmartGrader  # noqa: E402
+from WSUAutograder.smartGrader import TokenType  # noqa: E402
+from benchmark import generate_output  # noqa: E402
+
+try:
+    from lark import Lark
+    from lark.exceptions import LarkError
+except ImportError:
+    Lark = None
+
+# The grammar the autograder used before the regex tokenizer, kept here as the reference it's checked against
+LARK_GRAMMAR = r'''
+start: (float | int | word | space)*
+
+INTEGER: "0".."9"+
+SPACE: /[\s]+/
+SIGN: "-" | "+"
+DOT: "."
+WORD: /[^\s\d\.+-]/+
+
+int.2: SIGN? INTEGER
+float.3: SIGN? INTEGER? DOT INTEGER
+word: WORD | SIGN DOT? | DOT
+space: SPACE
+'''
+
+_lark_token_types = {'word': TokenType.word, 'int': TokenType.integer, 'float': TokenType.floating, 'space': TokenType.whitespace}
+
+# Every character class the grammar treats differently, along with a few that only look like digits or whitespace
+ALPHABET = '0123456789-+. \t\nabcXYZ_,:()é٣ '
+
+
+def split_tokens_lark(parser, string):
+    """Splits a string the way the autograder did with Lark
+
+    Args:
+        parser (Lark): A parser built from LARK_GRAMMAR
+        string (str): The string to split
+
+    Returns:
+        list(tuple): The text, start, end, and type of each token
+    """
+    tokens = []
+    token_start = 0
+
+    for i in parser.parse(string).children:
+        token_value = ''.join(t.value for t in i.children)
+        tokens.append((token_value, token_start, token_start + len(token_value), _lark_token_types[i.data]))
+        token_start += len(token_value)
+
+    return tokens
+
+
+def split_tokens_regex(grader, string):
+    """Splits a string with the regex tokenizer
+
+    Args:
+        grader (SmartGrader): The grader whose tokenizer is used
+        string (str): The string to split
+
+    Returns:
+        list(tuple): The text, start, end, and type of each token
+    """
+    return [(i.value, i.start, i.end, i.token_type) for i in grader._split_tokens(string)]
+
+
+def check_equivalence(parser, grader, count, seed):
+    """Splits random strings with both tokenizers and compares the tokens
+
+    Args:
+        parser (Lark): A parser built from LARK_GRAMMAR
+        grader (SmartGrader): The grader whose tokenizer is checked
+        count (int): The number of random strings to check
+        seed (int): Seeds the random strings
+
+    Returns:
+        tuple: The number of strings Lark rejected, and a list of the strings the tokenizers disagreed on
+    """
+    rng = random.Random(seed)
+    rejected = 0
+    mismatches = []
+
+    for _ in range(count):
+        string = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12)))
+        regex_tokens = split_tokens_regex(grader, string)
+
+        try:
+            lark_tokens = split_tokens_lark(parser, string)
+        except LarkError:
+            rejected += 1
+
+            if ''.join(i[0] for i in regex_tokens) != string:
+                mismatches.append(string)
+
+            continue
+
+        if regex_tokens != lark_tokens:
+            mismatches.append(string)
+
+    return rejected, mismatches
+
+
+def time_tokenizers(parser, grader, line_count):
+    """Times both tokenizers on generated program output
+
+    Args:
+        parser (Lark): A parser built from LARK_GRAMMAR
+        grader (SmartGrader): The grader whose tokenizer is timed
+        line_count (int): The number of lines of output to generate
+
+    Returns:
+        tuple: The number of characters split, and the seconds Lark and the regex tokenizer took
+    """
+    output = generate_output(random.Random(0), line_count)
+
+    start = time.perf_counter()
+    split_tokens_lark(parser, output)
+    lark_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    split_tokens_regex(grader, output)
+    regex_seconds = time.perf_counter() - start
+
+    return len(output), lark_seconds, regex_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks the regex tokenizer against the Lark grammar it replaced, and times the two')
+
+    parser.add_argument('--count', type=int, default=100000, help='The number of random strings to check. Defaults to 100000')
+    parser.add_argument('--seed', type=int, default=0, help='Seeds the random strings. Defaults to 0')
+    parser.add_argument('--lines', type=int, default=20000, help='The number of lines of output to time the tokenizers on. Defaults to 20000')
+
+    args = parser.parse_args()
+
+    if Lark is None:
+        print('lark-parser is needed to check the tokenizer, skipping')
+        return
+
+    lark_parser = Lark(LARK_GRAMMAR, parser='lalr')
+    grader = SmartGrader()
+
+    rejected, mismatches = check_equivalence(lark_parser, grader, args.count, args.seed)
+    print(f'{args.count} strings checked, {rejected} rejected by Lark, {len(mismatches)} mismatches')
+
+    for string in mismatches[:20]:
+        print(f'  {string!r}: regex {split_tokens_regex(grader, string)}')
+
+    characters, lark_seconds, regex_seconds = time_tokenizers(lark_parser, grader, args.lines)
+    print(f'Split {characters} characters in {lark_seconds:.3f}s with Lark and {regex_seconds:.3f}s with the regex, '
+          f'{lark_seconds / regex_seconds:.1f}x faster')
+
+    if len(mismatches) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,8 +14,13 @@ setup(
     author_email='cse-support@wright.edu',
     license='MIT',
     packages=find_packages(),
+    package_data={'WSUAutograder': ['*.java']},
     entry_points={
-        'console_scripts': ['autograder=WSUAutograder._utils:autograder']
+        'console_scripts': [
+            'autograder=WSUAutograder._utils:autograder',
+            'autograder-worker=WSUAutograder.distributedGrader:autograder_worker',
+            'autograder-server=WSUAutograder.gradingServer:autograder_server'
+        ]
     },
     classifiers=[
         'License :: OSI Approved :: MIT License',
@@ -29,7 +34,6 @@ setup(
     ],
     install_requires=[
         'binaryornot',
-        'lark-parser',
         'Pygments',
         'tqdm'
     ],